@@ -5,13 +5,54 @@ import seaborn as sns
 import pandas as pd
 from scipy import stats
 import json
-from datetime import datetime
-from typing import Dict, List, Any
+import os
+import atexit
+from typing import Dict, List, Any, Optional
 import uuid
 import time
-import random
+from collections import Counter
+
+from modules.bootstrap import get_ab_counts, run_bootstrap
+from modules.cohorts import MAX_WEEKS, VARIANTS, calibrate_hazard, simulate_retention, winner_at
+from modules.content import ContentSnapshot, ContentStore
+from modules.events import EventBus, GameEvent, LiveAggregates, stuck_share
+from modules.event_log import EventLog, ensure_event_log, parse_day_range
+from modules.gallery import GALLERY_COLUMNS, ThumbnailStore, page_count, page_slice, thumbnail_key
+from modules.game_engine import AchievementChecker, attach_award_pipeline
+from modules.i18n import LOCALES, SOURCE_LOCALE, load_catalog, localize_case
+from modules.pages import (ABOUT_TEXT, ABOUT_TITLE, APP_CSS, APP_TAGLINE, APP_TITLE, CASE_TYPE_LABELS,
+                           LINKS_TITLE, MODE_CARDS, NEWS_ITEMS, NEWS_TITLE, RELATED_LINKS, WELCOME_TEXT,
+                           WELCOME_TITLE)
+from modules.rating import DIFFICULTY_RATINGS, RatingEngine
+from modules.scheduler import CaseScheduler
+from modules.search import CaseSearchIndex
+from modules.session_state import PlayerStats, SessionRegistry, SessionStore
+from modules.telemetry import Telemetry, active_gap
+from modules.tracing import TraceRecorder, widget_changes, widget_snapshot
+from modules.visualizations import RenderCache, render_case_png
 
 # ===== КОНФИГУРАЦИЯ =====
+DATA_DIR = "data"
+# Пауза, чтобы игрок успел прочитать обратную связь шага сценария
+SCENARIO_FEEDBACK_DELAY = float(os.environ.get("DETECTIVE_FEEDBACK_DELAY", "2"))
+TELEMETRY_PATH = os.path.join(DATA_DIR, "telemetry.sqlite3")
+SESSIONS_PATH = os.path.join(DATA_DIR, "sessions.sqlite3")
+# Панель ведущего: период обновления и необязательный код доступа
+LIVE_REFRESH_SECONDS = 2
+INSTRUCTOR_CODE = os.environ.get("DETECTIVE_INSTRUCTOR_CODE")
+# Запись трасс взаимодействия (tools/replay_traces.py): каталог и доля сессий; без каталога выключена
+TRACE_DIR = os.environ.get("DETECTIVE_TRACE_DIR")
+TRACE_SAMPLE = float(os.environ.get("DETECTIVE_TRACE_SAMPLE", "1"))
+# Язык интерфейса по умолчанию; ссылка ?lang=en открывает сессию на другом языке
+DEFAULT_LOCALE = os.environ.get("DETECTIVE_LOCALE", SOURCE_LOCALE)
+# Галерея кейсов: каталог миниатюр, процессы отрисовки, ожидание миниатюр страницы и период дорисовки
+THUMBNAILS_DIR = os.path.join(DATA_DIR, "thumbnails")
+THUMBNAIL_WORKERS = int(os.environ.get("DETECTIVE_THUMBNAIL_WORKERS", "2"))
+GALLERY_WAIT_SECONDS = 0.3
+GALLERY_REFRESH_SECONDS = 1
+# Симулятор когорт: форма кривой оттока (параметр Вейбулла)
+COHORT_SHAPE_LABELS = {0.5: "быстро затухает", 0.7: "затухает", 1.0: "постоянный", 1.3: "нарастает"}
+
 st.set_page_config(
     page_title="Statistical Detective 🕵️",
     page_icon="🕵️",
@@ -20,186 +61,223 @@ st.set_page_config(
 )
 
 # Кастомные стили
-st.markdown("""
-<style>
-    .detective-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    
-    .case-card {
-        border: 2px solid #e1e5e9;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 1rem 0;
-        background: #f8f9fa;
-    }
-    
-    .score-badge {
-        background: #28a745;
-        color: white;
-        padding: 0.25rem 0.5rem;
-        border-radius: 15px;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{APP_CSS}</style>", unsafe_allow_html=True)
 
 # ===== ГЛАВНАЯ ФУНКЦИЯ =====
 def main():
     """Главная функция приложения"""
+    started = time.perf_counter()
+    trace_changes = begin_trace_step()
+    st.session_state.full_rerun = True
     
-    # Инициализация игрового состояния
-    init_game_state()
-    
-    # Хедер приложения
-    render_header()
-    
-    # Боковая панель с профилем
-    render_sidebar()
-    
-    # Основной контент
-    render_main_content()
-    
-    # Футер
-    render_footer()
+    try:
+        # Инициализация игрового состояния
+        init_game_state()
+        
+        # Хедер приложения
+        render_header()
+        
+        # Боковая панель с профилем
+        render_sidebar()
+        
+        # Основной контент
+        render_main_content()
+        show_achievement_notifications()
+        
+        # Футер
+        render_footer()
+    finally:
+        st.session_state.full_rerun = False
+        end_trace_step(trace_changes, started)
 
 # ===== ИНИЦИАЛИЗАЦИЯ =====
+# Режимы игры: стабильный id (роутинг, ссылки статической сборки, трассы) и подпись
+MODES = {
+    'home': "🏠 Главная страница",
+    'error_hunting': "🔍 Найди ошибку в анализе",
+    'decisions': "🎯 Сценарии принятия решений",
+    'bias_detection': "⚠️ Поймай предвзятость",
+    'dataset': "🗄️ Расследование по сырым данным",
+    'random': "🎲 Случайный кейс",
+    'search': "🔎 Поиск кейсов",
+    'stats': "📊 Статистика и рейтинги",
+    'instructor': "👩‍🏫 Панель ведущего"
+}
+DIFFICULTIES = ["Новичок", "Аналитик", "Эксперт"]
+
 def init_game_state():
     """Инициализация игрового состояния"""
     if 'player_id' not in st.session_state:
         st.session_state.player_id = str(uuid.uuid4())[:8]
     
+    if 'locale' not in st.session_state:
+        lang = st.query_params.get('lang')
+        st.session_state.locale = lang if lang in LOCALES else DEFAULT_LOCALE
+    
+    # Каталог языка берется один раз за rerun; t() дальше - поиск в словаре
+    st.session_state.translate = get_catalog(st.session_state.locale).gettext
+    
     if 'player_stats' not in st.session_state:
-        st.session_state.player_stats = {
-            'score': 0,
-            'level': 1,
-            'solved_cases': set(),
-            'current_streak': 0,
-            'best_streak': 0,
-            'achievements': set(),
-            'play_time': 0,
-            'started_at': datetime.now().isoformat()
-        }
+        st.session_state.player_stats = PlayerStats(st.session_state.player_id)
+    
+    # Отмечаем активность; вытесненное по простою состояние поднимается из хранилища
+    get_session_registry().touch(st.session_state.player_stats)
     
     if 'current_case' not in st.session_state:
         st.session_state.current_case = None
+        st.session_state.answered_case = None
+    
+    if 'content' not in st.session_state:
+        st.session_state.content = get_content_store().snapshot
+    
+    if 'scheduler' not in st.session_state:
+        st.session_state.scheduler = CaseScheduler()
+    
+    if 'last_event_at' not in st.session_state:
+        track_event('session_start')
+        apply_deep_link()
+
+def apply_deep_link():
+    """Открывает режим или кейс из ссылки статической сборки (?mode=... или ?case=...)"""
+    case_id = st.query_params.get('case')
+    mode = st.query_params.get('mode')
+    if case_id in get_content().cases:
+        st.session_state.game_mode = 'random'
+        st.session_state.random_case_id = case_id
+    elif mode in MODES:
+        st.session_state.game_mode = mode
+
+# ===== ЛОКАЛИЗАЦИЯ =====
+@st.cache_resource
+def get_catalog(locale: str):
+    """Скомпилированный каталог языка: загружается при первой сессии на этом языке, общий для всех"""
+    return load_catalog(locale)
+
+def t(message: str) -> str:
+    """Строка интерфейса на языке сессии"""
+    return st.session_state.translate(message)
+
+def t_labels(values) -> Dict:
+    """
+    Переведенные подписи вариантов виджета. format_func получает готовый
+    словарь: подписи не пересчитываются и не зависят от контекста rerun.
+    """
+    return {value: t(label) for value, label in (values.items() if isinstance(values, dict) else zip(values, values))}
+
+def case_labels(cases: List[Dict]) -> Dict[str, str]:
+    """
+    Названия кейсов на языке сессии по их id (для выбора кейса). У
+    сгенерированных кейсов одного семейства названия совпадают - в списке
+    выбора они нумеруются.
+    """
+    labels = {case['id']: t(case['title']) for case in cases}
+    repeats, seen = Counter(labels.values()), Counter()
+    for case_id, label in labels.items():
+        if repeats[label] > 1:
+            seen[label] += 1
+            labels[case_id] = f"{label} ({seen[label]})"
+    return labels
+
+def localized(case: Dict) -> Dict:
+    """Кейс на языке сессии (через кэш отрисовки, один перевод на язык и версию кейса)"""
+    locale = st.session_state.locale
+    if locale == SOURCE_LOCALE:
+        return case
+    return get_render_cache().get(case['id'], ('locale', locale), get_content().hashes.get(case['id'], ''),
+                                  lambda: localize_case(case, st.session_state.translate))
 
 # ===== ИНТЕРФЕЙС =====
 def render_header():
     """Рендер заголовка"""
-    st.markdown("""
+    st.markdown(f"""
     <div class="detective-header">
-        <h1>🕵️ Statistical Detective</h1>
-        <h3>Игра для аналитиков: Поймай ошибку раньше, чем она поймает тебя!</h3>
+        <h1>{t(APP_TITLE)}</h1>
+        <h3>{t(APP_TAGLINE)}</h3>
     </div>
     """, unsafe_allow_html=True)
 
 def render_sidebar():
     """Боковая панель с профилем игрока"""
     with st.sidebar:
-        st.header("👤 Профиль детектива")
+        # Подпись на двух языках: ее должен понять игрок, открывший не свой язык
+        st.selectbox("🌐 Язык / Language", list(LOCALES), format_func=LOCALES.get, key="locale")
+        
+        st.header(t("👤 Профиль детектива"))
         
         stats = st.session_state.player_stats
         
         # Основные метрики
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("🎯 Очки", stats['score'])
-            st.metric("🔥 Серия", stats['current_streak'])
+            st.metric(t("🎯 Очки"), stats['score'])
+            st.metric(t("🔥 Серия"), stats['current_streak'])
         with col2:
-            st.metric("⭐ Уровень", stats['level'])
-            st.metric("✅ Решено", len(stats['solved_cases']))
+            st.metric(t("⭐ Уровень"), stats['level'])
+            st.metric(t("✅ Решено"), len(stats['solved_cases']))
+        
+        st.metric(t("📈 Рейтинг (Elo)"), round(get_rating_engine().player_rating(st.session_state.player_id)))
         
         # Прогресс до следующего уровня
         next_level_threshold = stats['level'] * 100
         current_progress = stats['score'] % 100
         progress_pct = current_progress / 100
         
-        st.markdown("**Прогресс до следующего уровня:**")
+        st.markdown(t("**Прогресс до следующего уровня:**"))
         st.progress(progress_pct)
-        st.caption(f"{current_progress}/100 очков")
+        st.caption(t("{current}/100 очков").format(current=current_progress))
         
         # Последние достижения
         if stats['achievements']:
-            st.markdown("**🏆 Последние достижения:**")
+            st.markdown(t("**🏆 Последние достижения:**"))
             for achievement in list(stats['achievements'])[-3:]:
-                st.success(f"🎖️ {achievement}")
+                st.success(f"🎖️ {t(achievement)}")
         
         # Кнопка сброса (для разработки)
-        if st.button("🔄 Сбросить прогресс"):
+        if st.button(t("🔄 Сбросить прогресс")):
             reset_game_state()
             st.rerun()
 
 def render_main_content():
     """Основной контент приложения"""
     
-    # Навигация по режимам
+    # Навигация по режимам: значение виджета - id режима, подпись - на языке сессии
     game_mode = st.selectbox(
-        "🎮 Выберите режим игры:",
-        [
-            "🏠 Главная страница",
-            "🔍 Найди ошибку в анализе",
-            "🎯 Сценарии принятия решений",
-            "⚠️ Поймай предвзятость",
-            "🎲 Случайный кейс",
-            "📊 Статистика и рейтинги"
-        ]
+        t("🎮 Выберите режим игры:"),
+        list(MODES),
+        format_func=t_labels(MODES).get,
+        key="game_mode"
     )
     
     # Роутинг по режимам
-    if game_mode == "🏠 Главная страница":
+    if game_mode == 'home':
         render_home_page()
-    elif game_mode == "🔍 Найди ошибку в анализе":
+    elif game_mode == 'error_hunting':
         render_error_hunting_mode()
-    elif game_mode == "🎯 Сценарии принятия решений":
+    elif game_mode == 'decisions':
         render_decision_scenarios_mode()
-    elif game_mode == "⚠️ Поймай предвзятость":
+    elif game_mode == 'bias_detection':
         render_bias_hunting_mode()
-    elif game_mode == "🎲 Случайный кейс":
+    elif game_mode == 'dataset':
+        render_dataset_mode()
+    elif game_mode == 'random':
         render_random_case_mode()
-    elif game_mode == "📊 Статистика и рейтинги":
+    elif game_mode == 'search':
+        render_search_mode()
+    elif game_mode == 'stats':
         render_stats_mode()
+    elif game_mode == 'instructor':
+        render_instructor_mode()
 
 def render_home_page():
     """Главная страница с выбором активности"""
-    st.markdown("## 🎯 Добро пожаловать, детектив!")
+    st.markdown(f"## {t(WELCOME_TITLE)}")
     
-    st.markdown("""
-    Ты попал в мир статистических загадок и аналитических головоломок! 
-    Здесь тебя ждут реальные кейсы из маркетинговой и продуктовой аналитики.
-    """)
+    st.markdown(t(WELCOME_TEXT))
     
     # Карточки с режимами игры
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        render_mode_card(
-            "🔍 Охота за ошибками",
-            "Найди критические ошибки в анализе данных",
-            "Сложность: ⭐⭐⭐",
-            "error_hunting"
-        )
-    
-    with col2:
-        render_mode_card(
-            "🎯 Принятие решений",
-            "Пошаговые сценарии из реальной практики",
-            "Сложность: ⭐⭐⭐⭐",
-            "decisions"
-        )
-    
-    with col3:
-        render_mode_card(
-            "⚠️ Детектор предвзятостей",
-            "Найди скрытые искажения в данных",
-            "Сложность: ⭐⭐⭐⭐⭐",
-            "bias_detection"
-        )
+    for column, card in zip(st.columns(len(MODE_CARDS)), MODE_CARDS):
+        with column:
+            render_mode_card(t(card['title']), t(card['description']), t(card['difficulty']), card['mode_key'])
     
     # Последние новости / обновления
     render_news_section()
@@ -217,213 +295,474 @@ def render_mode_card(title: str, description: str, difficulty: str, mode_key: st
 def render_news_section():
     """Секция новостей и обновлений"""
     st.markdown("---")
-    st.markdown("## 📰 Новости детективного бюро")
-    
-    news_items = [
-        {
-            'date': '2025-05-23',
-            'title': 'Добавлены новые кейсы по A/B тестированию',
-            'description': 'Теперь доступны сложные сценарии с multiple testing и практической значимостью'
-        },
-        {
-            'date': '2025-05-20',
-            'title': 'Система достижений обновлена',
-            'description': 'Добавлены новые бейджи для специализаций: маркетинг, продукт, веб-аналитика'
-        }
-    ]
+    st.markdown(f"## {t(NEWS_TITLE)}")
     
-    for news in news_items:
-        with st.expander(f"📅 {news['date']} - {news['title']}"):
-            st.write(news['description'])
+    for news in NEWS_ITEMS:
+        with st.expander(f"📅 {news['date']} - {t(news['title'])}"):
+            st.write(t(news['description']))
 
 # ===== ИГРОВЫЕ РЕЖИМЫ =====
 def render_error_hunting_mode():
     """Режим охоты за ошибками"""
-    st.markdown("## 🔍 Охота за ошибками в анализе")
-    st.markdown("Перед тобой реальные кейсы с ошибками. Найди их все!")
+    st.markdown(t("## 🔍 Охота за ошибками в анализе"))
+    st.markdown(t("Перед тобой реальные кейсы с ошибками. Найди их все!"))
     
     # Получаем кейсы для поиска ошибок
     error_cases = get_analysis_error_cases()
     
     # Выбор сложности
-    difficulty = st.selectbox("Уровень сложности:", ["Новичок", "Аналитик", "Эксперт"])
+    difficulty = st.selectbox(t("Уровень сложности:"), DIFFICULTIES, format_func=t_labels(DIFFICULTIES).get,
+                              key="difficulty")
     
     # Фильтруем кейсы по сложности
     available_cases = [case for case in error_cases if case['difficulty'] == difficulty]
     
     if not available_cases:
-        st.warning("Все кейсы этого уровня решены! Попробуй другой уровень.")
+        st.warning(t("Все кейсы этого уровня решены! Попробуй другой уровень."))
         return
     
-    # Выбираем случайный нерешенный кейс
-    unsolved_cases = [case for case in available_cases if case['id'] not in st.session_state.player_stats['solved_cases']]
-    if not unsolved_cases:
-        unsolved_cases = available_cases  # Показываем все, если все решены
+    # Планировщик рекомендует кейс, который пора повторить или еще не встречался
+    pool = f"analysis:{difficulty}"
+    recommended_id = st.session_state.scheduler.next_case(pool, get_content().pools[pool])
+    recommended = next((case for case in available_cases if case['id'] == recommended_id), available_cases[0])
     
-    # Выбор конкретного кейса
-    case_titles = [case['title'] for case in unsolved_cases]
-    if case_titles:
-        selected_title = st.selectbox("Выберите кейс:", case_titles)
-        current_case = next(case for case in unsolved_cases if case['title'] == selected_title)
-        
-        # Отображаем кейс
-        display_analysis_case(current_case)
+    # Выбор конкретного кейса: значение - id кейса, подпись - название на языке сессии.
+    # Ключ не зависит от рекомендации: иначе каждый ответ пересоздавал бы виджет и сбрасывал выбор;
+    # галерея и кнопка рекомендации выбирают кейс через то же значение
+    select_key = f"analysis_case_{difficulty}"
+    st.session_state.setdefault(select_key, recommended['id'])
+    
+    col1, col2 = st.columns([3, 1])
+    col1.caption(t("⭐ Рекомендуем: {title}").format(title=t(recommended['title'])))
+    col2.button(t("Перейти к рекомендованному"), key=f"recommended_{difficulty}",
+                disabled=st.session_state[select_key] == recommended['id'],
+                on_click=select_case, args=(select_key, recommended['id']))
+    
+    render_case_gallery(available_cases, pool, select_key)
+    
+    case_titles = case_labels(available_cases)
+    selected_id = st.selectbox(t("Выберите кейс:"), list(case_titles), format_func=case_titles.get, key=select_key)
+    
+    # Отображаем кейс
+    display_analysis_case(pin_content_for(selected_id))
 
 def render_decision_scenarios_mode():
     """Режим сценариев принятия решений"""
-    st.markdown("## 🎯 Сценарии принятия решений")
-    st.markdown("Пошаговые кейсы из реальной маркетинговой аналитики. Каждое решение влияет на исход!")
-    
-    scenarios = get_decision_scenarios()
+    st.markdown(t("## 🎯 Сценарии принятия решений"))
+    st.markdown(t("Пошаговые кейсы из реальной маркетинговой аналитики. Каждое решение влияет на исход!"))
     
-    scenario_choice = st.selectbox("Выберите сценарий:", [s['title'] for s in scenarios])
-    selected_scenario = next(s for s in scenarios if s['title'] == scenario_choice)
+    scenario_titles = case_labels(get_decision_scenarios())
+    scenario_id = st.selectbox(t("Выберите сценарий:"), list(scenario_titles), format_func=scenario_titles.get,
+                               key="scenario_choice")
     
-    play_scenario(selected_scenario)
+    play_scenario(pin_content_for(scenario_id))
 
 def render_bias_hunting_mode():
     """Режим охоты за предвзятостями"""
-    st.markdown("## ⚠️ Детектор предвзятостей")
-    st.markdown("Найди скрытые искажения и предвзятости в данных!")
+    st.markdown(t("## ⚠️ Детектор предвзятостей"))
+    st.markdown(t("Найди скрытые искажения и предвзятости в данных!"))
     
     bias_cases = get_bias_cases()
+    render_case_gallery(bias_cases, 'bias', "bias_choice")
+    
+    bias_titles = case_labels(bias_cases)
+    case_id = st.selectbox(t("Выберите кейс:"), list(bias_titles), format_func=bias_titles.get, key="bias_choice")
+    
+    display_bias_case(pin_content_for(case_id))
+
+def render_dataset_mode():
+    """Режим расследования по сырым журналам событий"""
+    st.markdown(t("## 🗄️ Расследование по сырым данным"))
+    st.markdown(t("Ошибка спрятана в миллионах строк. Режь данные по сегментам, датам и каналам!"))
     
-    bias_choice = st.selectbox("Выберите кейс:", [case['title'] for case in bias_cases])
-    selected_case = next(case for case in bias_cases if case['title'] == bias_choice)
+    dataset_titles = case_labels(get_dataset_cases())
+    case_id = st.selectbox(t("Выберите кейс:"), list(dataset_titles), format_func=dataset_titles.get,
+                           key="dataset_choice")
     
-    display_bias_case(selected_case)
+    display_dataset_case(pin_content_for(case_id))
 
 def render_random_case_mode():
     """Режим случайного кейса"""
-    st.markdown("## 🎲 Случайный кейс")
-    st.markdown("Получи случайный кейс для тренировки навыков!")
-    
-    if st.button("🎲 Получить случайный кейс", type="primary"):
-        # Собираем все кейсы
-        all_cases = []
-        all_cases.extend(get_analysis_error_cases())
-        all_cases.extend([{'type': 'scenario', **s} for s in get_decision_scenarios()])
-        all_cases.extend([{'type': 'bias', **b} for b in get_bias_cases()])
-        
-        if all_cases:
-            import random
-            random_case = random.choice(all_cases)
-            
-            st.success(f"🎯 Случайный кейс: **{random_case['title']}**")
-            
-            if random_case.get('type') == 'scenario':
-                st.markdown("**Тип**: Сценарий принятия решений")
-                play_scenario(random_case)
-            elif random_case.get('type') == 'bias':
-                st.markdown("**Тип**: Детектор предвзятостей")
-                display_bias_case(random_case)
-            else:
-                st.markdown("**Тип**: Поиск ошибки в анализе")
-                display_analysis_case(random_case)
+    st.markdown(t("## 🎲 Случайный кейс"))
+    st.markdown(t("Получи случайный кейс для тренировки навыков!"))
+    
+    content = get_content()
+    scheduler = st.session_state.scheduler
+    
+    if st.button(t("🎲 Получить случайный кейс"), type="primary", key="random_case"):
+        # Текущий неотвеченный кейс откладываем, чтобы получить следующий
+        current_id = st.session_state.get('random_case_id')
+        if current_id and scheduler.next_case('all', content.pools['all']) == current_id:
+            scheduler.skip(current_id, content.pools_of.get(current_id, ('all',)))
+        st.session_state.random_case_id = scheduler.next_case('all', content.pools['all'])
+    
+    random_id = st.session_state.get('random_case_id')
+    if random_id in content.cases:
+        random_case = pin_content_for(random_id)
+        st.success(t("🎯 Случайный кейс: **{title}**").format(title=random_case['title']))
+        display_case(random_case)
+
+def render_search_mode():
+    """Режим поиска по базе кейсов"""
+    st.markdown(t("## 🔎 Поиск кейсов"))
+    st.markdown(t("Ищи по названиям, условиям, вариантам ответов и объяснениям: например, «A/B», «CTR», «retention»."))
+    
+    index = get_search_index(st.session_state.locale)
+    
+    query = st.text_input(t("Поисковый запрос:"), key="search_query")
+    
+    type_labels = t_labels(CASE_TYPE_LABELS)
+    col1, col2 = st.columns(2)
+    with col1:
+        difficulties = st.multiselect(t("Сложность:"), DIFFICULTIES, format_func=t_labels(DIFFICULTIES).get,
+                                      key="search_difficulty")
+    with col2:
+        types = st.multiselect(t("Тип кейса:"), list(CASE_TYPE_LABELS), format_func=type_labels.get,
+                               key="search_types")
+    
+    if not query:
+        st.info(t("📚 В базе {count} кейсов. Введи запрос, чтобы начать поиск.").format(count=len(index)))
+        return
+    
+    results = index.search(query, difficulties=difficulties, types=types)
+    if not results:
+        st.warning(t("Ничего не найдено. Попробуй другие слова."))
+        return
+    
+    # Индекс всегда свежий, поэтому подписи берем из последнего снимка
+    latest = get_content_store().snapshot
+    found_labels = {case_id: f"{t(latest.cases[case_id]['title'])} · {type_labels[latest.cases[case_id]['type']]}"
+                    for case_id, _ in results if case_id in latest.cases}
+    selected_id = st.radio(
+        t("Найдено кейсов: {count}").format(count=len(found_labels)),
+        list(found_labels),
+        format_func=found_labels.get,
+        key="search_result"
+    )
+    
+    st.markdown("---")
+    display_case(pin_content_for(selected_id))
+
+def display_case(case: Dict):
+    """Отображение кейса любого типа"""
+    st.markdown(t("**Тип**: {type}").format(type=t(CASE_TYPE_LABELS[case.get('type', 'analysis')])))
+    
+    if case.get('type') == 'scenario':
+        play_scenario(case)
+    elif case.get('type') == 'bias':
+        display_bias_case(case)
+    elif case.get('type') == 'dataset':
+        display_dataset_case(case)
+    else:
+        display_analysis_case(case)
 
 def render_stats_mode():
     """Режим статистики и рейтингов"""
-    st.markdown("## 📊 Статистика и рейтинги")
+    st.markdown(t("## 📊 Статистика и рейтинги"))
     
     stats = st.session_state.player_stats
+    engine = get_rating_engine()
     
     # Детальная статистика
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("### 📈 Твоя статистика")
+        st.markdown(t("### 📈 Твоя статистика"))
         
         stats_data = {
-            'Метрика': [
-                'Общий счет',
-                'Текущий уровень', 
-                'Решено кейсов',
-                'Текущая серия',
-                'Лучшая серия',
-                'Время игры (мин)'
+            t('Метрика'): [
+                t('Общий счет'),
+                t('Текущий уровень'), 
+                t('Решено кейсов'),
+                t('Текущая серия'),
+                t('Лучшая серия'),
+                t('Время игры (мин)'),
+                t('Рейтинг (Elo)')
             ],
-            'Значение': [
+            t('Значение'): [
                 stats['score'],
                 stats['level'],
                 len(stats['solved_cases']),
                 stats['current_streak'],
                 stats['best_streak'],
-                stats['play_time']
+                round(stats['play_time'], 1),
+                round(engine.player_rating(st.session_state.player_id))
             ]
         }
         
         st.table(stats_data)
     
     with col2:
-        st.markdown("### 🏆 Достижения")
+        st.markdown(t("### 🏆 Достижения"))
         
         if stats['achievements']:
             for achievement in stats['achievements']:
-                st.success(f"🎖️ {achievement}")
+                st.success(f"🎖️ {t(achievement)}")
+        else:
+            st.info(t("Пока достижений нет. Начни решать кейсы!"))
+    
+    # Рейтинги игроков и кейсов
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown(t("### 🏅 Лучшие детективы"))
+        top_players = engine.top_players(10)
+        if top_players:
+            st.table({
+                t('Игрок'): [player_id for player_id, _ in top_players],
+                t('Рейтинг'): [round(rating) for _, rating in top_players]
+            })
         else:
-            st.info("Пока достижений нет. Начни решать кейсы!")
+            st.info(t("Рейтинг пока пуст."))
+    
+    with col2:
+        st.markdown(t("### 🧩 Самые сложные кейсы"))
+        hardest = sorted(get_content().cases.values(), key=lambda case: engine.case_rating(case['id']), reverse=True)[:10]
+        st.table({
+            t('Кейс'): [t(case['title']) for case in hardest],
+            t('Рейтинг'): [round(engine.case_rating(case['id'])) for case in hardest]
+        })
+    
+    # Служебная панель не переводится: она для разработчиков, а не для игроков
+    with st.expander("🛠️ Для разработчиков"):
+        store = get_content_store()
+        st.caption(f"Версия контента: {store.snapshot.version} (у тебя: {get_content().version}), "
+                   f"записей в кэше отрисовки: {len(get_render_cache())}")
+        for file_name, error in store.errors.items():
+            st.error(f"❌ {file_name}: {error}")
+        st.caption(f"Ответов в журнале рейтингов: {engine.log.size:,}")
+        registry = get_session_registry()
+        st.caption(f"Сессий в процессе: {len(registry)}, вытеснено по простою: {registry.evictions}, "
+                   f"удалено из хранилища по сроку: {registry.purged}, "
+                   f"память твоей статистики: {st.session_state.player_stats.nbytes():,} байт")
+        telemetry = get_telemetry().stats()
+        st.caption(f"Телеметрия: принято {telemetry['recorded']:,}, записано {telemetry['flushed']:,}, "
+                   f"в буфере {telemetry['buffered']:,}, отброшено {telemetry['dropped']:,}")
+        render_consumer_stats()
 
-# ===== ИГРОВАЯ МЕХАНИКА =====
-def award_points(points: int, case_id: str = None):
-    """Начисление очков игроку"""
-    st.session_state.player_stats['score'] += points
+def render_instructor_mode():
+    """Панель ведущего воркшопа: что происходит в зале прямо сейчас"""
+    st.markdown(t("## 👩‍🏫 Панель ведущего"))
     
-    if case_id:
-        st.session_state.player_stats['solved_cases'].add(case_id)
+    if INSTRUCTOR_CODE and st.text_input(t("Код ведущего:"), type="password", key="instructor_code") != INSTRUCTOR_CODE:
+        st.info(t("Введите код ведущего, чтобы открыть панель."))
+        return
     
-    # Обновление уровня
-    new_level = (st.session_state.player_stats['score'] // 100) + 1
-    if new_level > st.session_state.player_stats['level']:
-        st.session_state.player_stats['level'] = new_level
-        st.balloons()
-        st.success(f"🎉 Поздравляем! Вы достигли {new_level} уровня!")
+    render_live_dashboard()
     
-    # Обновление серии
-    st.session_state.player_stats['current_streak'] += 1
-    st.session_state.player_stats['best_streak'] = max(
-        st.session_state.player_stats['best_streak'],
-        st.session_state.player_stats['current_streak']
-    )
+    # Пересчет меняет рейтинги всех игроков, поэтому он только у ведущего
+    engine = get_rating_engine()
+    if st.button(t("🔁 Пересчитать рейтинги по истории"), key="recompute_ratings"):
+        engine.recompute()
+        st.success(t("Рейтинги пересчитаны по журналу ответов ({count} ответов).").format(count=f"{engine.log.size:,}"))
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def render_live_dashboard():
+    """Живые агрегаты; перерисовывается только этот фрагмент"""
+    snapshot = get_live_aggregates().snapshot()
+    content = get_content_store().snapshot
     
-    # Проверка достижений
-    check_achievements()
+    col1, col2, col3 = st.columns(3)
+    col1.metric(t("👥 Игроков отвечало"), snapshot.players)
+    col2.metric(t("📨 Ответов"), snapshot.events)
+    col3.metric(t("⏱️ Срез обновлен"), t("{seconds} с назад").format(seconds=f"{max(0, time.time() - snapshot.built_at):.0f}"))
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown(t("### 🏅 Лидеры зала"))
+        if snapshot.top_players:
+            st.table({
+                t('Игрок'): [player_id for player_id, _ in snapshot.top_players],
+                t('Очки'): [score for _, score in snapshot.top_players]
+            })
+        else:
+            st.info(t("Ответов пока нет."))
+    
+    with col2:
+        st.markdown(t("### 🎯 Где застревают в сценариях"))
+        for scenario_id, steps in snapshot.scenario_steps.items():
+            scenario = content.cases.get(scenario_id)
+            st.markdown(f"**{t(scenario['title']) if scenario else scenario_id}**")
+            st.table({
+                t('Шаг'): [number for number in range(1, len(steps) + 1)],
+                t('Сейчас на шаге'): [step['waiting'] for step in steps],
+                t('Ответили'): [step['answered'] for step in steps],
+                t('Ошиблись'): [f"{share:.0%}" if share is not None else "—" for share in map(stuck_share, steps)]
+            })
+    
+    st.markdown(t("### 📊 Распределение ответов по кейсам"))
+    option_column, answers_column = t('Вариант'), t('Ответов')
+    for case_id, counts in snapshot.answers.items():
+        case = content.cases.get(case_id)
+        if case is None or 'options' not in case:
+            continue
+        correct, total = snapshot.correct[case_id]
+        st.markdown(t("**{title}** — верно {correct} из {total}").format(title=t(case['title']), correct=correct, total=total))
+        st.bar_chart(pd.DataFrame({
+            option_column: [f"{'✅' if i == case['correct'] else '❌'} {t(option)[:40]}" for i, option in enumerate(case['options'])],
+            answers_column: [counts.get(i, 0) for i in range(len(case['options']))]
+        }), x=option_column, y=answers_column, horizontal=True)
+
+    st.markdown(t("### 🚦 Подписчики шины событий"))
+    render_consumer_stats()
+
+def render_consumer_stats():
+    """Отставание и пропускная способность подписчиков шины событий"""
+    st.dataframe(pd.DataFrame([{
+        'Подписчик': consumer.name,
+        'Режим': consumer.mode,
+        'В очереди': consumer.queued,
+        'Отставание, с': round(consumer.lag_seconds, 2),
+        'Задержка, мс': round(consumer.delay_ms, 1),
+        'Событий/с': round(consumer.throughput, 1),
+        'Обработано': consumer.processed,
+        'Отброшено': consumer.dropped,
+        'Ошибок': consumer.errors
+    } for consumer in get_event_bus().stats()]), hide_index=True)
+
+# ===== ИГРОВАЯ МЕХАНИКА =====
+def award_points(points: int, case_id: str = None):
+    """Начисление очков игроку: состояние и достижения обновляются синхронно, сохранение - в фоне"""
+    level_before = st.session_state.player_stats['level']
+    publish_event('award', case_id, True, points)
+    
+    new_level = st.session_state.player_stats['level']
+    if new_level > level_before:
+        st.balloons()
+        st.success(t("🎉 Поздравляем! Вы достигли {level} уровня!").format(level=new_level))
 
 def reset_streak():
     """Сброс серии при неправильном ответе"""
-    st.session_state.player_stats['current_streak'] = 0
+    publish_event('streak_reset', None, False)
 
-def check_achievements():
-    """Проверка и выдача достижений"""
-    stats = st.session_state.player_stats
-    achievements = stats['achievements']
-    
-    # Первые очки
-    if stats['score'] >= 10 and 'Первые шаги' not in achievements:
-        achievements.add('Первые шаги')
-        st.success("🎖️ Достижение: 'Первые шаги' - Заработай первые очки!")
-    
-    # Серии
-    if stats['current_streak'] >= 5 and 'Серийный детектив' not in achievements:
-        achievements.add('Серийный детектив')
-        st.success("🎖️ Достижение: 'Серийный детектив' - 5 правильных ответов подряд!")
+def record_case_result(case_id: str, correct: bool):
+    """Передает результат ответа в планировщик кейсов игрока и в телеметрию"""
+    now = time.time()
+    track_event('answer_correct' if correct else 'answer_wrong', case_id,
+                now - st.session_state.get('case_shown_at', now))
+    st.session_state.case_shown_at = now
+    
+    pools = get_content().pools_of.get(case_id, ('all',))
+    st.session_state.scheduler.record_answer(case_id, correct, pools)
+
+@st.cache_resource
+def get_rating_engine() -> RatingEngine:
+    """
+    Общий движок Elo-рейтингов; стартовый рейтинг кейса задается его сложностью.
+    Журнал ответов восстанавливается из телеметрии, и рейтинги прошлых
+    запусков пересчитываются по нему пакетно.
+    """
+    store = get_content_store()
+    engine = RatingEngine(difficulty_priors(store.snapshot.cases.values()))
+    if engine.load_history(get_telemetry().answers()):
+        engine.recompute()
+    
+    def on_content_change(snapshot: ContentSnapshot, changed: set, removed: set):
+        engine.case_priors.update(difficulty_priors(snapshot.cases[case_id] for case_id in changed))
+    
+    store.add_listener(on_content_change)
+    return engine
+
+def difficulty_priors(cases) -> Dict[str, float]:
+    """Стартовые рейтинги кейсов по их статической сложности"""
+    return {case['id']: DIFFICULTY_RATINGS[case['difficulty']]
+            for case in cases if case.get('difficulty') in DIFFICULTY_RATINGS}
+
+@st.cache_resource
+def get_session_registry() -> SessionRegistry:
+    """Реестр сессий процесса: бюджет памяти и вытеснение простаивающих в SQLite"""
+    registry = SessionRegistry(SessionStore(SESSIONS_PATH))
+    registry.start_sweeper()
+    return registry
+
+@st.cache_resource
+def get_live_aggregates() -> LiveAggregates:
+    """Агрегаты ответов всех игроков процесса для панели ведущего"""
+    return LiveAggregates(interval=LIVE_REFRESH_SECONDS)
+
+@st.cache_resource
+def get_achievement_checker() -> AchievementChecker:
+    """Проверка достижений по правилам из свежего снимка контента"""
+    return AchievementChecker(get_session_registry(), lambda: get_content_store().snapshot.achievements)
+
+@st.cache_resource
+def get_event_bus() -> EventBus:
+    """Общая шина игровых событий: состояние, достижения, сохранение, рейтинги и агрегаты"""
+    bus = EventBus()
+    attach_award_pipeline(bus, get_session_registry(), get_rating_engine(), get_live_aggregates(),
+                          get_achievement_checker())
+    atexit.register(bus.close)
+    return bus
+
+def publish_event(kind: str, case_id: Optional[str], correct: bool, points: int = 0, **details):
+    """Публикует событие игрока в шину; возвращается после обновления его состояния"""
+    get_event_bus().publish(GameEvent(time.time(), kind, st.session_state.player_id, case_id, correct,
+                                      points=points, **details))
+
+def publish_answer(kind: str, case_id: str, correct: bool, points: int = 0, **details):
+    """Публикует ответ игрока в шину событий"""
+    publish_event(kind, case_id, correct, points, **details)
+
+@st.cache_resource
+def get_telemetry() -> Telemetry:
+    """Общий буфер телеметрии с фоновой записью в SQLite"""
+    telemetry = Telemetry(TELEMETRY_PATH)
+    telemetry.start_flusher()
+    atexit.register(telemetry.close)
+    return telemetry
+
+@st.cache_resource
+def get_trace_recorder() -> Optional[TraceRecorder]:
+    """Запись трасс взаимодействия, если задан DETECTIVE_TRACE_DIR"""
+    return TraceRecorder(TRACE_DIR, TRACE_SAMPLE) if TRACE_DIR else None
+
+def begin_trace_step() -> Optional[List]:
+    """Изменения виджетов, запустившие этот rerun, или None, если сессия не пишется"""
+    recorder = get_trace_recorder()
+    if recorder is None:
+        return None
+    if 'trace_id' not in st.session_state:
+        st.session_state.trace_id = recorder.start(st.query_params.to_dict())
+        st.session_state.trace_started = time.time()
+        st.session_state.trace_widgets = {}
+        return [] if st.session_state.trace_id else None
+    if st.session_state.trace_id is None:
+        return None
+    return widget_changes(st.session_state, st.session_state.trace_widgets)
+
+def end_trace_step(changes: Optional[List], started: float):
+    """Пишет rerun в трассу: первый rerun сессии и rerun-ы с действиями игрока"""
+    if changes is None:
+        return
+    if changes or not st.session_state.trace_widgets:
+        get_trace_recorder().record(st.session_state.trace_id, time.time() - st.session_state.trace_started,
+                                    time.perf_counter() - started, changes)
+    st.session_state.trace_widgets = widget_snapshot(st.session_state)
+
+def track_event(kind: str, case_id: str = None, value: float = None):
+    """Событие телеметрии; заодно продлевает активное время игры сессии"""
+    get_telemetry().record(kind, st.session_state.player_id, case_id, value)
     
-    # Уровни
-    if stats['level'] >= 3 and 'Опытный сыщик' not in achievements:
-        achievements.add('Опытный сыщик')
-        st.success("🎖️ Достижение: 'Опытный сыщик' - Достигни 3 уровня!")
+    now = time.time()
+    st.session_state.player_stats['play_time'] += active_gap(st.session_state.get('last_event_at'), now) / 60
+    st.session_state.last_event_at = now
+
+def render_case_rating(case: Dict):
+    """Подпись с текущим рейтингом сложности кейса"""
+    st.caption(t("📊 Рейтинг сложности: {rating}").format(rating=f"{get_rating_engine().case_rating(case['id']):.0f}"))
+
+def show_achievement_notifications():
+    """Уведомления о достижениях, выданных подписчиком шины"""
+    for message in get_achievement_checker().pop_messages(st.session_state.player_id):
+        st.toast(t(message), icon="🏆")
 
 def reset_game_state():
     """Сброс игрового состояния"""
-    st.session_state.player_stats = {
-        'score': 0,
-        'level': 1,
-        'solved_cases': set(),
-        'current_streak': 0,
-        'best_streak': 0,
-        'achievements': set(),
-        'play_time': 0,
-        'started_at': datetime.now().isoformat()
-    }
+    st.session_state.player_stats = PlayerStats(st.session_state.player_id)
+    get_session_registry().reset(st.session_state.player_stats)
+    st.session_state.scheduler = CaseScheduler()
+    st.session_state.random_case_id = None
 
 def render_footer():
     """Футер приложения"""
@@ -432,666 +771,624 @@ def render_footer():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.markdown("### 🎯 О проекте")
-        st.markdown("""
-        **Statistical Detective** - интерактивная игра для развития навыков 
-        аналитического мышления и выявления статистических ошибок.
-        """)
+        st.markdown(f"### {t(ABOUT_TITLE)}")
+        st.markdown(t(ABOUT_TEXT))
     
     with col2:
-        st.markdown("### 🔗 Связанные проекты")
-        st.markdown("""
-        - [Демонстрация вероятностных законов](https://probability-laws-demo.streamlit.app/)
-        - [GitHub репозиторий](https://github.com/Nero911-novice/statistics-detective)
-        """)
+        st.markdown(f"### {t(LINKS_TITLE)}")
+        st.markdown("\n".join(f"- [{t(title)}]({url})" for title, url in RELATED_LINKS))
     
     with col3:
-        st.markdown("### 📈 Статистика")
-        st.metric("ID сессии", st.session_state.player_id)
+        st.markdown(t("### 📈 Статистика"))
+        st.metric(t("ID сессии"), st.session_state.player_id)
+
+# ===== ГАЛЕРЕЯ КЕЙСОВ =====
+def render_case_gallery(cases: List[Dict], pool: str, select_key: str):
+    """
+    Галерея кейсов режима. Миниатюры заказываются только для текущей
+    страницы; rerun ждет их не дольше GALLERY_WAIT_SECONDS. Если какие-то
+    еще рисуются, галерея перерисовывается сама раз в
+    GALLERY_REFRESH_SECONDS, пока они не будут готовы.
+    """
+    pending = get_thumbnail_store().request(page_slice(cases, st.session_state.get(f"gallery_page_{pool}", 0)))
+    refresh = GALLERY_REFRESH_SECONDS if pending else None
+    # id фрагмента зависит от функции и места на странице, а не от run_every
+    st.fragment(render_gallery_fragment, run_every=refresh)(cases, pool, select_key, refresh is not None)
+
+def render_gallery_fragment(cases: List[Dict], pool: str, select_key: str, refreshing: bool):
+    """
+    Фрагмент галереи. Листание и автообновление перезапускают только его,
+    мимо main(), поэтому такой rerun пишется в трассу здесь. run_every
+    задается при полном rerun: когда миниатюры страницы дорисованы (или
+    после листания появились недостающие), фрагмент один раз запрашивает
+    полный rerun, и тот включает или выключает автообновление.
+    """
+    if st.session_state.get('full_rerun'):
+        render_gallery_page(cases, pool, select_key)
+        return
+    started = time.perf_counter()
+    trace_changes = begin_trace_step()
+    try:
+        pending = render_gallery_page(cases, pool, select_key)
+    finally:
+        end_trace_step(trace_changes, started)
+    if pending != refreshing:
+        st.rerun(scope="app")
+
+def render_gallery_page(cases: List[Dict], pool: str, select_key: str) -> bool:
+    """
+    Страница карточек: миниатюра графика, сложность и отметка о решении.
+    Листание перерисовывает только галерею; миниатюры следующей страницы
+    заказываются заранее. Возвращает True, если миниатюры страницы еще рисуются.
+    """
+    page_key = f"gallery_page_{pool}"
+    pages = page_count(len(cases))
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+    shown = page_slice(cases, page)
+    
+    store = get_thumbnail_store()
+    pending = not store.wait(store.request(shown), GALLERY_WAIT_SECONDS)
+    store.request(page_slice(cases, page + 1))
+    
+    solved = st.session_state.player_stats.solved_cases
+    selected = st.session_state.get(select_key)
+    for row in range(0, len(shown), GALLERY_COLUMNS):
+        for column, case in zip(st.columns(GALLERY_COLUMNS), shown[row:row + GALLERY_COLUMNS]):
+            with column.container(border=True):
+                render_gallery_card(case, store, case['id'] in solved)
+                if st.button(t("Открыть"), key=f"gallery_open_{pool}_{case['id']}",
+                             type="primary" if case['id'] == selected else "secondary",
+                             on_click=select_case, args=(select_key, case['id'])):
+                    # Выбранный кейс показывается вне галереи - нужен полный rerun
+                    st.rerun()
+    
+    if pages > 1:
+        col1, col2, col3 = st.columns([1, 3, 1])
+        col1.button("◀", key=f"gallery_prev_{pool}", disabled=page == 0,
+                    on_click=turn_gallery_page, args=(page_key, page - 1))
+        col2.caption(t("Страница {page} из {pages}, кейсов: {count}").format(page=page + 1, pages=pages,
+                                                                           count=len(cases)))
+        col3.button("▶", key=f"gallery_next_{pool}", disabled=page == pages - 1,
+                    on_click=turn_gallery_page, args=(page_key, page + 1))
+    return pending
+
+def render_gallery_card(case: Dict, store: ThumbnailStore, solved: bool):
+    """Содержимое карточки кейса"""
+    thumbnail = store.get(case)
+    if thumbnail:
+        st.image(thumbnail)
+    else:
+        # Миниатюра еще рисуется или графика у кейса нет
+        key = thumbnail_key(case)
+        st.caption("⏳" if key and key not in store.failed else "📄")
+    st.markdown(f"**{t(case['title'])}**")
+    labels = [t(case['difficulty'])] if 'difficulty' in case else []
+    labels.append(t("✅ Решен") if solved else t("Не решен"))
+    st.caption(" · ".join(labels))
+
+def select_case(select_key: str, case_id: str):
+    """Кейс из галереи или по рекомендации становится значением selectbox режима"""
+    st.session_state[select_key] = case_id
+
+def turn_gallery_page(page_key: str, page: int):
+    st.session_state[page_key] = page
 
 # ===== КЕЙСЫ И ДАННЫЕ =====
+@st.cache_resource(show_spinner="📚 Загружаем кейсы...")
+def get_content_store() -> ContentStore:
+    """Хранилище контента с фоновым отслеживанием изменений в data/"""
+    store = ContentStore(DATA_DIR)
+    store.start_watcher()
+    return store
+
+def get_content() -> ContentSnapshot:
+    """Снимок контента текущей сессии"""
+    return st.session_state.content
+
+def pin_content_for(case_id: str) -> Dict:
+    """
+    Переход к кейсу. Сессия получает свежий снимок контента только при смене
+    кейса, поэтому правки файлов не меняют кейс посреди прохождения.
+    """
+    content = st.session_state.content
+    if st.session_state.current_case != case_id or case_id not in content.cases:
+        previous = content.cases.get(case_id)
+        content = st.session_state.content = get_content_store().snapshot
+        if case_id not in content.cases:
+            # Кейс удален горячей перезагрузкой, а в списке выбора сессии он еще был:
+            # показываем первый кейс того же типа из свежего снимка
+            same_type = content.family(previous['type']) if previous else []
+            case_id = (same_type[0] if same_type else next(iter(content.cases.values())))['id']
+            st.warning(t("Этот кейс убрали из базы - открыт другой."))
+        st.session_state.current_case = case_id
+        st.session_state.answered_case = None
+        st.session_state.case_shown_at = time.time()
+        track_event('case_shown', case_id)
+    return localized(content.cases[case_id])
+
+@st.cache_resource(show_spinner="🔎 Строим поисковый индекс...")
+def get_search_index(locale: str) -> CaseSearchIndex:
+    """
+    Поисковый индекс по текстам кейсов на языке locale: один на язык,
+    строится при первом поиске на нем и обновляется по изменениям.
+    Непереведенные тексты индексируются на исходном языке.
+    """
+    store = get_content_store()
+    translate = get_catalog(locale).gettext
+    
+    def texts(cases):
+        return cases if locale == SOURCE_LOCALE else (localize_case(case, translate) for case in cases)
+    
+    index = CaseSearchIndex()
+    index.add_cases(texts(store.snapshot.cases.values()))
+    
+    def on_content_change(snapshot: ContentSnapshot, changed: set, removed: set):
+        index.remove_cases(removed)
+        index.add_cases(texts(snapshot.cases[case_id] for case_id in changed))
+    
+    store.add_listener(on_content_change)
+    return index
+
+@st.cache_resource
+def get_thumbnail_store() -> ThumbnailStore:
+    """Миниатюры для галереи: общий каталог на диске и общий пул отрисовки"""
+    store = ThumbnailStore(THUMBNAILS_DIR, workers=THUMBNAIL_WORKERS)
+    atexit.register(store.close)
+    return store
+
+@st.cache_resource
+def get_render_cache() -> RenderCache:
+    """Кэш графиков и текстов кейсов; сбрасываются только записи измененных кейсов"""
+    store = get_content_store()
+    cache = RenderCache()
+    store.add_listener(lambda snapshot, changed, removed: cache.invalidate(changed | removed))
+    return cache
+
+def case_chart_png(case: Dict, reveal_bias: bool = False):
+    """PNG графика кейса на языке сессии (через кэш отрисовки)"""
+    return get_render_cache().get(case['id'], ('chart', reveal_bias, st.session_state.locale),
+                                  get_content().hashes.get(case['id'], ''),
+                                  lambda: render_case_png(case, reveal_bias=reveal_bias,
+                                                          translate=st.session_state.translate))
 
 def get_analysis_error_cases() -> List[Dict]:
     """База кейсов с ошибками в анализе"""
-    return [
-        {
-            'id': 'marketing_conversion_1',
-            'difficulty': 'Новичок',
-            'title': 'Анализ конверсии email-кампании',
-            'description': """
-            **Ситуация**: Маркетолог анализирует эффективность email-кампании.
-            
-            **Данные**:
-            - Отправлено писем: 10,000
-            - Открыто писем: 2,500 (25%)
-            - Переходы на сайт: 250 (10% от открывших)
-            - Покупки: 25 (10% от перешедших)
-            
-            **Вывод маркетолога**: "Конверсия кампании составляет 10%"
-            """,
-            'chart_data': {
-                'emails_sent': 10000,
-                'opened': 2500,
-                'clicked': 250,
-                'purchased': 25
-            },
-            'options': [
-                "Конверсия должна считаться от общего числа отправленных писем (0.25%)",
-                "Ошибка в расчете процента открытия",
-                "Нужно учесть bounce rate",
-                "Анализ корректен, ошибки нет"
-            ],
-            'correct': 0,
-            'explanation': """
-            **Правильный ответ**: Конверсия должна считаться от общего числа отправленных писем.
-            
-            **Объяснение**: Маркетолог считал конверсию от числа перешедших (25/250 = 10%), 
-            но истинная конверсия кампании = покупки/отправленные письма = 25/10,000 = 0.25%.
-            
-            **Урок**: Всегда четко определяй базу для расчета конверсии!
-            """,
-            'points': 10
-        },
-        {
-            'id': 'ab_test_significance',
-            'difficulty': 'Аналитик', 
-            'title': 'Ложная значимость A/B теста',
-            'description': """
-            **Ситуация**: Анализируешь A/B тест новой посадочной страницы.
-            
-            **Результаты**:
-            - Группа A (контроль): 1,000 визитов, 50 конверсий (5.0%)
-            - Группа B (тест): 1,000 визитов, 65 конверсий (6.5%)
-            - p-value = 0.048 (< 0.05)
-            
-            **Вывод**: "Тест статистически значим! Внедряем версию B!"
-            """,
-            'chart_data': None,
-            'options': [
-                "Нужно проверить мощность теста",
-                "Размер выборки слишком мал для надежных выводов", 
-                "Не учтена практическая значимость (effect size)",
-                "Все перечисленное выше"
-            ],
-            'correct': 3,
-            'explanation': """
-            **Правильный ответ**: Все перечисленное выше.
-            
-            **Проблемы**:
-            1. **Мощность теста**: При таких размерах выборки мощность ~60% (нужно >80%)
-            2. **Малая выборка**: 1000 визитов недостаточно для конверсии ~5%
-            3. **Effect size**: Разница 1.5% может быть не значима практически
-            
-            **Урок**: Статистическая значимость ≠ практическая значимость!
-            """,
-            'points': 15
-        },
-        {
-            'id': 'simpsons_paradox',
-            'difficulty': 'Эксперт',
-            'title': 'Парадокс Симпсона в маркетинге',
-            'description': """
-            **Ситуация**: Сравниваешь эффективность двух рекламных каналов.
-            
-            **Общие результаты**:
-            - Канал A: 1000 показов, 100 кликов (10% CTR)
-            - Канал B: 1000 показов, 80 кликов (8% CTR)
-            
-            **По устройствам**:
-            Desktop: A = 200/300 (66.7%), B = 50/100 (50%)
-            Mobile: A = 100/700 (14.3%), B = 30/900 (3.3%)
-            
-            **Вопрос**: Какой канал лучше?
-            """,
-            'chart_data': {
-                'total': {'A': 0.10, 'B': 0.08},
-                'desktop': {'A': 0.667, 'B': 0.50},
-                'mobile': {'A': 0.143, 'B': 0.033}
-            },
-            'options': [
-                "Канал A лучше - общий CTR выше",
-                "Канал B лучше - эффективнее на всех устройствах",
-                "Парадокс Симпсона: A лучше в каждой группе, но B лучше в целом",
-                "Недостаточно данных для выводов"
-            ],
-            'correct': 2,
-            'explanation': """
-            **Правильный ответ**: Парадокс Симпсона.
-            
-            **Объяснение**: 
-            - Канал A лучше на КАЖДОМ типе устройства
-            - Но общий CTR канала A ниже из-за разного распределения трафика
-            - A получает больше сложного mobile-трафика (70% vs 90%)
-            
-            **Урок**: Всегда анализируй данные в разрезе сегментов!
-            """,
-            'points': 25
-        },
-        {
-            'id': 'correlation_causation',
-            'difficulty': 'Аналитик',
-            'title': 'Корреляция vs Причинность',
-            'description': """
-            **Ситуация**: Аналитик нашел сильную корреляцию между расходами на рекламу и продажами.
-            
-            **Данные за 12 месяцев**:
-            - Корреляция между ad spend и revenue: r = 0.89
-            - При увеличении рекламы на $1000, revenue растет на $3500
-            
-            **Вывод**: "Каждый доллар рекламы приносит $3.50 дохода. Увеличиваем бюджет в 2 раза!"
-            """,
-            'chart_data': None,
-            'options': [
-                "Корреляция не означает причинность - нужны дополнительные тесты",
-                "ROI 3.5:1 отличный, можно увеличивать бюджет",
-                "Нужно учесть seasonality и другие факторы",
-                "А и С правильные"
-            ],
-            'correct': 3,
-            'explanation': """
-            **Правильный ответ**: А и С правильные.
-            
-            **Проблемы**:
-            1. **Корреляция ≠ Причинность**: Возможно, продажи растут из-за сезонности
-            2. **Omitted variable bias**: Не учтены конкуренты, экономика, тренды
-            3. **Reverse causality**: Возможно, при росте продаж увеличивают рекламу
-            
-            **Правильно**: A/B тест с контрольной группой без увеличения рекламы
-            """,
-            'points': 20
-        },
-        {
-            'id': 'cherry_picking',
-            'difficulty': 'Новичок', 
-            'title': 'Селективная подача данных',
-            'description': """
-            **Ситуация**: Менеджер продукта представляет результаты нового feature.
-            
-            **Презентация**:
-            "Наш новый feature показал отличные результаты:
-            - Engagement вырос на 15% (с 20% до 23%)
-            - Time on page увеличилось на 30 секунд
-            - Положительные отзывы составили 78%"
-            
-            **Скрытая информация**:
-            - Retention упал с 45% до 38%
-            - Conversion rate снизился с 3.2% до 2.8%
-            - Тестировали только на power users
-            """,
-            'chart_data': None,
-            'options': [
-                "Результаты отличные, feature успешен",
-                "Cherry-picking: показаны только положительные метрики",
-                "Нужно больше времени для оценки",
-                "Тест проведен некорректно"
-            ],
-            'correct': 1,
-            'explanation': """
-            **Правильный ответ**: Cherry-picking данных.
-            
-            **Проблема**: Показаны только метрики, которые улучшились, а критические 
-            бизнес-метрики (retention, conversion) скрыты.
-            
-            **Урок**: Всегда требуй полную картину метрик, особенно северные звезды!
-            """,
-            'points': 10
-        }
-    ]
+    return get_content().family('analysis')
 
 def get_decision_scenarios() -> List[Dict]:
     """База сценариев принятия решений"""
-    return [
-        {
-            'title': 'Кризис снижения конверсии',
-            'id': 'conversion_crisis',
-            'description': """
-            **Ситуация**: Конверсия интернет-магазина упала с 3% до 2% за последний месяц.
-            Руководство требует срочного анализа и плана действий.
-            """,
-            'steps': [
-                {
-                    'text': "С чего начнешь анализ?",
-                    'options': [
-                        "Сразу проверю технические изменения на сайте",
-                        "Проанализирую данные в разрезе сегментов",
-                        "Запущу A/B тест новой страницы",
-                        "Изучу конкурентов"
-                    ],
-                    'correct': 1,
-                    'feedback': {
-                        0: "Хорошая мысль, но сначала нужно понять масштаб проблемы через данные.",
-                        1: "Отлично! Сегментный анализ покажет, где именно проблема.",
-                        2: "Преждевременно - сначала нужно найти причину текущего падения.",
-                        3: "Полезно, но вторично. Сначала разберись с собственными данными."
-                    }
-                },
-                {
-                    'text': "Сегментный анализ показал: мобильная конверсия упала с 2.5% до 1.2%, десктопная стабильна (4.2%). Следующий шаг?",
-                    'options': [
-                        "Проверю изменения в мобильной версии сайта",
-                        "Изучу источники трафика на мобильных",
-                        "Проанализирую техническую производительность мобильной версии",
-                        "Все вышеперечисленное"
-                    ],
-                    'correct': 3,
-                    'feedback': {
-                        0: "Правильно, но этого недостаточно для полной картины.",
-                        1: "Важный аспект, но не единственный.",
-                        2: "Критически важно, но нужен комплексный подход.",
-                        3: "Превосходно! Комплексный анализ даст полную картину."
-                    }
-                },
-                {
-                    'text': "Анализ показал: новый мобильный checkout увеличил количество шагов с 3 до 5. Скорость загрузки выросла с 2с до 4с. Что делаешь?",
-                    'options': [
-                        "Откатываю изменения немедленно",
-                        "Запускаю A/B тест старой vs новой версии",
-                        "Оптимизирую новую версию (скорость + UX)",
-                        "Собираю фокус-группу для качественного исследования"
-                    ],
-                    'correct': 2,
-                    'feedback': {
-                        0: "Быстро, но не оптимально - теряешь потенциальные улучшения новой версии.",
-                        1: "Хорошо, но ты уже знаешь проблемы - лучше их сначала исправить.",
-                        2: "Отлично! Фиксишь известные проблемы, сохраняя потенциал новой версии.",
-                        3: "Полезно, но слишком медленно для кризисной ситуации."
-                    }
-                }
-            ]
-        },
-        {
-            'title': 'Аномальный рост метрики',
-            'id': 'metric_anomaly', 
-            'description': """
-            **Ситуация**: Вчера DAU вырос на 40% без видимых причин. 
-            Менеджмент в восторге, но тебе что-то кажется подозрительным.
-            """,
-            'steps': [
-                {
-                    'text': "Твоя первая реакция на аномальный рост?",
-                    'options': [
-                        "Поздравлю команду с отличным результатом",
-                        "Проверю данные на наличие ошибок и дубликатов",
-                        "Проанализирую источники трафика",
-                        "Проверю, не было ли технических изменений"
-                    ],
-                    'correct': 1,
-                    'feedback': {
-                        0: "Слишком рано радоваться - аномалии часто означают ошибки в данных.",
-                        1: "Правильно! Первым делом - валидация данных.",
-                        2: "Важно, но сначала убедись, что данные корректны.",
-                        3: "Хорошая мысль, но начни с проверки качества данных."
-                    }
-                },
-                {
-                    'text': "Обнаружил: система аналитики считала одного пользователя как нескольких из-за бага. Как поступишь?",
-                    'options': [
-                        "Исправлю данные задним числом и никому не скажу",
-                        "Сообщу команде об ошибке и исправлю метрики",
-                        "Оставлю как есть - рост уже анонсировали",
-                        "Создам новую метрику вместо исправления старой"
-                    ],
-                    'correct': 1,
-                    'feedback': {
-                        0: "Непрозрачно и может привести к неправильным решениям в будущем.",
-                        1: "Правильно! Честность в данных критически важна.",
-                        2: "Плохо - команда будет принимать решения на основе ложных данных.",
-                        3: "Избыточно сложно и создает путаницу."
-                    }
-                }
-            ]
-        }
-    ]
+    return get_content().family('scenario')
 
 def get_bias_cases() -> List[Dict]:
     """База кейсов с предвзятостями"""
-    return [
-        {
-            'title': 'Предвзятость выжившего в A/B тесте',
-            'id': 'survivorship_bias',
-            'description': """
-            **Кейс**: Тестируем новую форму подписки на email.
-            
-            **Результаты через 2 недели**:
-            - Версия A: 1000 показов, 100 подписок (10%)
-            - Версия B: 1000 показов, 150 подписок (15%)
-            
-            **Вывод**: "Версия B лучше на 50%! Внедряем!"
-            """,
-            'bias_type': 'survivorship',
-            'chart_data': {
-                'shown': [1000, 1000],
-                'subscribed': [100, 150],
-                'active_after_month': [85, 90]
-            },
-            'questions': [
-                "Какую предвзятость ты видишь в этом анализе?",
-                "Что еще нужно проверить?"
-            ],
-            'hints': [
-                "Подумай о долгосрочной перспективе...",
-                "Что происходит с подписчиками через месяц?"
-            ],
-            'revelation': """
-            **Скрытая информация**: Через месяц активных остались:
-            - Версия A: 85 из 100 (85% retention)
-            - Версия B: 90 из 150 (60% retention)
-            
-            **Вывод**: Версия B привлекает больше подписчиков, но они менее качественные!
-            """
-        },
-        {
-            'title': 'Систематическая ошибка отбора',
-            'id': 'selection_bias',
-            'description': """
-            **Исследование**: Эффективность нового email-дизайна.
-            
-            **Методология**: Отправили новый дизайн подписчикам, которые открывали 
-            письма в последние 30 дней.
-            
-            **Результат**: Open rate увеличился с 25% до 35%!
-            """,
-            'bias_type': 'selection',
-            'questions': [
-                "В чем проблема этого исследования?",
-                "Как это влияет на выводы?"
-            ],
-            'hints': [
-                "Подумай о выборке...",
-                "Кого включили в тест?"
-            ],
-            'revelation': """
-            **Проблема**: Тестировали только на активных пользователях!
-            Это как тестировать новый самолет только на пилотах-асах.
-            
-            **Правильно**: Случайная выборка из всей базы подписчиков.
-            """
-        },
-        {
-            'title': 'Предвзятость подтверждения',
-            'id': 'confirmation_bias',
-            'description': """
-            **Ситуация**: Продуктовая команда запустила новый feature. 
-            После двух недель A/B теста:
-            
-            **Метрики**:
-            - Engagement: +12% ✅
-            - Session duration: +8% ✅  
-            - Revenue per user: -3% ❌
-            - User retention: -5% ❌
-            
-            **Вывод команды**: "Feature успешен! Engagement растет!"
-            """,
-            'bias_type': 'confirmation',
-            'questions': [
-                "Какая предвзятость проявляется в выводах?",
-                "Как правильно интерпретировать результаты?"
-            ],
-            'hints': [
-                "Команда видит только то, что хочет видеть...",
-                "Какие метрики важнее для бизнеса?"
-            ],
-            'revelation': """
-            **Предвзятость подтверждения**: Команда фокусируется только на положительных 
-            метриках, игнорируя критичные для бизнеса (revenue, retention).
-            
-            **Правильно**: Смотреть на полную картину метрик и их приоритеты.
-            """
-        }
-    ]
+    return get_content().family('bias')
+
+def get_dataset_cases() -> List[Dict]:
+    """База кейсов на сырых журналах событий"""
+    return get_content().family('dataset')
+
+@st.cache_resource(show_spinner="🗄️ Готовим журнал событий...")
+def open_event_log(case_id: str, generator: str, rows: int, seed: int) -> EventLog:
+    """Открывает (и при необходимости генерирует) журнал событий кейса, один на процесс"""
+    path = ensure_event_log(f"data/event_logs/{case_id}", generator, rows, seed)
+    return EventLog(path)
+
+def display_dataset_case(case: Dict):
+    """Отображение кейса на сырых данных"""
+    st.markdown(f"### {case['title']}")
+    render_case_rating(case)
+    st.markdown(case['description'].strip())
+    
+    dataset = case['dataset']
+    log = open_event_log(case['id'], dataset['generator'], dataset['rows'], dataset['seed'])
+    st.caption(t("📦 Журнал: {rows} событий").format(rows=f"{log.n_rows:,}"))
+    
+    # Срезы
+    col1, col2 = st.columns(2)
+    with col1:
+        group_by = st.multiselect(t("Группировать по:"), log.dimensions, default=['day'],
+                                  key=f"ds_group_{case['id']}")
+    with col2:
+        day_spec = log.schema['columns']['day']
+        day_range = st.slider(t("Дни:"), day_spec['min'], day_spec['max'],
+                              (day_spec['min'], day_spec['max']), key=f"ds_days_{case['id']}")
+    
+    filters = {'day': parse_day_range(day_range, day_spec)}
+    filter_columns = st.columns(len(log.dimensions) - 1)
+    for column, name in zip(filter_columns, [d for d in log.dimensions if d != 'day']):
+        with column:
+            selected = st.multiselect(f"{name}:", log.labels(name), key=f"ds_filter_{case['id']}_{name}")
+            filters[name] = selected or None
+    
+    result = log.aggregate(group_by, filters)
+    
+    # Визуализация среза
+    if group_by and len(result) > 0:
+        fig, ax = plt.subplots(figsize=(12, 5))
+        if group_by[0] == 'day':
+            series = result.pivot_table(index='day', columns=group_by[1:] or None,
+                                        values=['converted', 'events'], aggfunc='sum')
+            rates = series['converted'] / series['events'] * 100
+            rates.plot(ax=ax, marker='o', markersize=3)
+            ax.set_xlabel(t("День"))
+        else:
+            labels = result[group_by].astype(str).agg(' / '.join, axis=1)
+            ax.bar(labels, result['rate'] * 100, alpha=0.7)
+            ax.tick_params(axis='x', rotation=45)
+        ax.set_ylabel(t("Конверсия (%)"))
+        ax.set_title(t("Конверсия по срезу"))
+        fig.tight_layout()
+        st.pyplot(fig)
+        plt.close(fig)
+    
+    st.dataframe(result, use_container_width=True, hide_index=True)
+    
+    # Варианты ответов
+    st.markdown(t("### 🤔 Что на самом деле произошло?"))
+    
+    render_answer_options(case)
 
 def display_analysis_case(case: Dict):
     """Отображение кейса для анализа"""
     st.markdown(f"### {case['title']}")
-    st.markdown(case['description'])
+    render_case_rating(case)
+    st.markdown(case['description'].strip())
     
     # Визуализация данных, если есть
     if case.get('chart_data'):
         create_case_visualization(case)
     
+    # Bootstrap-лаборатория для A/B кейсов
+    render_bootstrap_panel(case)
+    
     # Варианты ответов
-    st.markdown("### 🤔 Что не так с этим анализом?")
+    st.markdown(t("### 🤔 Что не так с этим анализом?"))
     
-    answer = st.radio("Выбери правильный ответ:", case['options'], key=f"case_{case['id']}")
+    render_answer_options(case)
+
+def render_answer_options(case: Dict):
+    """Варианты ответа и кнопки; значение радио - номер варианта, а не его текст на языке сессии"""
+    answer = st.radio(t("Выбери правильный ответ:"), range(len(case['options'])),
+                      format_func=dict(enumerate(case['options'])).get, key=f"case_{case['id']}")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("Проверить ответ", key=f"check_{case['id']}"):
+        if st.button(t("Проверить ответ"), key=f"check_{case['id']}"):
             check_analysis_answer(case, answer)
     
     with col2:
-        if st.button("💡 Подсказка", key=f"hint_{case['id']}"):
+        if st.button(t("💡 Подсказка"), key=f"hint_{case['id']}"):
             give_hint(case)
 
 def create_case_visualization(case: Dict):
     """Создание визуализации для кейса"""
-    case_id = case['id']
-    
-    if case_id == 'marketing_conversion_1':
-        # Воронка конверсии
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        stages = ['Отправлено', 'Открыто', 'Перешли', 'Купили']
-        values = [10000, 2500, 250, 25]
-        colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
-        
-        bars = ax.bar(stages, values, color=colors, alpha=0.7)
-        
-        # Добавляем проценты
-        for i, (bar, value) in enumerate(zip(bars, values)):
-            if i > 0:
-                pct = (value / values[i-1]) * 100
-                ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 100,
-                       f'{pct:.1f}%', ha='center', va='bottom', fontweight='bold')
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height()/2,
-                   f'{value:,}', ha='center', va='center', color='white', fontweight='bold')
-        
-        ax.set_title("Воронка email-кампании", fontsize=14)
-        ax.set_ylabel("Количество")
-        
-        fig.tight_layout()
-        st.pyplot(fig)
-        
-    elif case_id == 'simpsons_paradox':
-        # Демонстрация парадокса Симпсона
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-        
-        # Общие результаты
-        channels = ['Канал A', 'Канал B']
-        ctr_total = [10, 8]
-        ax1.bar(channels, ctr_total, color=['blue', 'red'], alpha=0.7)
-        ax1.set_title("Общий CTR (%)")
-        ax1.set_ylabel("CTR (%)")
-        
-        # По устройствам
-        devices = ['Desktop', 'Mobile']
-        ctr_a = [66.7, 14.3]
-        ctr_b = [50.0, 3.3]
-        
-        x = np.arange(len(devices))
-        width = 0.35
-        
-        ax2.bar(x - width/2, ctr_a, width, label='Канал A', color='blue', alpha=0.7)
-        ax2.bar(x + width/2, ctr_b, width, label='Канал B', color='red', alpha=0.7)
-        
-        ax2.set_title("CTR по устройствам (%)")
-        ax2.set_ylabel("CTR (%)")
-        ax2.set_xticks(x)
-        ax2.set_xticklabels(devices)
-        ax2.legend()
-        
-        fig.tight_layout()
-        st.pyplot(fig)
+    png = case_chart_png(case)
+    if png:
+        st.image(png)
 
-def check_analysis_answer(case: Dict, user_answer: str):
+def check_analysis_answer(case: Dict, user_index: int):
     """Проверка ответа пользователя"""
     correct_index = case['correct']
-    user_index = case['options'].index(user_answer)
+    
+    first_answer = claim_first_answer(case['id'])
+    if first_answer:
+        record_case_result(case['id'], user_index == correct_index)
+        publish_answer('analysis_answer', case['id'], user_index == correct_index,
+                       case['points'] if user_index == correct_index else 0, choice=user_index)
     
     if user_index == correct_index:
-        st.success("🎉 Правильно! Отличная работа, детектив!")
-        st.markdown(case['explanation'])
+        st.success(t("🎉 Правильно! Отличная работа, детектив!"))
+        st.markdown(case['explanation'].strip())
         
         # Начисляем очки
-        award_points(case['points'], case['id'])
-        
-        st.balloons()
+        if first_answer:
+            award_points(case['points'], case['id'])
+            st.balloons()
         
     else:
-        st.error("❌ Неправильно. Попробуй еще раз!")
-        reset_streak()
+        st.error(t("❌ Неправильно. Попробуй еще раз!"))
+        if first_answer:
+            reset_streak()
         
         # Показываем частичную подсказку
-        st.info("💡 Подсказка: Внимательно посмотри на определения и базы для расчета.")
+        st.info(t("💡 Подсказка: Внимательно посмотри на определения и базы для расчета."))
+    
+    if not first_answer:
+        st.caption(t("Засчитан первый ответ: рейтинг и очки за этот визит к кейсу уже учтены."))
+
+def claim_first_answer(case_id: str) -> bool:
+    """
+    True для первого ответа за визит к кейсу. Засчитывается только он:
+    повторные нажатия не меняют рейтинги, интервалы повторения, очки и серию.
+    """
+    if st.session_state.answered_case == case_id:
+        return False
+    st.session_state.answered_case = case_id
+    return True
 
 def give_hint(case: Dict):
     """Система подсказок"""
-    hints = {
-        'marketing_conversion_1': "🔍 Подсказка: Обрати внимание на то, от какого числа считается процент. Что такое 'конверсия кампании'?",
-        'ab_test_significance': "🔍 Подсказка: p-value < 0.05 не гарантирует практической значимости. Какие еще метрики важны?",
-        'simpsons_paradox': "🔍 Подсказка: Посмотри на результаты отдельно по каждому устройству. Что происходит внутри групп vs в целом?",
-        'correlation_causation': "🔍 Подсказка: Корреляция не равна причинности. Какие факторы могли повлиять?",
-        'cherry_picking': "🔍 Подсказка: Какие важные метрики могли быть скрыты?"
-    }
-    
-    hint = hints.get(case['id'], "🔍 Общая подсказка: Всегда проверяй определения, базы расчета и скрытые переменные!")
-    st.info(hint)
+    track_event('hint', case['id'])
+    st.info(t(get_content().hint(case['id'])))
 
 def play_scenario(scenario: Dict):
     """Проигрывание сценария"""
     st.markdown(f"### {scenario['title']}")
-    st.markdown(scenario['description'])
+    render_case_rating(scenario)
+    st.markdown(scenario['description'].strip())
     
-    # Инициализация состояния сценария
+    # Прогресс сценария хранится в статистике игрока в упакованном виде
     scenario_key = f"scenario_{scenario['id']}"
-    if scenario_key not in st.session_state:
-        st.session_state[scenario_key] = {'step': 0, 'score': 0, 'choices': []}
+    progress = get_session_registry().scenario(st.session_state.player_stats, scenario['id'])
     
-    current_step = st.session_state[scenario_key]['step']
+    current_step = progress.step
     
     if current_step < len(scenario['steps']):
         step = scenario['steps'][current_step]
         
-        st.markdown(f"#### Шаг {current_step + 1}")
+        st.markdown(t("#### Шаг {number}").format(number=current_step + 1))
         st.markdown(step['text'])
         
-        choice = st.radio("Твое решение:", step['options'], key=f"{scenario_key}_step_{current_step}")
+        user_choice_index = st.radio(t("Твое решение:"), range(len(step['options'])),
+                                     format_func=dict(enumerate(step['options'])).get,
+                                     key=f"{scenario_key}_step_{current_step}")
         
-        if st.button("Принять решение", key=f"{scenario_key}_decide_{current_step}"):
-            user_choice_index = step['options'].index(choice)
-            st.session_state[scenario_key]['choices'].append(user_choice_index)
-            
+        if st.button(t("Принять решение"), key=f"{scenario_key}_decide_{current_step}"):            
             # Показываем обратную связь
             feedback = step['feedback'][user_choice_index]
             
+            record_case_result(scenario['id'], user_choice_index == step['correct'])
+            publish_answer('scenario_step', scenario['id'], user_choice_index == step['correct'],
+                           10 if user_choice_index == step['correct'] else 0,
+                           choice=user_choice_index, step=current_step, steps=len(scenario['steps']))
+            
             if user_choice_index == step['correct']:
                 st.success(f"✅ {feedback}")
-                st.session_state[scenario_key]['score'] += 10
                 award_points(10)
             else:
                 st.warning(f"🤔 {feedback}")
                 reset_streak()
             
-            # Переходим к следующему шагу
-            st.session_state[scenario_key]['step'] += 1
+            # Запоминаем выбор и переходим к следующему шагу
+            progress.record(user_choice_index, 10 if user_choice_index == step['correct'] else 0)
             
-            time.sleep(2)
+            time.sleep(SCENARIO_FEEDBACK_DELAY)
             st.rerun()
     
     else:
         # Сценарий завершен
-        total_score = st.session_state[scenario_key]['score']
+        total_score = progress.score
         max_score = len(scenario['steps']) * 10
         
-        st.success(f"🎉 Сценарий завершен! Ваш результат: {total_score}/{max_score}")
+        st.success(t("🎉 Сценарий завершен! Ваш результат: {score}/{max_score}").format(score=total_score,
+                                                                                      max_score=max_score))
         
         if total_score == max_score:
-            st.markdown("👑 Превосходная работа! Ты принял все оптимальные решения.")
+            st.markdown(t("👑 Превосходная работа! Ты принял все оптимальные решения."))
         elif total_score >= max_score * 0.7:
-            st.markdown("👍 Хорошая работа! Большинство решений были правильными.")
+            st.markdown(t("👍 Хорошая работа! Большинство решений были правильными."))
         else:
-            st.markdown("📚 Есть что улучшить. Попробуй еще раз!")
+            st.markdown(t("📚 Есть что улучшить. Попробуй еще раз!"))
         
-        if st.button("Начать заново", key=f"{scenario_key}_restart"):
-            del st.session_state[scenario_key]
+        if st.button(t("Начать заново"), key=f"{scenario_key}_restart"):
+            get_session_registry().restart_scenario(st.session_state.player_stats, scenario['id'])
             st.rerun()
 
 def display_bias_case(case: Dict):
     """Отображение кейса с предвзятостью"""
     st.markdown(f"### {case['title']}")
-    st.markdown(case['description'])
+    render_case_rating(case)
+    st.markdown(case['description'].strip())
     
     # Создаем график с "обманчивыми" данными
     if 'chart_data' in case:
         create_bias_visualization(case, reveal_bias=False)
     
+    # Bootstrap-лаборатория для A/B кейсов
+    render_bootstrap_panel(case)
+    
+    # Симулятор когорт для кейсов с удержанием подписчиков
+    render_cohort_panel(case)
+    
     # Вопросы для размышления
     for i, question in enumerate(case['questions']):
         st.markdown(f"**🤔 {question}**")
-        user_input = st.text_area(f"Твои мысли:", key=f"bias_input_{case['id']}_{i}", height=100)
+        user_input = st.text_area(t("Твои мысли:"), key=f"bias_input_{case['id']}_{i}", height=100)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("💡 Подсказка", key=f"bias_hint_{case['id']}"):
+        if st.button(t("💡 Подсказка"), key=f"bias_hint_{case['id']}"):
+            track_event('hint', case['id'])
             for hint in case['hints']:
                 st.info(hint)
     
     with col2:
-        if st.button("🎭 Раскрыть предвзятость", key=f"bias_reveal_{case['id']}"):
-            st.error("⚠️ **ПРЕДВЗЯТОСТЬ ОБНАРУЖЕНА!**")
-            st.markdown(case['revelation'])
+        if st.button(t("🎭 Раскрыть предвзятость"), key=f"bias_reveal_{case['id']}"):
+            track_event('bias_reveal', case['id'])
+            st.session_state[f"bias_revealed_{case['id']}"] = True
+            if claim_first_answer(case['id']):
+                record_case_result(case['id'], False)
+                publish_answer('bias_answer', case['id'], False)
+            st.error(t("⚠️ **ПРЕДВЗЯТОСТЬ ОБНАРУЖЕНА!**"))
+            st.markdown(case['revelation'].strip())
             
             # Показываем "честный" график
             if 'chart_data' in case:
                 create_bias_visualization(case, reveal_bias=True)
     
     with col3:
-        if st.button("✅ Понял!", key=f"bias_understood_{case['id']}"):
-            award_points(20, case['id'])
-            st.success("Отлично! +20 очков детектива!")
+        if st.button(t("✅ Понял!"), key=f"bias_understood_{case['id']}"):
+            # После раскрытия или повторного нажатия ответ за визит уже учтен
+            if claim_first_answer(case['id']):
+                record_case_result(case['id'], True)
+                publish_answer('bias_answer', case['id'], True, 20)
+                award_points(20, case['id'])
+                st.success(t("Отлично! +20 очков детектива!"))
+            else:
+                st.caption(t("Засчитан первый ответ: рейтинг и очки за этот визит к кейсу уже учтены."))
 
 def create_bias_visualization(case: Dict, reveal_bias: bool = False):
     """Создание визуализации для демонстрации предвзятости"""
-    if case['id'] == 'survivorship_bias':
-        fig, ax = plt.subplots(figsize=(10, 6))
+    png = case_chart_png(case, reveal_bias=reveal_bias)
+    if png:
+        st.image(png)
+
+# ===== BOOTSTRAP-ЛАБОРАТОРИЯ =====
+@st.cache_data(show_spinner="🎲 Ресэмплинг...")
+def compute_bootstrap(case_id: str, counts: tuple, n_resamples: int, confidence: float,
+                      chunk_size: int, parallel: bool, seed: int) -> Dict:
+    """Кэшированный bootstrap для кейса и набора параметров"""
+    n_a, x_a, n_b, x_b = counts
+    return run_bootstrap(n_a, x_a, n_b, x_b, n_resamples=n_resamples, confidence=confidence,
+                         chunk_size=chunk_size, seed=seed, parallel=parallel)
+
+def render_bootstrap_panel(case: Dict):
+    """Интерактивная панель bootstrap и перестановочного теста"""
+    counts = get_ab_counts(case)
+    if counts is None:
+        return
+    
+    with st.expander(t("📐 Bootstrap-лаборатория: проверь выводы сам")):
+        st.markdown(t("""
+        Восстанавливаем сырые исходы пользователей из цифр кейса и пересчитываем
+        доверительный интервал разницы конверсий и распределение p-value.
+        """))
         
-        versions = ['Версия A', 'Версия B']
-        subscriptions = case['chart_data']['subscribed']
+        col1, col2 = st.columns(2)
+        with col1:
+            n_resamples = st.select_slider(t("Число ресэмплов:"), [1000, 10000, 50000, 100000, 200000],
+                                           value=10000, key=f"boot_n_{case['id']}")
+            confidence = st.select_slider(t("Уровень доверия:"), [0.8, 0.9, 0.95, 0.99],
+                                          value=0.95, key=f"boot_conf_{case['id']}")
+        with col2:
+            chunk_size = st.select_slider(t("Размер чанка:"), [500, 1000, 2000, 5000],
+                                          value=2000, key=f"boot_chunk_{case['id']}")
+            seed = st.number_input("Seed:", value=42, step=1, key=f"boot_seed_{case['id']}")
+            parallel = st.checkbox(t("Параллельно (пул процессов)"), key=f"boot_parallel_{case['id']}")
         
-        bars = ax.bar(versions, subscriptions, color=['blue', 'orange'], alpha=0.7)
+        result = compute_bootstrap(case['id'], counts, n_resamples, confidence,
+                                   chunk_size, parallel, int(seed))
         
-        # Добавляем проценты
-        for bar, sub, shown in zip(bars, subscriptions, case['chart_data']['shown']):
-            pct = (sub / shown) * 100
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
-                   f'{pct:.0f}%', ha='center', va='bottom', fontweight='bold')
+        ci_low, ci_high = result['ci']
+        col1, col2, col3 = st.columns(3)
+        points = t("п.п.")
+        col1.metric(t("Разница B - A"), f"{result['observed_diff'] * 100:.2f} {points}")
+        col2.metric(t("ДИ {confidence}").format(confidence=f"{confidence:.0%}"),
+                    f"[{ci_low * 100:.2f}; {ci_high * 100:.2f}] {points}")
+        col3.metric(t("p-value (перестановки)"), f"{result['p_value']:.4f}")
         
-        ax.set_title("Результаты A/B теста подписок" + 
-                    (" (ПОЛНАЯ КАРТИНА)" if reveal_bias else ""), fontsize=14)
-        ax.set_ylabel("Количество подписок")
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 4))
         
-        if reveal_bias:
-            # Показываем retention
-            ax2 = ax.twinx()
-            retention = [active/sub * 100 for active, sub in 
-                        zip(case['chart_data']['active_after_month'], subscriptions)]
-            
-            line = ax2.plot(versions, retention, 'ro-', linewidth=3, markersize=10, 
-                           label='Retention через месяц (%)')
-            ax2.set_ylabel("Retention (%)", color='red')
-            ax2.tick_params(axis='y', labelcolor='red')
-            
-            # Добавляем аннотации retention
-            for i, (version, ret) in enumerate(zip(versions, retention)):
-                ax2.annotate(f'{ret:.0f}%', xy=(i, ret), xytext=(10, 10),
-                           textcoords='offset points', color='red', fontweight='bold')
-            
-            ax2.legend(loc='upper right')
+        counts_boot, edges_boot = result['boot_hist']
+        ax1.stairs(counts_boot * 1.0, edges_boot * 100, fill=True, alpha=0.7)
+        ax1.axvline(ci_low * 100, color='red', linestyle='--')
+        ax1.axvline(ci_high * 100, color='red', linestyle='--')
+        ax1.axvline(0, color='black')
+        ax1.set_title(t("Bootstrap-распределение разницы (п.п.)"))
+        
+        counts_perm, edges_perm = result['perm_hist']
+        ax2.stairs(counts_perm * 1.0, edges_perm * 100, fill=True, alpha=0.7, color='gray')
+        ax2.axvline(result['observed_diff'] * 100, color='red', linewidth=2, label=t('Наблюдаемая разница'))
+        ax2.axvline(-result['observed_diff'] * 100, color='red', linestyle=':')
+        ax2.set_title(t("Распределение при H0 (перестановки, п.п.)"))
+        ax2.legend()
+        
+        fig.tight_layout()
+        st.pyplot(fig)
+        plt.close(fig)
+        
+        if ci_low <= 0 <= ci_high:
+            st.warning(t("⚠️ Доверительный интервал содержит 0 - разница может быть случайной."))
+        else:
+            st.success(t("✅ Доверительный интервал не содержит 0."))
+
+# ===== СИМУЛЯТОР КОГОРТ =====
+@st.cache_data(show_spinner="📉 Симулируем когорты...")
+def compute_retention(subscribed: tuple, hazards: tuple, shapes: tuple, cohorts: int, weeks: int, seed: int) -> Dict:
+    """Кэшированные кривые удержания для набора параметров; горизонт в ключ не входит"""
+    return simulate_retention(subscribed, hazards, shapes, cohorts=cohorts, weeks=weeks, seed=seed)
+
+def render_cohort_panel(case: Dict):
+    """Интерактивные кривые удержания: при каком горизонте анализа меняется победитель"""
+    chart_data = case.get('chart_data') or {}
+    if not {'subscribed', 'active_after_month'} <= chart_data.keys():
+        return
+    
+    with st.expander(t("📉 Симулятор когорт: сравни варианты на разном горизонте")):
+        st.markdown(t("""
+        Подписчики каждого варианта приходят недельными когортами и со временем отписываются.
+        Удержание оценивается по Каплану-Мейеру по всем когортам сразу. Двигай горизонт анализа
+        и смотри, какой вариант побеждает по числу активных подписчиков.
+        """))
         
+        # До раскрытия предвзятости отток не подсказываем; после - берем его из кейса
+        revealed = st.session_state.get(f"bias_revealed_{case['id']}", False)
+        subscribed = tuple(int(value) for value in chart_data['subscribed'])
+        if revealed:
+            defaults = [calibrate_hazard(active / subs) for active, subs in
+                        zip(chart_data['active_after_month'], subscribed)]
+        else:
+            defaults = [0.05, 0.05]
+        key = f"{case['id']}_{int(revealed)}"
+        
+        shape_labels = t_labels(COHORT_SHAPE_LABELS)
+        col1, col2, col3 = st.columns(3)
+        hazards, shapes = [], []
+        for column, variant, default in zip((col1, col2), VARIANTS, defaults):
+            with column:
+                hazards.append(st.slider(t("Отток {variant} в первую неделю:").format(variant=variant),
+                                         0.01, 0.4, round(default, 2), 0.01, key=f"cohort_hazard_{variant}_{key}"))
+                shapes.append(st.select_slider(t("Динамика оттока {variant}:").format(variant=variant),
+                                               [0.5, 0.7, 1.0, 1.3], value=1.0, format_func=shape_labels.get,
+                                               key=f"cohort_shape_{variant}_{key}"))
+        with col3:
+            cohorts = st.slider(t("Недельных когорт:"), 1, 12, 8, key=f"cohort_count_{case['id']}")
+            seed = st.number_input("Seed:", value=42, step=1, key=f"cohort_seed_{case['id']}")
+        
+        result = compute_retention(subscribed, tuple(hazards), tuple(shapes), cohorts, MAX_WEEKS, int(seed))
+        
+        # Смена горизонта только срезает готовые кривые
+        horizon = st.slider(t("Горизонт анализа (недель после подписки):"), 1, MAX_WEEKS - cohorts + 1, 4,
+                            key=f"cohort_horizon_{case['id']}")
+        active = result['active'][:, horizon]
+        winner = winner_at(result, horizon)
+        version = t("Версия {variant}")
+        col1, col2, col3 = st.columns(3)
+        for column, i in ((col1, 0), (col2, 1)):
+            column.metric(t("Активны в {variant}").format(variant=VARIANTS[i]), f"{active[i]:.0f}",
+                          t("{share} удержания").format(share=f"{result['survival'][i, horizon]:.0%}"),
+                          delta_color="off")
+        col3.metric(t("Побеждает"), version.format(variant=winner) if winner else t("Ничья"))
+        
+        weeks = np.arange(result['weeks'] + 1)
+        colors = ['blue', 'orange']
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 4))
+        for i, variant in enumerate(VARIANTS):
+            for cohort_curve in result['cohort_survival'][i]:
+                ax1.plot(weeks, cohort_curve * 100, color=colors[i], alpha=0.15, linewidth=1)
+            ax1.plot(weeks, result['survival'][i] * 100, color=colors[i], linewidth=2.5,
+                     label=version.format(variant=variant))
+            ax2.plot(weeks, result['active'][i], color=colors[i], linewidth=2.5, label=version.format(variant=variant))
+        for ax in (ax1, ax2):
+            ax.axvline(horizon, color='red', linestyle='--')
+            ax.set_xlabel(t("Недель после подписки"))
+            ax.legend()
+        for flip in result['flip_weeks']:
+            ax2.axvline(flip, color='gray', linestyle=':')
+        ax1.set_title(t("Удержание (Каплан-Мейер), тонкие линии - когорты"))
+        ax1.set_ylabel(t("Удержание (%)"))
+        ax2.set_title(t("Активные подписчики"))
         fig.tight_layout()
         st.pyplot(fig)
+        plt.close(fig)
+        
+        if result['flip_weeks']:
+            st.warning(t("⚠️ Лидер меняется на неделе {weeks}: вывод A/B теста зависит от горизонта анализа.")
+                       .format(weeks=', '.join(map(str, result['flip_weeks']))))
+        else:
+            st.info(t("На всем горизонте лидер не меняется."))
 
 # ===== ЗАПУСК ПРИЛОЖЕНИЯ =====
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Модули Statistical Detective"""
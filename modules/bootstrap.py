@@ -0,0 +1,119 @@
+"""Bootstrap и перестановочные тесты для A/B кейсов"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 2000
+HIST_BINS = 60
+
+
+def get_ab_counts(case: Dict) -> Optional[Tuple[int, int, int, int]]:
+    """Достает из кейса (n_a, x_a, n_b, x_b) или None, если кейс не A/B"""
+    chart_data = case.get('chart_data') or {}
+
+    # Кейсы с конверсиями (например, ab_test_significance)
+    if 'visits' in chart_data and 'conversions' in chart_data:
+        (n_a, n_b), (x_a, x_b) = chart_data['visits'], chart_data['conversions']
+        return int(n_a), int(x_a), int(n_b), int(x_b)
+
+    # Кейсы с подписками (например, survivorship_bias)
+    if 'shown' in chart_data and 'subscribed' in chart_data:
+        (n_a, n_b), (x_a, x_b) = chart_data['shown'], chart_data['subscribed']
+        return int(n_a), int(x_a), int(n_b), int(x_b)
+
+    return None
+
+
+def rebuild_outcomes(n: int, successes: int) -> np.ndarray:
+    """Восстанавливает сырые исходы пользователей (0/1) по агрегатам"""
+    outcomes = np.zeros(n, dtype=np.int8)
+    outcomes[:successes] = 1
+    return outcomes
+
+
+def split_chunks(n_resamples: int, chunk_size: int) -> List[int]:
+    """Разбивает число ресэмплов на чанки фиксированного размера"""
+    full, rest = divmod(n_resamples, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def _bootstrap_chunk(a: np.ndarray, b: np.ndarray, size: int,
+                     seed: np.random.SeedSequence) -> np.ndarray:
+    """Один чанк bootstrap: разница долей B - A для `size` ресэмплов"""
+    rng = np.random.default_rng(seed)
+    idx_a = rng.integers(0, len(a), size=(size, len(a)), dtype=np.int32)
+    idx_b = rng.integers(0, len(b), size=(size, len(b)), dtype=np.int32)
+    rate_a = a[idx_a].sum(axis=1, dtype=np.int64) / len(a)
+    rate_b = b[idx_b].sum(axis=1, dtype=np.int64) / len(b)
+    return rate_b - rate_a
+
+
+def _permutation_chunk(pooled: np.ndarray, n_a: int, size: int,
+                       seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Один чанк перестановочного теста: разница долей при перемешанных метках.
+
+    Для исходов 0/1 число успехов, попавших в группу A после случайной
+    перестановки, имеет гипергеометрическое распределение, поэтому
+    перестановки сэмплируются им напрямую без перемешивания массивов.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(pooled.sum())
+    n_b = len(pooled) - n_a
+    x_a = rng.hypergeometric(total, len(pooled) - total, n_a, size=size)
+    return (total - x_a) / n_b - x_a / n_a
+
+
+def _run_chunks(func, args: Tuple, sizes: List[int], seeds: List[np.random.SeedSequence],
+                parallel: bool, max_workers: Optional[int]) -> np.ndarray:
+    """Запускает чанки последовательно или в пуле процессов"""
+    if parallel and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(func, *args, size, seed) for size, seed in zip(sizes, seeds)]
+            parts = [future.result() for future in futures]
+    else:
+        parts = [func(*args, size, seed) for size, seed in zip(sizes, seeds)]
+    return np.concatenate(parts)
+
+
+def run_bootstrap(n_a: int, x_a: int, n_b: int, x_b: int,
+                  n_resamples: int = 10000, confidence: float = 0.95,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = 42,
+                  parallel: bool = False, max_workers: Optional[int] = None) -> Dict:
+    """
+    Bootstrap доверительного интервала разницы конверсий и перестановочный p-value.
+
+    Ресэмплинг идет чанками по `chunk_size`, поэтому память ограничена
+    chunk_size * (n_a + n_b) и не растет с числом ресэмплов. Каждый чанк
+    получает свой поток случайных чисел, так что результат одинаков
+    при последовательном и параллельном запуске.
+    """
+    a = rebuild_outcomes(n_a, x_a)
+    b = rebuild_outcomes(n_b, x_b)
+    observed = b.mean() - a.mean()
+
+    sizes = split_chunks(n_resamples, chunk_size)
+    boot_seeds, perm_seeds = np.random.SeedSequence(seed).spawn(2)
+
+    boot_diffs = _run_chunks(_bootstrap_chunk, (a, b), sizes,
+                             boot_seeds.spawn(len(sizes)), parallel, max_workers)
+    perm_diffs = _run_chunks(_permutation_chunk, (np.concatenate([a, b]), n_a), sizes,
+                             perm_seeds.spawn(len(sizes)), parallel, max_workers)
+
+    alpha = 1 - confidence
+    ci_low, ci_high = np.quantile(boot_diffs, [alpha / 2, 1 - alpha / 2])
+    p_value = (np.sum(np.abs(perm_diffs) >= abs(observed) - 1e-12) + 1) / (len(perm_diffs) + 1)
+
+    boot_counts, boot_edges = np.histogram(boot_diffs, bins=HIST_BINS)
+    perm_counts, perm_edges = np.histogram(perm_diffs, bins=HIST_BINS)
+
+    return {
+        'observed_diff': float(observed),
+        'ci': (float(ci_low), float(ci_high)),
+        'confidence': confidence,
+        'p_value': float(p_value),
+        'n_resamples': int(n_resamples),
+        'boot_hist': (boot_counts, boot_edges),
+        'perm_hist': (perm_counts, perm_edges),
+    }
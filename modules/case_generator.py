@@ -0,0 +1,484 @@
+"""
+Генератор кейсов: реестр семейств-плагинов, параллельная генерация
+пачками и отсев почти одинаковых кейсов по числовому отпечатку.
+
+Семейство - функция (rng) -> (кейс, признаки). Кейс имеет ту же схему,
+что и кейсы из data/cases, но без id; признаки - числа, по которым
+кейсы сравниваются (доли, log-размеры выборок). Признаки округляются
+до сетки FINGERPRINT_STEP, так что кейсы из одной ячейки сетки
+считаются дубликатами. Новые семейства подключаются декоратором register
+в любом модуле, указанном в plugins.
+"""
+import hashlib
+import importlib
+import json
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from modules.bootstrap import split_chunks
+from modules.content import validate_case
+
+CHUNK_SIZE = 250
+FINGERPRINT_STEP = 0.02
+GENERATED_PREFIX = 'generated_'
+POINTS = {'Новичок': 10, 'Аналитик': 15, 'Эксперт': 25}
+
+
+class CaseFamily(NamedTuple):
+    name: str
+    case_type: str
+    generate: Callable[[np.random.Generator], Tuple[Dict, Sequence[float]]]
+
+
+FAMILIES: Dict[str, CaseFamily] = {}
+
+
+def register(name: str, case_type: str):
+    """Декоратор: регистрирует семейство кейсов под именем name"""
+    def decorator(generate):
+        FAMILIES[name] = CaseFamily(name, case_type, generate)
+        return generate
+    return decorator
+
+
+def load_plugins(modules: Iterable[str]):
+    """Импортирует модули с дополнительными семействами"""
+    for module in modules:
+        importlib.import_module(module)
+
+
+# ===== ОБЩИЕ ЧАСТИ =====
+def fingerprint(family: str, features: Sequence[float]) -> str:
+    """Отпечаток кейса: признаки, округленные до сетки FINGERPRINT_STEP"""
+    cells = [int(round(value / FINGERPRINT_STEP)) for value in features]
+    return hashlib.sha1(json.dumps([family, cells]).encode('utf-8')).hexdigest()[:12]
+
+
+def shuffle_options(rng: np.random.Generator, correct: str, wrong: List[str]) -> Tuple[List[str], int]:
+    """Варианты ответа в случайном порядке и индекс правильного"""
+    options = [correct] + wrong
+    order = rng.permutation(len(options))
+    return [options[i] for i in order], int(np.flatnonzero(order == 0)[0])
+
+
+def pick(rng: np.random.Generator, items: Sequence):
+    return items[int(rng.integers(len(items)))]
+
+
+def finish_case(family: CaseFamily, case: Dict, features: Sequence[float]) -> Dict:
+    """Добавляет id и сведения о генерации; проверяет схему"""
+    digest = fingerprint(family.name, features)
+    case = {'id': f"gen_{family.name}_{digest}", **case}
+    case['generated'] = {'family': family.name, 'fingerprint': digest}
+    validate_case(case, family.case_type)
+    return case
+
+
+# ===== СЕМЕЙСТВА =====
+@register('funnel', 'analysis')
+def generate_funnel(rng: np.random.Generator):
+    """Воронка email-кампании: конверсия посчитана не от той базы (как marketing_conversion_1)"""
+    sent = int(round(pick(rng, (5, 10, 20, 50)) * rng.uniform(0.8, 1.2), 1) * 1000)
+    opened = int(sent * rng.uniform(0.15, 0.40))
+    clicked = int(opened * rng.uniform(0.05, 0.20))
+    purchased = max(1, int(clicked * rng.uniform(0.05, 0.25)))
+
+    wrong_rate = purchased / clicked
+    true_rate = purchased / sent
+    options, correct = shuffle_options(rng, f"Конверсия должна считаться от общего числа отправленных писем ({true_rate:.2%})", [
+        "Ошибка в расчете процента открытия",
+        "Нужно учесть bounce rate",
+        "Анализ корректен, ошибки нет",
+    ])
+    case = {
+        'difficulty': "Новичок",
+        'title': "Анализ конверсии email-кампании",
+        'description': (
+            f"**Ситуация**: Маркетолог анализирует эффективность email-кампании.\n\n"
+            f"**Данные**:\n"
+            f"- Отправлено писем: {sent:,}\n"
+            f"- Открыто писем: {opened:,} ({opened / sent:.0%})\n"
+            f"- Переходы на сайт: {clicked:,} ({clicked / opened:.0%} от открывших)\n"
+            f"- Покупки: {purchased:,} ({wrong_rate:.0%} от перешедших)\n\n"
+            f"**Вывод маркетолога**: \"Конверсия кампании составляет {wrong_rate:.0%}\""),
+        'chart_type': "funnel",
+        'chart_data': {'emails_sent': sent, 'opened': opened, 'clicked': clicked, 'purchased': purchased},
+        'options': options,
+        'correct': correct,
+        'explanation': (
+            f"**Правильный ответ**: Конверсия должна считаться от общего числа отправленных писем.\n\n"
+            f"**Объяснение**: Маркетолог считал конверсию от числа перешедших "
+            f"({purchased:,}/{clicked:,} = {wrong_rate:.0%}), но истинная конверсия кампании = "
+            f"покупки/отправленные письма = {purchased:,}/{sent:,} = {true_rate:.2%}.\n\n"
+            f"**Урок**: Всегда четко определяй базу для расчета конверсии!"),
+        'points': POINTS["Новичок"],
+    }
+    return case, (math.log10(sent), opened / sent, clicked / opened, wrong_rate)
+
+
+@register('simpsons', 'analysis')
+def generate_simpsons(rng: np.random.Generator):
+    """Два канала и два типа устройств: A лучше в каждом сегменте, но хуже в целом"""
+    while True:
+        impressions = int(pick(rng, (1, 2, 5, 10)) * 1000)
+        mobile_share = {'A': rng.uniform(0.65, 0.9), 'B': rng.uniform(0.1, 0.35)}
+        rate_b = {'desktop': rng.uniform(0.2, 0.6), 'mobile': rng.uniform(0.01, 0.08)}
+        uplift = rng.uniform(1.1, 1.5)
+        rate_a = {segment: min(rate * uplift, 0.95) for segment, rate in rate_b.items()}
+
+        counts = {}
+        for channel, rates in (('A', rate_a), ('B', rate_b)):
+            mobile = int(impressions * mobile_share[channel])
+            desktop = impressions - mobile
+            counts[channel] = {'desktop': (int(desktop * rates['desktop']), desktop),
+                               'mobile': (int(mobile * rates['mobile']), mobile)}
+        totals = {channel: sum(clicks for clicks, _ in segments.values()) / impressions
+                  for channel, segments in counts.items()}
+        segment_rates = {segment: {channel: counts[channel][segment][0] / max(counts[channel][segment][1], 1)
+                                   for channel in counts}
+                         for segment in ('desktop', 'mobile')}
+        paradox = totals['A'] < totals['B'] and all(rates['A'] > rates['B'] for rates in segment_rates.values())
+        if paradox:
+            break
+
+    def line(segment, channel):
+        clicks, shown = counts[channel][segment]
+        return f"{channel} = {clicks}/{shown} ({clicks / max(shown, 1):.1%})"
+
+    options, correct = shuffle_options(
+        rng, "Парадокс Симпсона: A лучше в каждой группе, но B лучше в целом из-за структуры трафика", [
+            "Канал B лучше - общий CTR выше",
+            "Каналы равноценны, разница случайна",
+            "Недостаточно данных для выводов",
+        ])
+    case = {
+        'difficulty': "Эксперт",
+        'title': "Парадокс Симпсона в рекламных каналах",
+        'description': (
+            f"**Ситуация**: Сравниваешь эффективность двух рекламных каналов.\n\n"
+            f"**Общие результаты**:\n"
+            f"- Канал A: {impressions:,} показов, CTR {totals['A']:.1%}\n"
+            f"- Канал B: {impressions:,} показов, CTR {totals['B']:.1%}\n\n"
+            f"**По устройствам**:\n"
+            f"- Desktop: {line('desktop', 'A')}, {line('desktop', 'B')}\n"
+            f"- Mobile: {line('mobile', 'A')}, {line('mobile', 'B')}\n\n"
+            f"**Вопрос**: Какой канал лучше?"),
+        'chart_type': "segments",
+        'chart_data': {
+            'total': {channel: round(rate, 3) for channel, rate in totals.items()},
+            **{segment: {channel: round(rate, 3) for channel, rate in rates.items()}
+               for segment, rates in segment_rates.items()},
+        },
+        'options': options,
+        'correct': correct,
+        'explanation': (
+            f"**Правильный ответ**: Парадокс Симпсона.\n\n"
+            f"**Объяснение**:\n"
+            f"- Канал A лучше на КАЖДОМ типе устройства\n"
+            f"- Но общий CTR канала A ниже из-за разного распределения трафика\n"
+            f"- A получает больше mobile-трафика с низким CTR "
+            f"({mobile_share['A']:.0%} против {mobile_share['B']:.0%})\n\n"
+            f"**Урок**: Всегда анализируй данные в разрезе сегментов!"),
+        'points': POINTS["Эксперт"],
+    }
+    return case, (math.log10(impressions), mobile_share['A'], mobile_share['B'],
+                  rate_b['desktop'], rate_b['mobile'], uplift - 1)
+
+
+@register('seasonal_correlation', 'analysis')
+def generate_seasonal_correlation(rng: np.random.Generator):
+    """Реклама и выручка растут вместе из-за общей сезонности (как correlation_causation)"""
+    months = int(pick(rng, (12, 24)))
+    peak = int(rng.integers(12))
+    season = np.sin(2 * np.pi * (np.arange(months) - peak + 3) / 12)
+    ad_amplitude, revenue_amplitude = rng.uniform(0.2, 0.5), rng.uniform(0.2, 0.5)
+    true_return = rng.uniform(0.0, 1.2)
+
+    while True:
+        ad_base = pick(rng, (10, 20, 50, 100)) * 1000
+        ad_spend = ad_base * (1 + ad_amplitude * season + rng.normal(0, 0.05, months))
+        revenue = (ad_base * rng.uniform(4, 8) * (1 + revenue_amplitude * season + rng.normal(0, 0.04, months))
+                   + true_return * ad_spend)
+        r = float(np.corrcoef(ad_spend, revenue)[0, 1])
+        if r >= 0.75:
+            break
+    slope = float(np.polyfit(ad_spend, revenue, 1)[0])
+
+    options, correct = shuffle_options(
+        rng, "Оба ряда следуют за сезонностью: корреляция не доказывает вклад рекламы, нужен эксперимент", [
+            f"ROI {slope:.1f}:1 отличный, можно увеличивать бюджет",
+            "Корреляция слабая, выводы делать рано",
+            "Нужно просто взять данные за больший период",
+        ])
+    case = {
+        'difficulty': "Аналитик",
+        'title': "Корреляция vs Причинность: сезонные продажи",
+        'description': (
+            f"**Ситуация**: Аналитик нашел сильную корреляцию между расходами на рекламу и продажами.\n\n"
+            f"**Данные за {months} месяцев**:\n"
+            f"- Корреляция между ad spend и revenue: r = {r:.2f}\n"
+            f"- При увеличении рекламы на $1000, revenue растет на ${slope * 1000:,.0f}\n\n"
+            f"**Вывод**: \"Каждый доллар рекламы приносит ${slope:.2f} дохода. Увеличиваем бюджет в 2 раза!\""),
+        'chart_type': "seasonal",
+        'chart_data': {
+            'months': list(range(1, months + 1)),
+            'ad_spend': [round(float(value)) for value in ad_spend],
+            'revenue': [round(float(value)) for value in revenue],
+        },
+        'options': options,
+        'correct': correct,
+        'explanation': (
+            f"**Правильный ответ**: Корреляция объясняется сезонностью.\n\n"
+            f"**Проблемы**:\n"
+            f"1. **Общая причина**: бюджет рекламы и спрос растут в одни и те же месяцы\n"
+            f"2. **Omitted variable bias**: наклон ${slope:.2f} на $1 включает эффект сезона\n"
+            f"3. **Reverse causality**: бюджет часто планируют под ожидаемые продажи\n\n"
+            f"**Скрытая информация**: в данных этого кейса реальный вклад рекламы - "
+            f"${true_return:.2f} на $1.\n\n"
+            f"**Правильно**: A/B тест или geo-эксперимент с контрольными регионами"),
+        'points': POINTS["Аналитик"],
+    }
+    return case, (months / 12, ad_amplitude, revenue_amplitude, true_return / 2, r)
+
+
+# Метрика: название, единица, диапазон базового значения, знак "хорошего" изменения
+CHERRY_METRICS = [
+    ("Engagement", '%', (15, 40), 1),
+    ("Time on page", ' сек', (40, 180), 1),
+    ("Положительные отзывы", '%', (55, 85), 1),
+    ("Sessions per user", '', (2, 6), 1),
+    ("Retention", '%', (30, 60), 1),
+    ("Conversion rate", '%', (1.5, 6), 1),
+    ("Revenue per user", ' $', (5, 40), 1),
+    ("Churn", '%', (3, 12), -1),
+    ("Обращения в поддержку", ' на 1000', (5, 30), -1),
+]
+
+
+@register('cherry_picking', 'analysis')
+def generate_cherry_picking(rng: np.random.Generator):
+    """Презентация только улучшившихся метрик (как cherry_picking)"""
+    indices = rng.permutation(len(CHERRY_METRICS))
+    shown_count = int(rng.integers(2, 4))
+    shown, hidden = sorted(indices[:shown_count]), sorted(indices[shown_count:shown_count + 2])
+    power_users = bool(rng.random() < 0.5)
+
+    def change(index, improve):
+        name, unit, (low, high), good = CHERRY_METRICS[index]
+        before = rng.uniform(low, high)
+        relative = rng.uniform(0.05, 0.3) * (1 if improve else -1) * good
+        after = before * (1 + relative)
+        digits = 1 if high < 10 else 0
+        return f"- {name}: {before:.{digits}f}{unit} → {after:.{digits}f}{unit}", relative
+
+    shown_lines, shown_changes = zip(*(change(index, True) for index in shown))
+    hidden_lines, hidden_changes = zip(*(change(index, False) for index in hidden))
+
+    options, correct = shuffle_options(rng, "Cherry-picking: показаны только положительные метрики", [
+        "Результаты отличные, feature успешен",
+        "Нужно больше времени для оценки",
+        "Тест проведен некорректно",
+    ])
+    hidden_info = "\n".join(hidden_lines) + ("\n- Тестировали только на power users" if power_users else "")
+    case = {
+        'difficulty': "Новичок",
+        'title': "Селективная подача данных",
+        'description': (
+            f"**Ситуация**: Менеджер продукта представляет результаты нового feature.\n\n"
+            f"**Презентация**:\n\"Наш новый feature показал отличные результаты:\n"
+            + "\n".join(shown_lines) + "\"\n\n"
+            f"**Скрытая информация**:\n{hidden_info}"),
+        'chart_data': None,
+        'options': options,
+        'correct': correct,
+        'explanation': (
+            "**Правильный ответ**: Cherry-picking данных.\n\n"
+            "**Проблема**: Показаны только метрики, которые улучшились, а ухудшившиеся "
+            f"({', '.join(CHERRY_METRICS[index][0] for index in hidden)}) скрыты.\n\n"
+            "**Урок**: Всегда требуй полную картину метрик, особенно северные звезды!"),
+        'points': POINTS["Новичок"],
+    }
+    features = [float(index in shown) - float(index in hidden) for index in range(len(CHERRY_METRICS))]
+    return case, features + [float(power_users), *(abs(value) for value in shown_changes + hidden_changes)]
+
+
+@register('survivorship', 'bias')
+def generate_survivorship(rng: np.random.Generator):
+    """Версия B собирает больше подписок, но они хуже удерживаются (как survivorship_bias)"""
+    shown = int(pick(rng, (1, 2, 5)) * 1000)
+    rate_a = rng.uniform(0.05, 0.15)
+    rate_b = rate_a * rng.uniform(1.3, 1.8)
+    retention_a = rng.uniform(0.75, 0.92)
+    retention_b = rng.uniform(0.4, 0.65)
+    subscribed = [int(shown * rate_a), int(shown * rate_b)]
+    active = [int(subscribed[0] * retention_a), int(subscribed[1] * retention_b)]
+    weeks = int(pick(rng, (1, 2, 3)))
+
+    case = {
+        'title': "Предвзятость выжившего в A/B тесте подписок",
+        'description': (
+            f"**Кейс**: Тестируем новую форму подписки на email.\n\n"
+            f"**Результаты через {weeks} нед.**:\n"
+            f"- Версия A: {shown:,} показов, {subscribed[0]:,} подписок ({subscribed[0] / shown:.0%})\n"
+            f"- Версия B: {shown:,} показов, {subscribed[1]:,} подписок ({subscribed[1] / shown:.0%})\n\n"
+            f"**Вывод**: \"Версия B лучше на {subscribed[1] / subscribed[0] - 1:.0%}! Внедряем!\""),
+        'bias_type': "survivorship",
+        'chart_type': "survivorship",
+        'chart_data': {'shown': [shown, shown], 'subscribed': subscribed, 'active_after_month': active},
+        'questions': ["Какую предвзятость ты видишь в этом анализе?", "Что еще нужно проверить?"],
+        'hints': ["Подумай о долгосрочной перспективе...", "Что происходит с подписчиками через месяц?"],
+        'revelation': (
+            f"**Скрытая информация**: Через месяц активных остались:\n"
+            f"- Версия A: {active[0]} из {subscribed[0]} ({active[0] / subscribed[0]:.0%} retention)\n"
+            f"- Версия B: {active[1]} из {subscribed[1]} ({active[1] / subscribed[1]:.0%} retention)\n\n"
+            f"**Вывод**: Версия B привлекает больше подписчиков, но они менее качественные!"),
+    }
+    return case, (math.log10(shown), rate_a, rate_b, retention_a, retention_b, weeks / 4)
+
+
+SELECTION_FILTERS = [
+    ("открывали письма в последние {days} дней", "активных читателей"),
+    ("совершили покупку за последние {days} дней", "недавних покупателей"),
+    ("заходили в приложение в последние {days} дней", "активных пользователей"),
+]
+
+
+@register('selection', 'bias')
+def generate_selection(rng: np.random.Generator):
+    """Тест на заранее отобранной активной аудитории (как selection_bias)"""
+    filter_index = int(rng.integers(len(SELECTION_FILTERS)))
+    condition, audience = SELECTION_FILTERS[filter_index]
+    days = int(pick(rng, (7, 14, 30, 60)))
+    before = rng.uniform(0.15, 0.3)
+    after = before + rng.uniform(0.05, 0.15)
+    selected_share = rng.uniform(0.1, 0.4)
+
+    case = {
+        'title': "Систематическая ошибка отбора",
+        'description': (
+            f"**Исследование**: Эффективность нового email-дизайна.\n\n"
+            f"**Методология**: Отправили новый дизайн подписчикам, которые {condition.format(days=days)} "
+            f"({selected_share:.0%} базы).\n\n"
+            f"**Результат**: Open rate увеличился с {before:.0%} до {after:.0%}!"),
+        'bias_type': "selection",
+        'questions': ["В чем проблема этого исследования?", "Как это влияет на выводы?"],
+        'hints': ["Подумай о выборке...", "Кого включили в тест?"],
+        'revelation': (
+            f"**Проблема**: Тестировали только на {audience} - это {selected_share:.0%} базы, "
+            f"которые и так открывают письма чаще остальных.\n\n"
+            f"**Правильно**: Случайная выборка из всей базы подписчиков и контрольная группа "
+            f"со старым дизайном."),
+    }
+    return case, (filter_index, days / 30, before, after, selected_share)
+
+
+# ===== ПАКЕТНАЯ ГЕНЕРАЦИЯ =====
+def family_seeds(name: str, seed: int, chunks: int) -> List[np.random.SeedSequence]:
+    """Независимые потоки случайных чисел: свой для каждого семейства и чанка"""
+    return np.random.SeedSequence([seed, zlib.crc32(name.encode('utf-8'))]).spawn(chunks)
+
+
+def generate_chunk(name: str, count: int, seed: np.random.SeedSequence,
+                   plugins: Sequence[str] = ()) -> List[Dict]:
+    """Один чанк семейства; выполняется в воркере"""
+    load_plugins(plugins)
+    family = FAMILIES[name]
+    rng = np.random.default_rng(seed)
+    cases = []
+    for _ in range(count):
+        case, features = family.generate(rng)
+        cases.append(finish_case(family, case, features))
+    return cases
+
+
+class GenerationResult(NamedTuple):
+    cases: List[Dict]
+    generated: Dict[str, int]
+    duplicates: Dict[str, int]
+
+
+def generate_cases(plan: Dict[str, int], seed: int = 0, workers: Optional[int] = None,
+                   chunk_size: int = CHUNK_SIZE, plugins: Sequence[str] = (),
+                   known: Iterable[str] = ()) -> GenerationResult:
+    """
+    Генерирует plan[семейство] кейсов каждого семейства в пуле процессов.
+
+    Чанки получают потоки случайных чисел по (seed, семейство, номер
+    чанка), так что результат не зависит от числа воркеров. Дубликаты по
+    отпечатку отсеиваются внутри пачки и относительно known.
+    """
+    load_plugins(plugins)
+    unknown = set(plan) - set(FAMILIES)
+    if unknown:
+        raise KeyError(f"Неизвестные семейства кейсов: {', '.join(sorted(unknown))}")
+
+    tasks = []
+    for name, count in plan.items():
+        sizes = split_chunks(count, chunk_size)
+        tasks += [(name, size, chunk_seed, tuple(plugins))
+                  for size, chunk_seed in zip(sizes, family_seeds(name, seed, len(sizes)))]
+
+    if workers == 1 or len(tasks) == 1:
+        chunks = [generate_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(generate_chunk, *zip(*tasks)))
+
+    seen: Set[str] = set(known)
+    cases = []
+    generated = dict.fromkeys(plan, 0)
+    duplicates = dict.fromkeys(plan, 0)
+    for chunk in chunks:
+        for case in chunk:
+            family = case['generated']['family']
+            digest = case['generated']['fingerprint']
+            generated[family] += 1
+            if digest in seen:
+                duplicates[family] += 1
+                continue
+            seen.add(digest)
+            cases.append(case)
+    return GenerationResult(cases, generated, duplicates)
+
+
+# ===== ЗАПИСЬ В ХРАНИЛИЩЕ =====
+def generated_path(cases_dir: Path, case_type: str) -> Path:
+    return Path(cases_dir) / f"{GENERATED_PREFIX}{case_type}.json"
+
+
+def known_fingerprints(cases_dir: Path) -> Set[str]:
+    """Отпечатки уже записанных сгенерированных кейсов"""
+    fingerprints = set()
+    for path in Path(cases_dir).glob(f"{GENERATED_PREFIX}*.json"):
+        for case in json.loads(path.read_text(encoding='utf-8')).get('cases', []):
+            if 'generated' in case:
+                fingerprints.add(case['generated']['fingerprint'])
+    return fingerprints
+
+
+def write_generated(cases_dir: Path, cases: List[Dict]) -> Dict[str, int]:
+    """
+    Дописывает кейсы в data/cases/generated_<тип>.json одной записью на
+    файл. Файл заменяется атомарно, поэтому наблюдатель ContentStore
+    видит одно изменение на пачку, а не на кейс.
+    """
+    by_type: Dict[str, List[Dict]] = {}
+    for case in cases:
+        by_type.setdefault(FAMILIES[case['generated']['family']].case_type, []).append(case)
+
+    written = {}
+    for case_type, new_cases in by_type.items():
+        path = generated_path(cases_dir, case_type)
+        existing = json.loads(path.read_text(encoding='utf-8'))['cases'] if path.exists() else []
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps({'type': case_type, 'cases': existing + new_cases},
+                                  ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+        written[path.name] = len(new_cases)
+    return written
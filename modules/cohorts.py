@@ -0,0 +1,108 @@
+"""Симулятор когорт подписчиков и кривые удержания Каплана-Мейера для кейсов с предвзятостью выжившего"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAX_WEEKS = 52
+VARIANTS = ('A', 'B')
+
+
+def calibrate_hazard(retention: float, weeks: float = 4, shape: float = 1.0) -> float:
+    """Отток за первую неделю, при котором к неделе weeks остается доля retention"""
+    retention = min(max(retention, 1e-6), 1 - 1e-6)
+    rate = -math.log(retention) / weeks ** shape
+    return 1 - math.exp(-rate)
+
+
+def sample_lifetimes(rng: np.random.Generator, n: int, hazard: float, shape: float) -> np.ndarray:
+    """
+    Недели до отписки (1, 2, ...) по дискретному распределению Вейбулла:
+    S(t) = exp(-rate * t^shape), где rate задан оттоком первой недели.
+    shape < 1 - отток затухает со временем, shape > 1 - нарастает.
+    """
+    rate = -math.log(1 - hazard)
+    u = 1 - rng.random(n)
+    lifetimes = np.ceil((-np.log(u) / rate) ** (1 / shape))
+    return np.clip(lifetimes, 1, 10 ** 6).astype(np.int64)
+
+
+def kaplan_meier(durations: np.ndarray, observed: np.ndarray, groups: np.ndarray,
+                 n_groups: int, weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Кривые Каплана-Мейера для n_groups групп сразу.
+
+    durations - неделя отписки или цензурирования, observed - была ли
+    отписка, groups - номер группы. Возвращает (survival, at_risk) формы
+    (n_groups, weeks + 1); survival[:, 0] = 1. Недели, где под риском никого
+    нет, заполняются NaN.
+    """
+    width = weeks + 2
+    index = groups * width + np.minimum(durations, weeks + 1)
+    events = np.bincount(index[observed], minlength=n_groups * width).reshape(n_groups, width)
+    exits = np.bincount(index, minlength=n_groups * width).reshape(n_groups, width)
+
+    # Под риском на неделе t - все, кто не выбыл до t
+    at_risk = exits[:, ::-1].cumsum(axis=1)[:, ::-1][:, :weeks + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = np.where(at_risk > 0, 1 - events[:, :weeks + 1] / at_risk, np.nan)
+    step[:, 0] = 1.0
+    survival = np.cumprod(step, axis=1)
+    return survival, at_risk
+
+
+def simulate_retention(subscribed: Sequence[int], hazards: Sequence[float], shapes: Sequence[float],
+                       cohorts: int = 8, weeks: int = MAX_WEEKS, seed: int = 42) -> Dict:
+    """
+    Симулирует подписчиков вариантов A и B, пришедших равными недельными
+    когортами, и оценивает удержание по всем когортам сразу.
+
+    Когорта c пришла на неделе c и к моменту анализа (неделя weeks)
+    наблюдалась weeks - c недель; более поздняя отписка цензурируется.
+    Кривые считаются сразу на весь горизонт, так что смена горизонта -
+    это срез готовых массивов, а не пересчет.
+    """
+    rng = np.random.default_rng(seed)
+    survival, at_risk, cohort_survival = [], [], []
+    for n, hazard, shape in zip(subscribed, hazards, shapes):
+        lifetimes = sample_lifetimes(rng, n, hazard, shape)
+        cohort = np.arange(n) % cohorts
+        window = weeks - cohort
+        observed = lifetimes <= window
+        durations = np.minimum(lifetimes, window)
+
+        pooled, pooled_at_risk = kaplan_meier(durations, observed, np.zeros(n, dtype=np.int64), 1, weeks)
+        by_cohort, _ = kaplan_meier(durations, observed, cohort, cohorts, weeks)
+        survival.append(pooled[0])
+        at_risk.append(pooled_at_risk[0])
+        cohort_survival.append(by_cohort)
+
+    survival = np.array(survival)
+    active = np.array(subscribed)[:, None] * survival
+    return {
+        'weeks': weeks,
+        'subscribed': tuple(subscribed),
+        'survival': survival,
+        'at_risk': np.array(at_risk),
+        'cohort_survival': np.array(cohort_survival),
+        'active': active,
+        'flip_weeks': flip_weeks(active),
+    }
+
+
+def flip_weeks(active: np.ndarray) -> List[int]:
+    """Недели, на которых меняется лидер по числу активных подписчиков"""
+    leader = np.sign(active[1] - active[0])
+    valid = ~np.isnan(leader)
+    weeks = np.flatnonzero(valid)
+    leader = leader[valid]
+    changes = np.flatnonzero((leader[1:] != leader[:-1]) & (leader[1:] != 0))
+    return [int(weeks[change + 1]) for change in changes]
+
+
+def winner_at(result: Dict, horizon: int) -> Optional[str]:
+    """Вариант с большим числом активных подписчиков на горизонте или None при ничьей"""
+    active_a, active_b = result['active'][:, horizon]
+    if np.isnan(active_a) or np.isnan(active_b) or round(active_a) == round(active_b):
+        return None
+    return VARIANTS[int(active_b > active_a)]
@@ -0,0 +1,235 @@
+"""Контент игры (кейсы, подсказки, достижения) из файлов data/ с горячей перезагрузкой"""
+import hashlib
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+CASE_TYPES = ('analysis', 'scenario', 'bias', 'dataset')
+DIFFICULTIES = ('Новичок', 'Аналитик', 'Эксперт')
+POLL_INTERVAL = 1.0
+
+REQUIRED_FIELDS = {
+    'analysis': ('id', 'difficulty', 'title', 'description', 'options', 'correct', 'explanation', 'points'),
+    'scenario': ('id', 'title', 'description', 'steps'),
+    'bias': ('id', 'title', 'description', 'bias_type', 'questions', 'hints', 'revelation'),
+    'dataset': ('id', 'difficulty', 'title', 'description', 'dataset', 'options', 'correct', 'explanation', 'points'),
+}
+
+
+class ContentError(ValueError):
+    """Ошибка в файле контента"""
+
+
+# ===== ВАЛИДАЦИЯ =====
+def validate_case(case: Dict, case_type: str):
+    """Проверяет схему кейса; при ошибке бросает ContentError"""
+    case_id = case.get('id', '<без id>')
+    missing = [field for field in REQUIRED_FIELDS[case_type] if field not in case]
+    if missing:
+        raise ContentError(f"Кейс {case_id}: нет полей {', '.join(missing)}")
+
+    if 'difficulty' in REQUIRED_FIELDS[case_type] and case['difficulty'] not in DIFFICULTIES:
+        raise ContentError(f"Кейс {case_id}: неизвестная сложность {case['difficulty']!r}")
+
+    if 'options' in case and not 0 <= case.get('correct', -1) < len(case['options']):
+        raise ContentError(f"Кейс {case_id}: индекс правильного ответа вне списка вариантов")
+
+    for number, step in enumerate(case.get('steps', []), start=1):
+        if not {'text', 'options', 'correct', 'feedback'} <= step.keys():
+            raise ContentError(f"Сценарий {case_id}, шаг {number}: нужны text, options, correct, feedback")
+        if not 0 <= step['correct'] < len(step['options']):
+            raise ContentError(f"Сценарий {case_id}, шаг {number}: индекс правильного ответа вне списка")
+        if set(step['feedback']) != set(range(len(step['options']))):
+            raise ContentError(f"Сценарий {case_id}, шаг {number}: обратная связь нужна для каждого варианта")
+
+
+def case_hash(case: Dict) -> str:
+    """Хэш содержимого кейса для инвалидации кэшей"""
+    payload = json.dumps(case, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def parse_cases_file(path: Path) -> List[Dict]:
+    """Читает и валидирует файл кейсов {"type": ..., "cases": [...]}"""
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except json.JSONDecodeError as error:
+        raise ContentError(f"{path.name}: некорректный JSON ({error})") from error
+
+    case_type = data.get('type')
+    if case_type not in CASE_TYPES:
+        raise ContentError(f"{path.name}: неизвестный тип кейсов {case_type!r}")
+
+    cases = []
+    for case in data.get('cases', []):
+        case = {'type': case_type, **case}
+        # В JSON ключи обратной связи - строки, в игре - номера вариантов
+        for step in case.get('steps', []):
+            step['feedback'] = {int(key): value for key, value in step.get('feedback', {}).items()}
+        validate_case(case, case_type)
+        cases.append(case)
+    return cases
+
+
+# ===== СНИМОК КОНТЕНТА =====
+class ContentSnapshot:
+    """Неизменяемый снимок контента; сессия держит свой снимок до следующего кейса"""
+
+    def __init__(self, version: int, cases: Dict[str, Dict], hints: Dict, achievements: List[Dict],
+                 hashes: Dict[str, str]):
+        self.version = version
+        self.cases = cases
+        self.hints = hints.get('cases', {})
+        self.default_hint = hints.get('default', '')
+        self.achievements = achievements
+        self.hashes = hashes
+        self.pools, self.pools_of = build_pools(cases)
+
+    def family(self, case_type: str) -> List[Dict]:
+        """Кейсы одного типа в порядке файлов"""
+        return [case for case in self.cases.values() if case['type'] == case_type]
+
+    def hint(self, case_id: str) -> str:
+        return self.hints.get(case_id, self.default_hint)
+
+
+def build_pools(cases: Dict[str, Dict]):
+    """Пулы планировщика: 'all' и 'analysis:<сложность>' в перемешанном порядке"""
+    pools_of = {}
+    for case_id, case in cases.items():
+        pools_of[case_id] = ('all',)
+        if case['type'] == 'analysis':
+            pools_of[case_id] += (f"analysis:{case['difficulty']}",)
+
+    pools = {}
+    for case_id in random.Random(0).sample(list(cases), len(cases)):
+        for pool in pools_of[case_id]:
+            pools.setdefault(pool, []).append(case_id)
+    return {pool: tuple(ids) for pool, ids in pools.items()}, pools_of
+
+
+# ===== ХРАНИЛИЩЕ С ГОРЯЧЕЙ ПЕРЕЗАГРУЗКОЙ =====
+class ContentStore:
+    """
+    Следит за файлами data/cases/*.json, data/hints.json и data/achievements.json.
+
+    Измененный файл перечитывается и валидируется отдельно; если он
+    некорректен, остается его прошлая версия, а ошибка сохраняется в errors.
+    Слушатели получают только id измененных и удаленных кейсов.
+    """
+
+    def __init__(self, root: str, poll_interval: float = POLL_INTERVAL):
+        self.root = Path(root)
+        self.poll_interval = poll_interval
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable] = []
+        self._mtimes: Dict[Path, int] = {}
+        self._file_cases: Dict[Path, List[Dict]] = {}
+        self._file_hashes: Dict[Path, Dict[str, str]] = {}
+        self._hints: Dict = {}
+        self._achievements: List[Dict] = []
+        self._watcher: Optional[threading.Thread] = None
+        self.snapshot: Optional[ContentSnapshot] = None
+
+        self.check_for_changes(strict=True)
+
+    def _watched_files(self) -> List[Path]:
+        files = sorted((self.root / 'cases').glob('*.json'))
+        return files + [path for path in (self.root / 'hints.json', self.root / 'achievements.json') if path.exists()]
+
+    def add_listener(self, listener: Callable[[ContentSnapshot, Set[str], Set[str]], None]):
+        """listener(snapshot, changed_ids, removed_ids) вызывается после каждой перезагрузки"""
+        self._listeners.append(listener)
+
+    def check_for_changes(self, strict: bool = False) -> bool:
+        """Перечитывает измененные файлы; возвращает True, если вышел новый снимок"""
+        with self._lock:
+            files = self._watched_files()
+            changed_files = [path for path in files if self._mtimes.get(path) != path.stat().st_mtime_ns]
+            deleted_files = [path for path in self._mtimes if path not in files]
+            if not changed_files and not deleted_files:
+                return False
+
+            hints_before = self._hints
+            for path in deleted_files:
+                del self._mtimes[path]
+                self._file_cases.pop(path, None)
+                self._file_hashes.pop(path, None)
+                self.errors.pop(path.name, None)
+
+            for path in changed_files:
+                self._mtimes[path] = path.stat().st_mtime_ns
+                try:
+                    self._load_file(path)
+                    self.errors.pop(path.name, None)
+                except (ContentError, OSError, json.JSONDecodeError) as error:
+                    if strict:
+                        raise
+                    self.errors[path.name] = str(error)
+
+            snapshot, changed, removed = self._build_snapshot(hints_before)
+            self.snapshot = snapshot
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(snapshot, changed, removed)
+        return True
+
+    def _load_file(self, path: Path):
+        if path.name == 'hints.json':
+            self._hints = json.loads(path.read_text(encoding='utf-8'))
+        elif path.name == 'achievements.json':
+            achievements = json.loads(path.read_text(encoding='utf-8'))
+            for achievement in achievements:
+                if not {'title', 'metric', 'threshold', 'message'} <= achievement.keys():
+                    raise ContentError(f"{path.name}: у достижения нужны title, metric, threshold, message")
+            self._achievements = achievements
+        else:
+            cases = parse_cases_file(path)
+            other_ids = {case['id'] for other, file_cases in self._file_cases.items()
+                         if other != path for case in file_cases}
+            duplicates = [case['id'] for case in cases if case['id'] in other_ids]
+            if duplicates:
+                raise ContentError(f"{path.name}: id уже заняты другими файлами: {', '.join(duplicates)}")
+            self._file_cases[path] = cases
+            self._file_hashes[path] = {case['id']: case_hash(case) for case in cases}
+
+    def _build_snapshot(self, hints_before: Dict):
+        previous = self.snapshot
+        cases, hashes = {}, {}
+        for path in sorted(self._file_cases):
+            for case in self._file_cases[path]:
+                cases[case['id']] = case
+            hashes.update(self._file_hashes[path])
+
+        old_hashes = previous.hashes if previous else {}
+        changed = {case_id for case_id, digest in hashes.items() if old_hashes.get(case_id) != digest}
+        removed = set(old_hashes) - set(hashes)
+
+        old_hints, new_hints = hints_before.get('cases', {}), self._hints.get('cases', {})
+        changed |= {case_id for case_id in set(old_hints) | set(new_hints)
+                    if old_hints.get(case_id) != new_hints.get(case_id) and case_id in cases}
+
+        version = previous.version + 1 if previous else 1
+        snapshot = ContentSnapshot(version, cases, self._hints, self._achievements, hashes)
+        return snapshot, changed, removed
+
+    def start_watcher(self):
+        """Запускает фоновый поток, опрашивающий файлы контента"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    self.check_for_changes()
+                except Exception as error:  # поток наблюдателя не должен падать
+                    self.errors['watcher'] = str(error)
+
+        self._watcher = threading.Thread(target=watch, name='content-watcher', daemon=True)
+        self._watcher.start()
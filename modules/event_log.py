@@ -0,0 +1,247 @@
+"""Кейсы на сырых данных: колоночные журналы событий в memory-mapped .npy"""
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+CHUNK_ROWS = 2_000_000
+CACHE_SIZE = 256
+
+
+# ===== ГЕНЕРАЦИЯ ЖУРНАЛА =====
+def generate_channel_mix_log(path: str, n_rows: int, seed: int = 7,
+                             chunk_rows: int = CHUNK_ROWS) -> Path:
+    """
+    Генерирует журнал визитов, где рост конверсии объясняется сменой
+    структуры трафика (email-рассылка по лояльным пользователям), а не лендингом.
+
+    Колонки пишутся чанками напрямую в .npy через memmap, поэтому память
+    при генерации не зависит от n_rows.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    channels = ['organic', 'paid', 'email', 'social']
+    segments = ['new', 'returning']
+    devices = ['desktop', 'mobile']
+    n_days, launch_day = 60, 30
+
+    # Доля каналов до и после запуска лендинга
+    channel_mix = np.array([[0.45, 0.35, 0.10, 0.10],
+                            [0.35, 0.25, 0.30, 0.10]])
+    returning_share = np.array([0.30, 0.30, 0.85, 0.30])
+    # Базовая конверсия: канал x сегмент
+    base_rate = np.array([[0.025, 0.040],
+                          [0.020, 0.035],
+                          [0.040, 0.090],
+                          [0.010, 0.020]])
+    device_factor = np.array([1.0, 0.8])
+    launch_factor = 0.97  # Внутри сегментов лендинг даже немного хуже
+
+    columns = {
+        'day': np.lib.format.open_memmap(path / 'day.npy', mode='w+', dtype=np.int16, shape=(n_rows,)),
+        'channel': np.lib.format.open_memmap(path / 'channel.npy', mode='w+', dtype=np.int8, shape=(n_rows,)),
+        'segment': np.lib.format.open_memmap(path / 'segment.npy', mode='w+', dtype=np.int8, shape=(n_rows,)),
+        'device': np.lib.format.open_memmap(path / 'device.npy', mode='w+', dtype=np.int8, shape=(n_rows,)),
+        'converted': np.lib.format.open_memmap(path / 'converted.npy', mode='w+', dtype=np.int8, shape=(n_rows,)),
+    }
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        size = min(chunk_rows, n_rows - start)
+        day = np.sort(rng.integers(0, n_days, size=size)).astype(np.int16)
+        after = (day >= launch_day).astype(np.int8)
+
+        cum_mix = np.cumsum(channel_mix, axis=1)[after]
+        channel = (rng.random(size)[:, None] > cum_mix).sum(axis=1).astype(np.int8)
+        segment = (rng.random(size) < returning_share[channel]).astype(np.int8)
+        device = (rng.random(size) < 0.6).astype(np.int8)
+
+        rate = base_rate[channel, segment] * device_factor[device]
+        rate = np.where(after == 1, rate * launch_factor, rate)
+        converted = (rng.random(size) < rate).astype(np.int8)
+
+        chunk = slice(start, start + size)
+        columns['day'][chunk] = day
+        columns['channel'][chunk] = channel
+        columns['segment'][chunk] = segment
+        columns['device'][chunk] = device
+        columns['converted'][chunk] = converted
+
+    for column in columns.values():
+        column.flush()
+
+    schema = {
+        'rows': n_rows,
+        'generator': 'channel_mix',
+        'seed': seed,
+        'columns': {
+            'day': {'kind': 'int', 'min': 0, 'max': n_days - 1},
+            'channel': {'kind': 'category', 'categories': channels},
+            'segment': {'kind': 'category', 'categories': segments},
+            'device': {'kind': 'category', 'categories': devices},
+            'converted': {'kind': 'measure'},
+        },
+    }
+    # Схема пишется последней: ее наличие означает, что журнал готов
+    (path / SCHEMA_FILE).write_text(json.dumps(schema, ensure_ascii=False, indent=2), encoding='utf-8')
+    return path
+
+
+GENERATORS = {
+    'channel_mix': generate_channel_mix_log,
+}
+
+
+def ensure_event_log(path: str, generator: str, n_rows: int, seed: int) -> Path:
+    """Генерирует журнал, если на диске нет журнала с тем же генератором, числом строк и seed"""
+    path = Path(path)
+    schema_path = path / SCHEMA_FILE
+    if schema_path.exists():
+        schema = json.loads(schema_path.read_text(encoding='utf-8'))
+        if (schema['rows'], schema.get('generator'), schema.get('seed')) == (n_rows, generator, seed):
+            return path
+    return GENERATORS[generator](path, n_rows, seed=seed)
+
+
+# ===== ЧТЕНИЕ И АГРЕГАЦИИ =====
+class AggregationCache:
+    """Потокобезопасный LRU-кэш агрегатов, общий для всех сессий процесса"""
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+shared_cache = AggregationCache()
+
+
+class EventLog:
+    """Журнал событий, открытый через memmap: в память читаются только нужные колонки и чанки"""
+
+    def __init__(self, path: str, cache: Optional[AggregationCache] = None):
+        self.path = Path(path)
+        self.schema = json.loads((self.path / SCHEMA_FILE).read_text(encoding='utf-8'))
+        self.n_rows = self.schema['rows']
+        self.cache = shared_cache if cache is None else cache
+        self._version = (self.path / SCHEMA_FILE).stat().st_mtime_ns
+        self._columns = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """Ленивое открытие колонки в режиме memmap"""
+        if name not in self._columns:
+            self._columns[name] = np.load(self.path / f'{name}.npy', mmap_mode='r')
+        return self._columns[name]
+
+    @property
+    def dimensions(self) -> List[str]:
+        return [name for name, spec in self.schema['columns'].items() if spec['kind'] != 'measure']
+
+    def labels(self, name: str) -> List:
+        """Подписи значений измерения"""
+        spec = self.schema['columns'][name]
+        if spec['kind'] == 'category':
+            return spec['categories']
+        return list(range(spec['min'], spec['max'] + 1))
+
+    def _codes(self, name: str, values: np.ndarray) -> np.ndarray:
+        """Переводит значения колонки в коды 0..cardinality-1"""
+        spec = self.schema['columns'][name]
+        if spec['kind'] == 'int' and spec['min']:
+            return values.astype(np.int64) - spec['min']
+        return values.astype(np.int64)
+
+    def _mask(self, filters: Dict, chunk: slice) -> Optional[np.ndarray]:
+        """Векторизованная маска фильтров для чанка строк"""
+        mask = None
+        for name, condition in filters.items():
+            spec = self.schema['columns'][name]
+            values = self.column(name)[chunk]
+            if spec['kind'] == 'category':
+                allowed = np.zeros(len(spec['categories']), dtype=bool)
+                allowed[[spec['categories'].index(value) for value in condition]] = True
+                part = allowed[values]
+            else:
+                low, high = condition
+                part = (values >= low) & (values <= high)
+            mask = part if mask is None else mask & part
+        return mask
+
+    def aggregate(self, group_by: List[str], filters: Optional[Dict] = None,
+                  measure: str = 'converted', chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+        """
+        Group-by с фильтрами: число событий, сумма и среднее меры по группам.
+
+        Группы кодируются одним целым ключом и считаются через np.bincount
+        по чанкам, так что в памяти одновременно только один чанк колонок.
+        """
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        key = (str(self.path), self._version, tuple(group_by), measure,
+               tuple(sorted((name, tuple(value)) for name, value in filters.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.copy()
+
+        cardinalities = [len(self.labels(name)) for name in group_by]
+        n_groups = int(np.prod(cardinalities)) if group_by else 1
+        events = np.zeros(n_groups, dtype=np.int64)
+        totals = np.zeros(n_groups, dtype=np.int64)
+
+        for start in range(0, self.n_rows, chunk_rows):
+            chunk = slice(start, min(start + chunk_rows, self.n_rows))
+            mask = self._mask(filters, chunk)
+
+            group_key = np.zeros(chunk.stop - chunk.start, dtype=np.int64)
+            for name, cardinality in zip(group_by, cardinalities):
+                group_key = group_key * cardinality + self._codes(name, self.column(name)[chunk])
+
+            values = self.column(measure)[chunk]
+            if mask is not None:
+                group_key = group_key[mask]
+                values = values[mask]
+
+            events += np.bincount(group_key, minlength=n_groups)
+            totals += np.bincount(group_key, weights=values, minlength=n_groups).astype(np.int64)
+
+        if group_by:
+            index = pd.MultiIndex.from_product([self.labels(name) for name in group_by], names=group_by)
+            result = pd.DataFrame({'events': events, measure: totals}, index=index).reset_index()
+        else:
+            result = pd.DataFrame({'events': events, measure: totals})
+        result = result[result['events'] > 0].reset_index(drop=True)
+        result['rate'] = result[measure] / result['events']
+
+        self.cache.put(key, result)
+        return result.copy()
+
+
+def parse_day_range(day_range: Tuple[int, int], schema_column: Dict) -> Optional[Tuple[int, int]]:
+    """Возвращает None, если диапазон дней покрывает весь журнал"""
+    low, high = day_range
+    if low <= schema_column['min'] and high >= schema_column['max']:
+        return None
+    return int(low), int(high)
@@ -0,0 +1,317 @@
+"""Шина игровых событий процесса: подписчики со своими очередями, пачками и политикой переполнения"""
+import heapq
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Collection, Dict, List, NamedTuple, Optional, Tuple
+
+SNAPSHOT_INTERVAL = 2.0
+QUEUE_CAPACITY = 10_000
+BLOCK_TIMEOUT = 0.05
+STATS_WINDOW = 60.0
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class GameEvent(NamedTuple):
+    """
+    Событие игры. kind - ответ ('analysis_answer', 'scenario_step',
+    'bias_answer'), начисление очков ('award') или сброс серии
+    ('streak_reset'); choice - номер варианта (для раскрытия предвзятости
+    -1), step и steps - номер шага и число шагов сценария, points -
+    начисленные очки.
+    """
+    ts: float
+    kind: str
+    player: str
+    case_id: Optional[str]
+    correct: bool
+    choice: int = -1
+    step: int = 0
+    steps: int = 0
+    points: int = 0
+
+
+# ===== ПОДПИСЧИКИ =====
+class ConsumerStats(NamedTuple):
+    """Срез состояния подписчика для панелей наблюдения"""
+    name: str
+    mode: str
+    queued: int
+    processed: int
+    dropped: int
+    batches: int
+    errors: int
+    lag_seconds: float
+    delay_ms: float
+    throughput: float
+
+
+class Consumer:
+    """
+    Подписчик шины. handler получает список событий.
+
+    Синхронный подписчик (sync=True) вызывается прямо в потоке публикации -
+    так обновляется состояние, которого ждет интерфейс. Асинхронный
+    получает события через свою ограниченную очередь и свой поток: событие
+    ждет в очереди, пока не наберется batch_size событий или не пройдет
+    max_delay секунд с первого из них. При переполнении очереди
+    overflow='drop_oldest' вытесняет самое старое событие, 'drop_newest'
+    отбрасывает новое, а 'block' ждет места до block_timeout и только
+    потом отбрасывает - публикующий поток никогда не ждет дольше.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[GameEvent]], None],
+                 kinds: Optional[Collection[str]] = None, sync: bool = False, batch_size: int = 1,
+                 max_delay: float = 0.0, capacity: int = QUEUE_CAPACITY, overflow: str = 'drop_oldest',
+                 block_timeout: float = BLOCK_TIMEOUT):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения {overflow!r}")
+        self.name = name
+        self.handler = handler
+        self.kinds = frozenset(kinds) if kinds is not None else None
+        self.sync = sync
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.capacity = capacity
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.last_error: Optional[str] = None
+
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+        self._processed = self._dropped = self._batches = self._errors = 0
+        self._delay = 0.0
+        self._window: deque = deque()
+
+    def accepts(self, kind: str) -> bool:
+        return self.kinds is None or kind in self.kinds
+
+    def start(self):
+        if self.sync or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"events-{self.name}", daemon=True)
+        self._thread.start()
+
+    def offer(self, event: GameEvent) -> bool:
+        """Передает событие подписчику; False, если событие отброшено"""
+        if self.sync:
+            self._handle([event])
+            return True
+        with self._cond:
+            if len(self._queue) >= self.capacity:
+                if self.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self._dropped += 1
+                elif self.overflow == 'block':
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.capacity and time.monotonic() < deadline:
+                        self._cond.wait(deadline - time.monotonic())
+                if len(self._queue) >= self.capacity:
+                    self._dropped += 1
+                    return False
+            self._queue.append((time.monotonic(), event))
+            self._cond.notify_all()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                # Копим пачку, пока первое событие не прождет max_delay
+                deadline = self._queue[0][0] + self.max_delay
+                while len(self._queue) < self.batch_size and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft()[1] for _ in range(min(self.batch_size, len(self._queue)))]
+                self._cond.notify_all()
+            self._handle(batch)
+
+    def _handle(self, batch: List[GameEvent]):
+        try:
+            self.handler(batch)
+        except Exception as error:  # подписчик не должен ломать ход игры и соседей
+            self._errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+        now = time.monotonic()
+        with self._cond:
+            self._processed += len(batch)
+            self._batches += 1
+            self._delay = time.time() - batch[-1].ts
+            self._window.append((now, len(batch)))
+
+    def stats(self) -> ConsumerStats:
+        now = time.monotonic()
+        with self._cond:
+            while self._window and now - self._window[0][0] > STATS_WINDOW:
+                self._window.popleft()
+            recent = sum(count for _, count in self._window)
+            span = min(STATS_WINDOW, now - self._window[0][0]) if self._window else 0.0
+            return ConsumerStats(
+                name=self.name,
+                mode='sync' if self.sync else f"async/{self.overflow}",
+                queued=len(self._queue),
+                processed=self._processed,
+                dropped=self._dropped,
+                batches=self._batches,
+                errors=self._errors,
+                lag_seconds=now - self._queue[0][0] if self._queue else 0.0,
+                delay_ms=self._delay * 1000,
+                throughput=recent / span if span > 0 else float(recent),
+            )
+
+    def close(self, timeout: float = 1.0):
+        """Дорабатывает очередь и останавливает поток"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+# ===== ШИНА =====
+class EventBus:
+    """
+    Публикация событий всем подписчикам процесса.
+
+    publish() ждет только синхронных подписчиков; асинхронные получают
+    событие в свою очередь и обрабатывают его в своем темпе, не задерживая
+    ни публикацию, ни друг друга.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._consumers: List[Consumer] = []
+
+    def add_consumer(self, consumer: Consumer) -> Consumer:
+        consumer.start()
+        with self._lock:
+            self._consumers = self._consumers + [consumer]
+        return consumer
+
+    def subscribe(self, subscriber: Callable[[GameEvent], None], name: Optional[str] = None):
+        """Синхронный подписчик на каждое событие"""
+        name = name or getattr(subscriber, '__qualname__', repr(subscriber))
+        return self.add_consumer(Consumer(name, lambda batch: subscriber(batch[0]), sync=True))
+
+    def publish(self, event: GameEvent):
+        for consumer in self._consumers:
+            if consumer.accepts(event.kind):
+                consumer.offer(event)
+
+    def stats(self) -> List[ConsumerStats]:
+        return [consumer.stats() for consumer in self._consumers]
+
+    def close(self, timeout: float = 1.0):
+        for consumer in self._consumers:
+            consumer.close(timeout)
+
+
+# ===== ЖИВЫЕ АГРЕГАТЫ =====
+class LiveSnapshot(NamedTuple):
+    """Неизменяемый срез агрегатов, который читают панели ведущего"""
+    version: int
+    built_at: float
+    answers: Dict[str, Dict[int, int]]
+    correct: Dict[str, Tuple[int, int]]
+    scenario_steps: Dict[str, List[Dict[str, int]]]
+    top_players: List[Tuple[str, int]]
+    players: int
+    events: int
+
+
+class LiveAggregates:
+    """
+    Агрегаты ответов, обновляемые за O(1) на событие.
+
+    Счетчики меняются под одной блокировкой на пачку событий; панели читают
+    только последний срез, который пересобирается не чаще раза в interval
+    секунд и только если после прошлого среза пришли события.
+    """
+
+    def __init__(self, interval: float = SNAPSHOT_INTERVAL, top: int = 10):
+        self.interval = interval
+        self.top = top
+        self._lock = threading.Lock()
+        self._version = 0
+        self._answers: Dict[str, Counter] = {}
+        self._correct: Counter = Counter()
+        self._total: Counter = Counter()
+        # (сценарий, шаг) -> [сейчас на шаге, ответили, ошиблись]
+        self._steps: Dict[Tuple[str, int], List[int]] = {}
+        self._steps_count: Dict[str, int] = {}
+        self._position: Dict[Tuple[str, str], int] = {}
+        self._scores: Counter = Counter()
+        self._snapshot = self._build()
+
+    def __call__(self, events: List[GameEvent]):
+        """Учитывает пачку ответов под одной блокировкой"""
+        with self._lock:
+            for event in events:
+                self._apply(event)
+
+    def _apply(self, event: GameEvent):
+        self._version += 1
+        self._scores[event.player] += event.points
+        self._total[event.case_id] += 1
+        self._correct[event.case_id] += event.correct
+        self._answers.setdefault(event.case_id, Counter())[event.choice] += 1
+        if event.kind == 'scenario_step':
+            self._on_step(event)
+
+    def _on_step(self, event: GameEvent):
+        self._steps_count[event.case_id] = event.steps
+        key = (event.case_id, event.player)
+        previous = self._position.get(key)
+        if previous is not None:
+            self._step(event.case_id, previous)[0] -= 1
+
+        counters = self._step(event.case_id, event.step)
+        counters[1] += 1
+        counters[2] += not event.correct
+
+        if event.step + 1 < event.steps:
+            self._position[key] = event.step + 1
+            self._step(event.case_id, event.step + 1)[0] += 1
+        else:
+            self._position.pop(key, None)
+
+    def _step(self, scenario_id: str, step: int) -> List[int]:
+        return self._steps.setdefault((scenario_id, step), [0, 0, 0])
+
+    def _build(self) -> LiveSnapshot:
+        steps = {}
+        for scenario_id, count in self._steps_count.items():
+            steps[scenario_id] = [dict(zip(('waiting', 'answered', 'wrong'), self._step(scenario_id, step)))
+                                  for step in range(count)]
+        return LiveSnapshot(
+            version=self._version,
+            built_at=time.time(),
+            answers={case_id: dict(counter) for case_id, counter in self._answers.items()},
+            correct={case_id: (self._correct[case_id], total) for case_id, total in self._total.items()},
+            scenario_steps=steps,
+            top_players=heapq.nlargest(self.top, self._scores.items(), key=lambda item: item[1]),
+            players=len(self._scores),
+            events=sum(self._total.values()),
+        )
+
+    def snapshot(self) -> LiveSnapshot:
+        """Последний срез; пересобирается, только если он старше interval и есть новые события"""
+        snapshot = self._snapshot
+        if snapshot.version != self._version and time.time() - snapshot.built_at >= self.interval:
+            with self._lock:
+                if self._snapshot is snapshot:
+                    self._snapshot = self._build()
+            snapshot = self._snapshot
+        return snapshot
+
+
+def stuck_share(step: Dict[str, int]) -> Optional[float]:
+    """Доля ошибившихся на шаге сценария или None, если ответов нет"""
+    return step['wrong'] / step['answered'] if step['answered'] else None
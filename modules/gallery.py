@@ -0,0 +1,185 @@
+"""
+Миниатюры графиков для галереи кейсов.
+
+Миниатюра - тот же график кейса без подписей: она не зависит от языка
+и от текстов кейса, поэтому ключ - хэш chart_type и chart_data, и
+одинаковые графики делят один файл. Файлы (WebP, если Pillow его
+поддерживает, иначе PNG) лежат в общем каталоге: их видят все сессии и
+процессы, и они переживают перезапуск. Недостающие миниатюры рисует
+пул процессов, не задерживая rerun; каталог можно заполнить заранее
+(tools/render_thumbnails.py).
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import matplotlib.pyplot as plt
+from PIL import features
+
+from modules.visualizations import CHART_BUILDERS, build_case_figure
+
+THUMBNAIL_FIGSIZE = (3.2, 2.0)
+THUMBNAIL_DPI = 50
+THUMBNAIL_FORMAT = 'webp' if features.check('webp') else 'png'
+THUMBNAIL_SAVE_OPTIONS = {'webp': {'quality': 80, 'method': 6}, 'png': {'optimize': True}}
+# Воркеры отрисовки уступают процессор интерфейсу
+WORKER_NICENESS = 10
+# fork из многопоточного сервера может унаследовать захваченную другим потоком
+# блокировку и зависнуть; воркеры стартуют от чистого процесса-сервера
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+PAGE_SIZE = 12
+GALLERY_COLUMNS = 4
+
+
+# ===== ОТРИСОВКА =====
+def thumbnail_key(case: Dict) -> Optional[str]:
+    """Ключ миниатюры по данным графика или None, если у кейса нет графика, который умеем рисовать"""
+    if case.get('chart_type') not in CHART_BUILDERS or not case.get('chart_data'):
+        return None
+    payload = json.dumps([case['chart_type'], case['chart_data']], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def strip_text(fig):
+    """Убирает с фигуры заголовки, подписи, аннотации, легенды и деления"""
+    for ax in fig.axes:
+        ax.set_title('')
+        ax.set_xlabel('')
+        ax.set_ylabel('')
+        for text in list(ax.texts):
+            text.remove()
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+        ax.set_xticks([])
+        ax.set_yticks([])
+    fig.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=0.98, wspace=0.1)
+
+
+def render_thumbnail(chart: Dict, fmt: str = THUMBNAIL_FORMAT) -> Optional[bytes]:
+    """Миниатюра графика; chart - кейс или только его chart_type и chart_data"""
+    fig = build_case_figure(chart, figsize=THUMBNAIL_FIGSIZE, tight=False)
+    if fig is None:
+        return None
+    strip_text(fig)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=THUMBNAIL_DPI, pil_kwargs=THUMBNAIL_SAVE_OPTIONS[fmt])
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def init_worker():
+    """Понижает приоритет воркера: миниатюры не должны замедлять rerun-ы сессий"""
+    if hasattr(os, 'nice'):
+        os.nice(WORKER_NICENESS)
+
+
+def render_thumbnail_file(chart: Dict, path: str) -> int:
+    """Воркер пула: рисует миниатюру и атомарно кладет ее в файл; возвращает размер"""
+    data = render_thumbnail(chart, Path(path).suffix.lstrip('.'))
+    if not data:
+        # Пустой файл выглядел бы как миниатюра, которая все еще рисуется
+        raise ValueError(f"нет графика для chart_type={chart.get('chart_type')!r}")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as thumbnail_file:
+        thumbnail_file.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+# ===== ХРАНИЛИЩЕ =====
+class ThumbnailStore:
+    """
+    Каталог миниатюр, общий для всех сессий и процессов.
+
+    get() только читает готовый файл; request() отдает недостающие
+    миниатюры в пул процессов и сразу возвращается. Пул создается при
+    первой заявке: сессия, которой все миниатюры достались с диска,
+    процессов не запускает.
+    """
+
+    def __init__(self, directory: str, workers: Optional[int] = None, fmt: str = THUMBNAIL_FORMAT):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.fmt = fmt
+        self.rendered = 0
+        self.failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.{self.fmt}"
+
+    def get(self, case: Dict) -> Optional[bytes]:
+        """Готовая миниатюра кейса или None (графика нет или она еще рисуется)"""
+        key = thumbnail_key(case)
+        if key is None:
+            return None
+        try:
+            return self.path(key).read_bytes() or None
+        except FileNotFoundError:
+            return None
+
+    def request(self, cases: Iterable[Dict]) -> List[Future]:
+        """Заказывает недостающие миниатюры; возвращает задачи, которые еще рисуются"""
+        futures = []
+        with self._lock:
+            for case in cases:
+                key = thumbnail_key(case)
+                if key is None or key in self.failed or self.path(key).exists():
+                    continue
+                future = self._pending.get(key)
+                if future is None:
+                    chart = {'chart_type': case['chart_type'], 'chart_data': case['chart_data']}
+                    future = self._executor().submit(render_thumbnail_file, chart, str(self.path(key)))
+                    future.add_done_callback(lambda done, key=key: self._done(key, done))
+                    self._pending[key] = future
+                futures.append(future)
+        return futures
+
+    def wait(self, futures: List[Future], timeout: float) -> bool:
+        """Ждет заказанные миниатюры не дольше timeout; True, если готовы все"""
+        return not futures or not wait(futures, timeout=timeout).not_done
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                             mp_context=multiprocessing.get_context(START_METHOD))
+        return self._pool
+
+    def _done(self, key: str, future: Future):
+        # Упавшая миниатюра больше не заказывается: карточка покажется без графика
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is not None:
+                self.failed[key] = f"{type(error).__name__}: {error}"
+            elif not future.cancelled():
+                self.rendered += 1
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ===== СТРАНИЦЫ =====
+def page_count(total: int, page_size: int = PAGE_SIZE) -> int:
+    return max(1, -(-total // page_size))
+
+
+def page_slice(items: List, page: int, page_size: int = PAGE_SIZE) -> List:
+    """Элементы страницы page (номер приводится к допустимому)"""
+    page = min(max(page, 0), page_count(len(items), page_size) - 1)
+    return items[page * page_size:(page + 1) * page_size]
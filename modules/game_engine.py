@@ -0,0 +1,123 @@
+"""
+Игровая механика как подписчики шины событий: состояние игрока,
+достижения, сохранение, рейтинги и живые агрегаты.
+
+Интерфейс публикует событие один раз и ждет только обновления
+состояния и проверки достижений; остальные подписчики работают в своих
+потоках со своими пачками и политикой переполнения (modules/events.py).
+"""
+import threading
+from typing import Callable, Dict, List
+
+from modules.events import Consumer, EventBus, GameEvent, LiveAggregates
+from modules.rating import RatingEngine
+from modules.session_state import PlayerStats, SessionRegistry
+
+POINTS_PER_LEVEL = 100
+ANSWER_KINDS = ('analysis_answer', 'scenario_step', 'bias_answer')
+STATE_KINDS = ('award', 'streak_reset')
+
+
+# ===== СОСТОЯНИЕ =====
+def apply_award(stats: PlayerStats, points: int, case_id: str = None):
+    """Очки, решенный кейс, уровень и серия"""
+    stats.score += points
+    if case_id:
+        stats.solved_cases.add(case_id)
+    stats.level = max(stats.level, stats.score // POINTS_PER_LEVEL + 1)
+    stats.current_streak += 1
+    stats.best_streak = max(stats.best_streak, stats.current_streak)
+
+
+class StateUpdater:
+    """Синхронный подписчик: меняет статистику игрока до возврата из publish()"""
+
+    def __init__(self, registry: SessionRegistry):
+        self.registry = registry
+
+    def __call__(self, events: List[GameEvent]):
+        for event in events:
+            stats = self.registry.get(event.player)
+            if stats is None:
+                continue
+            if event.kind == 'award':
+                apply_award(stats, event.points, event.case_id)
+            else:
+                stats.current_streak = 0
+
+
+# ===== ДОСТИЖЕНИЯ =====
+class AchievementChecker:
+    """
+    Проверяет правила достижений после начислений. Сообщения о новых
+    достижениях ждут в почтовом ящике игрока, пока интерфейс их не заберет.
+    """
+
+    def __init__(self, registry: SessionRegistry, rules: Callable[[], List[Dict]]):
+        self.registry = registry
+        self.rules = rules
+        self._lock = threading.Lock()
+        self._inbox: Dict[str, List[str]] = {}
+
+    def __call__(self, events: List[GameEvent]):
+        rules = self.rules()
+        # Пачка может нести несколько начислений одного игрока - проверяем его один раз
+        for player in dict.fromkeys(event.player for event in events):
+            stats = self.registry.get(player)
+            if stats is None:
+                continue
+            unlocked = [rule for rule in rules
+                        if stats[rule['metric']] >= rule['threshold'] and rule['title'] not in stats.achievements]
+            for rule in unlocked:
+                stats.achievements.add(rule['title'])
+            if unlocked:
+                with self._lock:
+                    self._inbox.setdefault(player, []).extend(rule['message'] for rule in unlocked)
+
+    def pop_messages(self, player: str) -> List[str]:
+        with self._lock:
+            return self._inbox.pop(player, [])
+
+
+# ===== СОХРАНЕНИЕ И РЕЙТИНГИ =====
+class StatsWriter:
+    """Сохраняет статистику игроков пачки одной транзакцией"""
+
+    def __init__(self, registry: SessionRegistry):
+        self.registry = registry
+
+    def __call__(self, events: List[GameEvent]):
+        self.registry.save(dict.fromkeys(event.player for event in events))
+
+
+class RatingUpdater:
+    """Elo-обновления по ответам в порядке их публикации"""
+
+    def __init__(self, engine: RatingEngine):
+        self.engine = engine
+
+    def __call__(self, events: List[GameEvent]):
+        for event in events:
+            self.engine.update(event.player, event.case_id, event.correct)
+
+
+# ===== КОНВЕЙЕР =====
+def attach_award_pipeline(bus: EventBus, registry: SessionRegistry, engine: RatingEngine,
+                          aggregates: LiveAggregates, achievements: AchievementChecker):
+    """
+    Подписывает игровую механику на шину:
+    - state: синхронно, начисления и сбросы серии;
+    - achievements: синхронно после state, чтобы уведомление показал тот же rerun;
+    - storage: пачки до 256 событий раз в секунду, при переполнении теряет
+      старые события - следующее сохранение все равно запишет свежее состояние;
+    - ranking: по ответам в порядке публикации, при переполнении ждет места;
+    - analytics: живые агрегаты пачками, при переполнении теряет старые события.
+    """
+    bus.add_consumer(Consumer('state', StateUpdater(registry), kinds=STATE_KINDS, sync=True))
+    bus.add_consumer(Consumer('achievements', achievements, kinds=('award',), sync=True))
+    bus.add_consumer(Consumer('storage', StatsWriter(registry), kinds=STATE_KINDS, batch_size=256,
+                              max_delay=1.0, overflow='drop_oldest'))
+    bus.add_consumer(Consumer('ranking', RatingUpdater(engine), kinds=ANSWER_KINDS, batch_size=64,
+                              max_delay=0.05, overflow='block'))
+    bus.add_consumer(Consumer('analytics', aggregates, kinds=ANSWER_KINDS, batch_size=128,
+                              max_delay=0.2, overflow='drop_oldest'))
@@ -0,0 +1,146 @@
+"""
+Каталоги переводов интерфейса и контента.
+
+Исходный язык - русский: строка интерфейса или текст кейса сам служит
+ключом перевода (msgid), как в gettext, поэтому правка текста кейса
+просто возвращает его в исходный язык, пока перевод не обновят.
+Переводы лежат в locales/<язык>.json и заранее компилируются в .mo
+(tools/compile_locales.py) - компактную таблицу, которую стандартный
+gettext читает без разбора JSON. Каталог загружается при первом
+обращении к языку; язык, который никто не выбрал, в память не попадает.
+"""
+import gettext
+import json
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+
+SOURCE_LOCALE = 'ru'
+LOCALES = {'ru': "Русский", 'en': "English"}
+LOCALES_DIR = 'locales'
+MO_MAGIC = 0x950412de
+MO_HEADER = "Content-Type: text/plain; charset=UTF-8\n"
+CYRILLIC = re.compile('[а-яё]', re.IGNORECASE)
+
+# Текстовые поля кейсов: строки и списки строк; шаги сценария переводятся отдельно
+CASE_TEXT_FIELDS = ('title', 'description', 'explanation', 'revelation')
+CASE_LIST_FIELDS = ('options', 'questions', 'hints')
+
+
+def needs_translation(text) -> bool:
+    """Строка на исходном языке (остальное - числа, коды, английские термины)"""
+    return isinstance(text, str) and CYRILLIC.search(text) is not None
+
+
+# ===== КОМПИЛЯЦИЯ =====
+def source_path(locale: str, directory: str = LOCALES_DIR) -> Path:
+    return Path(directory) / f"{locale}.json"
+
+
+def compiled_path(locale: str, directory: str = LOCALES_DIR) -> Path:
+    return Path(directory) / f"{locale}.mo"
+
+
+def read_source(path: Path) -> Dict[str, str]:
+    """Переводы из исходного каталога; пустые значения - еще не переведенные строки"""
+    with open(path, encoding='utf-8') as source_file:
+        return json.load(source_file)['messages']
+
+
+def write_mo(messages: Dict[str, str], path: Path):
+    """
+    Пишет каталог в формате gettext .mo: заголовок, две таблицы (длина,
+    смещение) для ключей и переводов и сами строки в UTF-8. Таблица хэшей
+    не пишется - gettext ее не использует.
+    """
+    entries = sorted({'': MO_HEADER, **messages}.items())
+    keys = [key.encode('utf-8') for key, _ in entries]
+    values = [value.encode('utf-8') for _, value in entries]
+
+    keys_start = 28 + 16 * len(entries)
+    values_start = keys_start + sum(len(key) + 1 for key in keys)
+    key_table, value_table = [], []
+    offset = keys_start
+    for key in keys:
+        key_table += [len(key), offset]
+        offset += len(key) + 1
+    offset = values_start
+    for value in values:
+        value_table += [len(value), offset]
+        offset += len(value) + 1
+
+    header = struct.pack('<7I', MO_MAGIC, 0, len(entries), 28, 28 + 8 * len(entries), 0, 28 + 16 * len(entries))
+    tmp_path = path.with_suffix('.mo.tmp')
+    with open(tmp_path, 'wb') as mo_file:
+        mo_file.write(header)
+        mo_file.write(struct.pack(f'<{len(key_table)}I', *key_table))
+        mo_file.write(struct.pack(f'<{len(value_table)}I', *value_table))
+        mo_file.write(b''.join(key + b'\0' for key in keys))
+        mo_file.write(b''.join(value + b'\0' for value in values))
+    os.replace(tmp_path, path)
+
+
+def compile_catalog(locale: str, directory: str = LOCALES_DIR) -> int:
+    """Компилирует locales/<язык>.json в .mo; возвращает число переведенных строк"""
+    messages = {key: value for key, value in read_source(source_path(locale, directory)).items() if value}
+    write_mo(messages, compiled_path(locale, directory))
+    return len(messages)
+
+
+def is_stale(locale: str, directory: str = LOCALES_DIR) -> bool:
+    """Исходный каталог новее скомпилированного (или тот еще не собран)"""
+    source, compiled = source_path(locale, directory), compiled_path(locale, directory)
+    return source.exists() and (not compiled.exists() or compiled.stat().st_mtime < source.stat().st_mtime)
+
+
+# ===== ЗАГРУЗКА =====
+def load_catalog(locale: str, directory: str = LOCALES_DIR) -> gettext.NullTranslations:
+    """
+    Каталог языка. Для исходного языка и языка без каталога - пустой
+    каталог, возвращающий строки как есть. Несобранный или устаревший
+    каталог компилируется на месте - это запасной путь для разработки,
+    на сервере каталоги собираются заранее.
+    """
+    if locale == SOURCE_LOCALE:
+        return gettext.NullTranslations()
+    if is_stale(locale, directory):
+        compile_catalog(locale, directory)
+    compiled = compiled_path(locale, directory)
+    if not compiled.exists():
+        return gettext.NullTranslations()
+    with open(compiled, 'rb') as mo_file:
+        return gettext.GNUTranslations(mo_file)
+
+
+# ===== КОНТЕНТ =====
+def case_texts(case: Dict) -> Iterator[str]:
+    """Все переводимые тексты кейса (для выгрузки ключей в каталоги)"""
+    for field in CASE_TEXT_FIELDS:
+        yield case.get(field)
+    for field in CASE_LIST_FIELDS:
+        yield from case.get(field) or ()
+    for step in case.get('steps') or ():
+        yield step['text']
+        yield from step['options']
+        yield from step['feedback'].values()
+
+
+def localize_case(case: Dict, translate: Callable[[str], str]) -> Dict:
+    """Копия кейса с переведенными текстами; структура, id и числа не меняются"""
+    localized = dict(case)
+    for field in CASE_TEXT_FIELDS:
+        if field in case:
+            localized[field] = translate(case[field])
+    for field in CASE_LIST_FIELDS:
+        if field in case:
+            localized[field] = [translate(text) for text in case[field]]
+    if 'steps' in case:
+        localized['steps'] = [{
+            **step,
+            'text': translate(step['text']),
+            'options': [translate(option) for option in step['options']],
+            'feedback': {key: translate(text) for key, text in step['feedback'].items()},
+        } for step in case['steps']]
+    return localized
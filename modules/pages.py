@@ -0,0 +1,92 @@
+"""Статичное содержимое страниц: общее для приложения и статической сборки (tools/build_static.py)"""
+
+APP_TITLE = "🕵️ Statistical Detective"
+APP_TAGLINE = "Игра для аналитиков: Поймай ошибку раньше, чем она поймает тебя!"
+
+APP_CSS = """
+.detective-header {
+    background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+    padding: 1rem;
+    border-radius: 10px;
+    color: white;
+    text-align: center;
+    margin-bottom: 2rem;
+}
+
+.case-card {
+    border: 2px solid #e1e5e9;
+    border-radius: 10px;
+    padding: 1rem;
+    margin: 1rem 0;
+    background: #f8f9fa;
+}
+
+.score-badge {
+    background: #28a745;
+    color: white;
+    padding: 0.25rem 0.5rem;
+    border-radius: 15px;
+    font-weight: bold;
+}
+"""
+
+WELCOME_TITLE = "🎯 Добро пожаловать, детектив!"
+WELCOME_TEXT = """
+Ты попал в мир статистических загадок и аналитических головоломок!
+Здесь тебя ждут реальные кейсы из маркетинговой и продуктовой аналитики.
+"""
+
+# Карточки режимов на главной; mode_key - id режима в приложении
+MODE_CARDS = [
+    {
+        'title': "🔍 Охота за ошибками",
+        'description': "Найди критические ошибки в анализе данных",
+        'difficulty': "Сложность: ⭐⭐⭐",
+        'mode_key': "error_hunting"
+    },
+    {
+        'title': "🎯 Принятие решений",
+        'description': "Пошаговые сценарии из реальной практики",
+        'difficulty': "Сложность: ⭐⭐⭐⭐",
+        'mode_key': "decisions"
+    },
+    {
+        'title': "⚠️ Детектор предвзятостей",
+        'description': "Найди скрытые искажения в данных",
+        'difficulty': "Сложность: ⭐⭐⭐⭐⭐",
+        'mode_key': "bias_detection"
+    }
+]
+
+NEWS_TITLE = "📰 Новости детективного бюро"
+NEWS_ITEMS = [
+    {
+        'date': '2025-05-23',
+        'title': 'Добавлены новые кейсы по A/B тестированию',
+        'description': 'Теперь доступны сложные сценарии с multiple testing и практической значимостью'
+    },
+    {
+        'date': '2025-05-20',
+        'title': 'Система достижений обновлена',
+        'description': 'Добавлены новые бейджи для специализаций: маркетинг, продукт, веб-аналитика'
+    }
+]
+
+ABOUT_TITLE = "🎯 О проекте"
+ABOUT_TEXT = """
+**Statistical Detective** - интерактивная игра для развития навыков
+аналитического мышления и выявления статистических ошибок.
+"""
+
+LINKS_TITLE = "🔗 Связанные проекты"
+RELATED_LINKS = [
+    ("Демонстрация вероятностных законов", "https://probability-laws-demo.streamlit.app/"),
+    ("GitHub репозиторий", "https://github.com/Nero911-novice/statistics-detective")
+]
+
+CASE_TYPE_LABELS = {
+    'analysis': "Поиск ошибки в анализе",
+    'scenario': "Сценарий принятия решений",
+    'bias': "Детектор предвзятостей",
+    'dataset': "Расследование по сырым данным"
+}
@@ -0,0 +1,175 @@
+"""Elo-рейтинги игроков и кейсов: онлайн-обновления и пакетный пересчет"""
+import math
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+BASE_RATING = 1500.0
+SCALE = 400.0
+PLAYER_K = 32.0
+PROVISIONAL_K = 64.0
+PROVISIONAL_GAMES = 10
+CASE_K = 16.0
+AGGREGATE_LIMIT = 1 << 24
+
+DIFFICULTY_RATINGS = {
+    'Новичок': 1300.0,
+    'Аналитик': 1500.0,
+    'Эксперт': 1700.0,
+}
+
+
+def expected_score(player_rating: float, case_rating: float) -> float:
+    """Вероятность правильного ответа игрока на кейс по модели Elo"""
+    return 1.0 / (1.0 + 10.0 ** ((case_rating - player_rating) / SCALE))
+
+
+class AnswerLog:
+    """Журнал ответов в растущих numpy-массивах (индексы игрока и кейса, исход)"""
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.players = np.empty(capacity, dtype=np.int32)
+        self.cases = np.empty(capacity, dtype=np.int32)
+        self.outcomes = np.empty(capacity, dtype=np.int8)
+
+    def append(self, player: int, case: int, outcome: int):
+        if self.size == len(self.players):
+            capacity = len(self.players) * 2
+            self.players = np.resize(self.players, capacity)
+            self.cases = np.resize(self.cases, capacity)
+            self.outcomes = np.resize(self.outcomes, capacity)
+        self.players[self.size] = player
+        self.cases[self.size] = case
+        self.outcomes[self.size] = outcome
+        self.size += 1
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self.players[:self.size], self.cases[:self.size], self.outcomes[:self.size]
+
+
+def batch_fit(players: np.ndarray, cases: np.ndarray, outcomes: np.ndarray,
+              n_players: int, n_cases: int, case_prior: Optional[np.ndarray] = None,
+              epochs: int = 4, reg: float = 0.05) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Пересчет всех рейтингов по истории ответов.
+
+    Онлайн-Elo зависит от порядка ответов и не векторизуется, поэтому пакетный
+    режим подбирает ту же логистическую модель: поочередные шаги Ньютона
+    по игрокам и по кейсам, градиенты и гессианы собираются через np.bincount.
+    Повторные ответы одного игрока на один кейс предварительно схлопываются.
+    Рейтинги кейсов регуляризуются к априорным (по статической сложности).
+    """
+    if case_prior is None:
+        case_prior = np.full(n_cases, BASE_RATING)
+
+    k = math.log(10) / SCALE
+    prior_skill = (np.asarray(case_prior, dtype=np.float64) - BASE_RATING) * k
+    player_skill = np.zeros(n_players)
+    case_skill = prior_skill.copy()
+
+    # Схлопываем пары (игрок, кейс), если их пространство помещается в память
+    if n_players * n_cases <= AGGREGATE_LIMIT:
+        pair = players.astype(np.int64) * n_cases + cases
+        trials = np.bincount(pair, minlength=n_players * n_cases)
+        successes = np.bincount(pair, weights=outcomes, minlength=n_players * n_cases)
+        nonzero = np.flatnonzero(trials)
+        players, cases = nonzero // n_cases, nonzero % n_cases
+        trials, successes = trials[nonzero].astype(np.float64), successes[nonzero]
+    else:
+        trials, successes = 1.0, outcomes.astype(np.float32)
+
+    def predict():
+        logits = (player_skill[players] - case_skill[cases]).astype(np.float32)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    for _ in range(epochs):
+        probs = predict()
+        grad = np.bincount(players, weights=successes - trials * probs, minlength=n_players)
+        hess = np.bincount(players, weights=trials * probs * (1 - probs), minlength=n_players)
+        player_skill += (grad - reg * player_skill) / (hess + reg)
+
+        probs = predict()
+        grad = -np.bincount(cases, weights=successes - trials * probs, minlength=n_cases)
+        hess = np.bincount(cases, weights=trials * probs * (1 - probs), minlength=n_cases)
+        case_skill += (grad - reg * (case_skill - prior_skill)) / (hess + reg)
+
+    return BASE_RATING + player_skill / k, BASE_RATING + case_skill / k
+
+
+class RatingEngine:
+    """Общий для всех сессий движок рейтингов"""
+
+    def __init__(self, case_priors: Optional[Dict[str, float]] = None):
+        self._lock = threading.Lock()
+        self.case_priors = dict(case_priors or {})
+        self.player_ids: Dict[str, int] = {}
+        self.case_ids: Dict[str, int] = {}
+        self.player_ratings: Dict[str, float] = {}
+        self.case_ratings: Dict[str, float] = {}
+        self.player_games: Dict[str, int] = {}
+        self.log = AnswerLog()
+
+    def _intern(self, ids: Dict[str, int], key: str) -> int:
+        index = ids.get(key)
+        if index is None:
+            index = ids[key] = len(ids)
+        return index
+
+    def player_rating(self, player_id: str) -> float:
+        return self.player_ratings.get(player_id, BASE_RATING)
+
+    def case_rating(self, case_id: str) -> float:
+        return self.case_ratings.get(case_id, self.case_priors.get(case_id, BASE_RATING))
+
+    def update(self, player_id: str, case_id: str, correct: bool) -> Tuple[float, float]:
+        """Онлайн-обновление рейтингов игрока и кейса за O(1)"""
+        with self._lock:
+            player_rating = self.player_rating(player_id)
+            case_rating = self.case_rating(case_id)
+            games = self.player_games.get(player_id, 0)
+
+            delta = (1.0 if correct else 0.0) - expected_score(player_rating, case_rating)
+            player_k = PROVISIONAL_K if games < PROVISIONAL_GAMES else PLAYER_K
+
+            self.player_ratings[player_id] = player_rating + player_k * delta
+            self.case_ratings[case_id] = case_rating - CASE_K * delta
+            self.player_games[player_id] = games + 1
+
+            self.log.append(self._intern(self.player_ids, player_id),
+                            self._intern(self.case_ids, case_id), int(correct))
+            return self.player_ratings[player_id], self.case_ratings[case_id]
+
+    def load_history(self, answers: Iterable[Tuple[str, str, bool]]) -> int:
+        """Заполняет журнал ответами прошлых запусков (игрок, кейс, верно ли); возвращает их число"""
+        count = 0
+        with self._lock:
+            for player_id, case_id, correct in answers:
+                self.log.append(self._intern(self.player_ids, player_id),
+                                self._intern(self.case_ids, case_id), int(correct))
+                self.player_games[player_id] = self.player_games.get(player_id, 0) + 1
+                count += 1
+        return count
+
+    def recompute(self, **fit_params):
+        """Пакетный пересчет всех рейтингов по журналу ответов"""
+        with self._lock:
+            players, cases, outcomes = (array.copy() for array in self.log.arrays())
+            player_names = list(self.player_ids)
+            case_names = list(self.case_ids)
+
+        if len(outcomes) == 0:
+            return
+        case_prior = np.array([self.case_priors.get(case_id, BASE_RATING) for case_id in case_names])
+        player_ratings, case_ratings = batch_fit(players, cases, outcomes, len(player_names),
+                                                 len(case_names), case_prior=case_prior, **fit_params)
+
+        with self._lock:
+            self.player_ratings.update(zip(player_names, player_ratings.tolist()))
+            self.case_ratings.update(zip(case_names, case_ratings.tolist()))
+
+    def top_players(self, n: int = 10):
+        """Лучшие игроки по рейтингу"""
+        with self._lock:
+            return sorted(self.player_ratings.items(), key=lambda item: item[1], reverse=True)[:n]
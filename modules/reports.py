@@ -0,0 +1,168 @@
+"""Отчеты о прогрессе игроков (PNG/PDF) по шаблону с заранее отрисованными элементами"""
+import io
+import json
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from modules.content import DIFFICULTIES, ContentSnapshot
+
+REPORT_SIZE = (8.27, 5.85)
+HEADER_COLORS = ('#667eea', '#764ba2')
+MAX_LISTED = 6
+
+
+# ===== ДАННЫЕ ОТЧЕТА =====
+def load_player_stats(sessions_path: str) -> Iterator[Dict]:
+    """Сохраненная статистика игроков из хранилища сессий"""
+    with sqlite3.connect(sessions_path) as connection:
+        for player_id, payload in connection.execute("SELECT player, payload FROM sessions ORDER BY player"):
+            yield {'player_id': player_id, **json.loads(payload)}
+
+
+def load_answer_counts(telemetry_path: str) -> Dict[str, Dict[str, Counter]]:
+    """player -> case_id -> Counter(correct/wrong) по журналу телеметрии"""
+    counts: Dict[str, Dict[str, Counter]] = {}
+    with sqlite3.connect(telemetry_path) as connection:
+        rows = connection.execute(
+            "SELECT player, case_id, kind, COUNT(*) FROM events "
+            "WHERE kind IN ('answer_correct', 'answer_wrong') GROUP BY player, case_id, kind")
+        for player, case_id, kind, count in rows:
+            counts.setdefault(player, {}).setdefault(case_id, Counter())[kind[7:]] += count
+    return counts
+
+
+def build_report(stats: Dict, content: ContentSnapshot, answers: Optional[Dict[str, Counter]] = None) -> Dict:
+    """Данные отчета одного игрока: метрики, решенные по сложности, достижения, слабые места"""
+    solved_by_difficulty = Counter(content.cases[case_id].get('difficulty')
+                                   for case_id in stats['solved_cases'] if case_id in content.cases)
+
+    # Слабые типы предвзятостей - доля ошибок по кейсам каждого типа
+    bias_answers: Dict[str, Counter] = {}
+    for case_id, counter in (answers or {}).items():
+        case = content.cases.get(case_id)
+        if case is not None and case['type'] == 'bias':
+            bias_answers.setdefault(case['bias_type'], Counter()).update(counter)
+    weak_biases = sorted(((bias_type, counter['wrong'] / sum(counter.values()))
+                          for bias_type, counter in bias_answers.items() if counter['wrong']),
+                         key=lambda item: -item[1])
+
+    return {
+        'player_id': stats['player_id'],
+        'score': stats['score'],
+        'level': stats['level'],
+        'best_streak': stats['best_streak'],
+        'play_time': stats['play_time'],
+        'solved': len(stats['solved_cases']),
+        'solved_by_difficulty': [solved_by_difficulty.get(difficulty, 0) for difficulty in DIFFICULTIES],
+        'achievements': list(stats['achievements']),
+        'weak_biases': weak_biases,
+    }
+
+
+# ===== ОТРИСОВКА =====
+CHART_BOX = [0.52, 0.42, 0.43, 0.36]
+CHART_XLIM = (-0.5, len(DIFFICULTIES) - 0.5)
+BAR_COLORS = ['#2ca02c', '#1f77b4', '#d62728']
+
+
+def render_template_asset(dpi: int = 100) -> np.ndarray:
+    """
+    Статичный слой отчета (шапка, заголовки разделов, рамка графика с
+    подписями сложностей) как RGBA-массив. Рисуется один раз на выгрузку
+    и передается воркерам, которые дорисовывают поверх только данные игрока.
+    """
+    fig = Figure(figsize=REPORT_SIZE, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+
+    header = fig.add_axes([0, 0.85, 1, 0.15])
+    header.axis('off')
+    gradient = np.linspace(0, 1, 256)[None, :, None]
+    start, end = (np.array(_hex_to_rgb(color)) for color in HEADER_COLORS)
+    header.imshow(start + gradient * (end - start), aspect='auto', extent=(0, 1, 0, 1))
+    header.text(0.03, 0.5, "Statistical Detective — отчет о прогрессе", color='white',
+                fontsize=16, fontweight='bold', va='center')
+
+    ax = fig.add_axes(CHART_BOX)
+    ax.set_xlim(*CHART_XLIM)
+    ax.set_xticks(range(len(DIFFICULTIES)), DIFFICULTIES)
+    ax.set_yticks([])
+    ax.spines[['top', 'right', 'left']].set_visible(False)
+    ax.set_title("Решено кейсов по сложности")
+
+    fig.text(0.03, 0.30, "Достижения", fontsize=12, fontweight='bold')
+    fig.text(0.52, 0.30, "Над чем поработать", fontsize=12, fontweight='bold')
+
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def _hex_to_rgb(color: str):
+    return tuple(int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+
+
+class ReportRenderer:
+    """
+    Шаблон отчета: статичный слой готов заранее, фигура и ее изменяемые
+    элементы создаются один раз, а для каждого игрока меняются только
+    тексты и высоты столбцов.
+    """
+
+    def __init__(self, template: np.ndarray, dpi: int = 100):
+        self.dpi = dpi
+        self.fig = Figure(figsize=REPORT_SIZE, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.fig.figimage(template, 0, 0, zorder=-1)
+
+        self.player = self.fig.text(0.03, 0.80, '', fontsize=14, fontweight='bold')
+        self.metrics = self.fig.text(0.03, 0.72, '', fontsize=11, va='top', linespacing=1.6)
+
+        self.ax = self.fig.add_axes(CHART_BOX)
+        self.ax.set_xlim(*CHART_XLIM)
+        self.ax.axis('off')
+        self.bars = self.ax.bar(range(len(DIFFICULTIES)), [0] * len(DIFFICULTIES), color=BAR_COLORS)
+        self.bar_labels = [self.ax.text(bar.get_x() + bar.get_width() / 2, 0, '', ha='center', va='bottom')
+                           for bar in self.bars]
+
+        self.achievements = self.fig.text(0.03, 0.26, '', fontsize=10, va='top', linespacing=1.5)
+        self.weak = self.fig.text(0.52, 0.26, '', fontsize=10, va='top', linespacing=1.5)
+
+    def render(self, report: Dict, fmt: str = 'png') -> bytes:
+        """Отчет игрока в PNG или PDF"""
+        self.player.set_text(f"Детектив {report['player_id']}")
+        self.metrics.set_text(
+            f"Очки: {report['score']}\n"
+            f"Уровень: {report['level']}\n"
+            f"Решено кейсов: {report['solved']}\n"
+            f"Лучшая серия: {report['best_streak']}\n"
+            f"Время игры: {report['play_time']:.0f} мин")
+
+        heights = report['solved_by_difficulty']
+        for bar, label, height in zip(self.bars, self.bar_labels, heights):
+            bar.set_height(height)
+            label.set_y(height)
+            label.set_text(str(height))
+        self.ax.set_ylim(0, max(heights + [1]) * 1.2)
+
+        self.achievements.set_text(_bullets(report['achievements'], "Пока нет достижений"))
+        self.weak.set_text(_bullets([f"{bias_type}: {share:.0%} ошибок" for bias_type, share in report['weak_biases']],
+                                    "Слабых мест не найдено"))
+
+        buffer = io.BytesIO()
+        # Быстрое сжатие PNG: отчет почти целиком из плоских заливок
+        options = {'pil_kwargs': {'compress_level': 1}} if fmt == 'png' else {}
+        self.fig.savefig(buffer, format=fmt, dpi=self.dpi, **options)
+        return buffer.getvalue()
+
+
+def _bullets(items: List[str], empty: str) -> str:
+    if not items:
+        return empty
+    lines = [f"• {item}" for item in items[:MAX_LISTED]]
+    if len(items) > MAX_LISTED:
+        lines.append(f"… и еще {len(items) - MAX_LISTED}")
+    return "\n".join(lines)
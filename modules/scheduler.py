@@ -0,0 +1,134 @@
+"""Адаптивный планировщик кейсов с интервальными повторениями"""
+import heapq
+import random
+from typing import Dict, Optional, Sequence
+
+# Параметры упрощенного SM-2
+START_EASE = 2.5
+MIN_EASE = 1.3
+MASTERY_PRIOR = 0.5
+MASTERY_WEIGHT = 0.3
+
+
+class CaseState:
+    """Состояние одного кейса для игрока"""
+    __slots__ = ('ease', 'interval', 'reps', 'mastery', 'due', 'version')
+
+    def __init__(self):
+        self.ease = START_EASE
+        self.interval = 0
+        self.reps = 0
+        self.mastery = MASTERY_PRIOR
+        self.due = 0
+        self.version = 0
+
+
+class CaseScheduler:
+    """
+    Очередь кейсов игрока, упорядоченная по времени повторения и освоенности.
+
+    Время - это число ответов игрока. Просмотренные кейсы лежат в куче на пул
+    (устаревшие записи отбрасываются лениво по версии), а непросмотренные
+    берутся курсором из общего порядка пула, который не копируется в сессию.
+    Поэтому обновление - O(log n), а память растет только с числом сыгранных кейсов.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.clock = 0
+        self._states: Dict[str, CaseState] = {}
+        self._heaps: Dict[str, list] = {}
+        self._pools_of: Dict[str, set] = {}
+        self._cursors: Dict[str, int] = {}
+        self._offsets: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._seq = 0
+
+    # ===== ОБНОВЛЕНИЯ =====
+    def record_answer(self, case_id: str, correct: bool, pools: Sequence[str] = ()):
+        """Обновляет освоенность и срок повторения кейса после ответа"""
+        self.clock += 1
+        state = self._state(case_id, pools)
+
+        state.mastery = (1 - MASTERY_WEIGHT) * state.mastery + MASTERY_WEIGHT * (1.0 if correct else 0.0)
+        if correct:
+            state.reps += 1
+            if state.reps == 1:
+                state.interval = 1
+            elif state.reps == 2:
+                state.interval = 3
+            else:
+                state.interval = round(state.interval * state.ease)
+            state.ease += 0.1
+        else:
+            state.reps = 0
+            state.interval = 1
+            state.ease = max(MIN_EASE, state.ease - 0.2)
+
+        self._schedule(case_id, state, self.clock + state.interval)
+
+    def skip(self, case_id: str, pools: Sequence[str] = ()):
+        """Откладывает кейс на один ход без изменения освоенности"""
+        state = self._state(case_id, pools)
+        self._schedule(case_id, state, self.clock + 1)
+
+    def _state(self, case_id: str, pools: Sequence[str]) -> CaseState:
+        state = self._states.get(case_id)
+        if state is None:
+            state = self._states[case_id] = CaseState()
+        self._pools_of.setdefault(case_id, set()).update(pools)
+        return state
+
+    def _schedule(self, case_id: str, state: CaseState, due: int):
+        state.due = due
+        state.version += 1
+        self._seq += 1
+        for pool in self._pools_of[case_id]:
+            heapq.heappush(self._heaps.setdefault(pool, []),
+                           (due, state.mastery, self._seq, state.version, case_id))
+
+    # ===== ВЫБОР СЛЕДУЮЩЕГО КЕЙСА =====
+    def _top(self, pool: str):
+        """Верхняя актуальная запись кучи пула (устаревшие удаляются)"""
+        heap = self._heaps.get(pool)
+        while heap:
+            entry = heap[0]
+            state = self._states.get(entry[4])
+            if state is not None and state.version == entry[3]:
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def _next_unseen(self, pool: str, order: Sequence[str]) -> Optional[str]:
+        """Следующий непросмотренный кейс по общему порядку пула"""
+        if not order:
+            return None
+        if pool not in self._offsets:
+            self._offsets[pool] = self._rng.randrange(len(order))
+        cursor = self._cursors.get(pool, 0)
+        offset = self._offsets[pool]
+        while cursor < len(order):
+            case_id = order[(offset + cursor) % len(order)]
+            if case_id not in self._states:
+                self._cursors[pool] = cursor
+                return case_id
+            cursor += 1
+        self._cursors[pool] = cursor
+        return None
+
+    def next_case(self, pool: str, order: Sequence[str]) -> Optional[str]:
+        """
+        Следующий кейс пула: сначала кейсы, которые пора повторить,
+        затем новые, затем ближайшие по сроку повторения.
+        """
+        top = self._top(pool)
+        if top is not None and top[0] <= self.clock:
+            return top[4]
+        unseen = self._next_unseen(pool, order)
+        if unseen is not None:
+            return unseen
+        return top[4] if top is not None else None
+
+    def mastery(self, case_id: str) -> Optional[float]:
+        """Оценка освоенности кейса или None, если кейс еще не встречался"""
+        state = self._states.get(case_id)
+        return state.mastery if state is not None else None
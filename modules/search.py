@@ -0,0 +1,239 @@
+"""Полнотекстовый поиск по кейсам: инвертированный индекс и ранжирование BM25"""
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {
+    'title': 3,
+    'description': 1,
+    'options': 1,
+    'explanation': 1,
+}
+
+TOKEN_RE = re.compile(r"[a-zа-я0-9]+(?:[/\-][a-zа-я0-9]+)*")
+MARKUP_RE = re.compile(r"[*_`#>]+")
+
+STOPWORDS = frozenset("""
+и в во не на с со что как а но по к у от до для из о об это же ли бы то его ее их все
+так или за при без под над чем только уже еще там тут где кто мы вы ты он она они
+the a an of to is are and or in on for with by be
+""".split())
+
+# Окончания для легкого стемминга русских слов, сгруппированные по длине
+RUSSIAN_ENDINGS = frozenset("""
+иями ями ами иях иям ием ией ого его ому ему ыми ими ется ются ится ятся
+ая яя ое ее ые ие ый ий ой ей ом ем ам ям ах ях ую юю ов ев ия ию ть ет ит ут ют ат ят
+ал ил ла ли ло ся сь а я о е и ы у ю ь й
+""".split())
+ENDING_LENGTHS = sorted({len(ending) for ending in RUSSIAN_ENDINGS}, reverse=True)
+MIN_STEM = 3
+
+
+@lru_cache(maxsize=200_000)
+def stem(token: str) -> str:
+    """Легкий стемминг: срезает типичное окончание русского или английского слова"""
+    if token.isascii():
+        if len(token) > 4 and token.endswith('ing'):
+            return token[:-3]
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            return token[:-1]
+        return token
+    for length in ENDING_LENGTHS:
+        if len(token) - length >= MIN_STEM and token[-length:] in RUSSIAN_ENDINGS:
+            return token[:-length]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Нормализация (регистр, ё, разметка), токенизация и стемминг"""
+    text = MARKUP_RE.sub(' ', text.lower().replace('ё', 'е'))
+    terms = []
+    for token in TOKEN_RE.findall(text):
+        if token in STOPWORDS:
+            continue
+        if '/' in token or '-' in token:
+            # "a/b" ищется и как есть, и как "ab"; "email-кампании" - еще и по частям
+            terms.append(token)
+            terms.append(re.sub(r"[/\-]", '', token))
+            terms.extend(stem(part) for part in re.split(r"[/\-]", token)
+                         if len(part) > 1 and part not in STOPWORDS)
+        else:
+            terms.append(stem(token))
+    return terms
+
+
+def case_fields(case: Dict) -> Dict[str, str]:
+    """Текстовые поля кейса любого типа"""
+    options = list(case.get('options', []))
+    explanation = [case.get('explanation', ''), case.get('revelation', '')]
+    explanation += case.get('questions', []) + case.get('hints', [])
+    for step in case.get('steps', []):
+        options.append(step['text'])
+        options.extend(step['options'])
+        explanation.extend(step.get('feedback', {}).values())
+    return {
+        'title': case.get('title', ''),
+        'description': case.get('description', ''),
+        'options': ' '.join(options),
+        'explanation': ' '.join(explanation),
+    }
+
+
+class CaseSearchIndex:
+    """
+    Инвертированный индекс кейсов с BM25.
+
+    Постинги хранятся в компактных array('i')/array('f') и при запросе
+    читаются как numpy-массивы без копирования, а очки документов
+    собираются одним np.bincount на термин. Удаленные кейсы помечаются
+    и физически убираются при компактизации.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Counter = Counter()
+        self._doc_terms: List[Optional[Counter]] = []
+        self._doc_len = array('f')
+        self._alive = array('b')
+        self._difficulty = array('b')
+        self._type = array('b')
+        self._codes: Dict[str, Dict[str, int]] = {'difficulty': {}, 'type': {}}
+        self.case_ids: List[str] = []
+        self._doc_of: Dict[str, int] = {}
+        self._total_len = 0.0
+        self._n_alive = 0
+
+    def __len__(self) -> int:
+        return self._n_alive
+
+    def _code(self, kind: str, value: Optional[str]) -> int:
+        codes = self._codes[kind]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    # ===== ОБНОВЛЕНИЕ ИНДЕКСА =====
+    def add_cases(self, cases: Iterable[Dict]):
+        """Добавляет кейсы; кейс с уже известным id переиндексируется"""
+        with self._lock:
+            for case in cases:
+                self._remove(case['id'])
+                self._add(case)
+
+    def remove_cases(self, case_ids: Iterable[str]):
+        """Удаляет кейсы из индекса"""
+        with self._lock:
+            for case_id in case_ids:
+                self._remove(case_id)
+            if len(self._doc_terms) > 2 * max(self._n_alive, 16):
+                self._compact()
+
+    def _add(self, case: Dict):
+        terms = Counter()
+        for field, text in case_fields(case).items():
+            weight = FIELD_WEIGHTS[field]
+            for term, count in Counter(tokenize(text)).items():
+                terms[term] += count * weight
+
+        doc = len(self._doc_terms)
+        for term, tf in terms.items():
+            docs, tfs = self._postings.setdefault(term, (array('i'), array('f')))
+            docs.append(doc)
+            tfs.append(tf)
+            self._df[term] += 1
+
+        length = float(sum(terms.values()))
+        self._doc_terms.append(terms)
+        self._doc_len.append(length)
+        self._alive.append(1)
+        self._difficulty.append(self._code('difficulty', case.get('difficulty')))
+        self._type.append(self._code('type', case.get('type', 'analysis')))
+        self.case_ids.append(case['id'])
+        self._doc_of[case['id']] = doc
+        self._total_len += length
+        self._n_alive += 1
+
+    def _remove(self, case_id: str):
+        doc = self._doc_of.pop(case_id, None)
+        if doc is None:
+            return
+        for term in self._doc_terms[doc]:
+            self._df[term] -= 1
+        self._total_len -= self._doc_len[doc]
+        self._alive[doc] = 0
+        self._doc_terms[doc] = None
+        self._n_alive -= 1
+
+    def _compact(self):
+        """Перестраивает постинги без удаленных документов"""
+        old_terms, old_ids = self._doc_terms, self.case_ids
+        old_difficulty, old_type = self._difficulty, self._type
+        self._postings, self._df = {}, Counter()
+        self._doc_terms, self.case_ids, self._doc_of = [], [], {}
+        self._doc_len, self._alive = array('f'), array('b')
+        self._difficulty, self._type = array('b'), array('b')
+
+        for doc, terms in enumerate(old_terms):
+            if terms is None:
+                continue
+            new_doc = len(self._doc_terms)
+            for term, tf in terms.items():
+                docs, tfs = self._postings.setdefault(term, (array('i'), array('f')))
+                docs.append(new_doc)
+                tfs.append(tf)
+                self._df[term] += 1
+            self._doc_terms.append(terms)
+            self._doc_len.append(float(sum(terms.values())))
+            self._alive.append(1)
+            self._difficulty.append(old_difficulty[doc])
+            self._type.append(old_type[doc])
+            self.case_ids.append(old_ids[doc])
+            self._doc_of[old_ids[doc]] = new_doc
+
+    # ===== ПОИСК =====
+    def search(self, query: str, difficulties: Optional[List[str]] = None,
+               types: Optional[List[str]] = None, limit: int = 20) -> List[Tuple[str, float]]:
+        """Топ кейсов по BM25 с фильтрами по сложности и типу"""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not terms or not self._n_alive:
+                return []
+
+            avg_len = self._total_len / self._n_alive
+            doc_len = np.frombuffer(self._doc_len, dtype=np.float32)
+            scores = np.zeros(n_docs)
+
+            for term in terms:
+                posting = self._postings.get(term)
+                df = self._df.get(term, 0)
+                if posting is None or df <= 0:
+                    continue
+                docs = np.frombuffer(posting[0], dtype=np.int32)
+                tfs = np.frombuffer(posting[1], dtype=np.float32)
+                idf = math.log(1 + (self._n_alive - df + 0.5) / (df + 0.5))
+                weights = idf * tfs * (K1 + 1) / (tfs + K1 * (1 - B + B * doc_len[docs] / avg_len))
+                scores += np.bincount(docs, weights=weights, minlength=n_docs)
+
+            mask = np.frombuffer(self._alive, dtype=np.int8) == 1
+            mask &= scores > 0
+            for kind, values, codes in (('difficulty', difficulties, self._difficulty),
+                                        ('type', types, self._type)):
+                if values:
+                    allowed = [self._codes[kind][value] for value in values if value in self._codes[kind]]
+                    mask &= np.isin(np.frombuffer(codes, dtype=np.int8), allowed)
+
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(self.case_ids[doc], float(scores[doc])) for doc in candidates]
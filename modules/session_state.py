@@ -0,0 +1,371 @@
+"""Компактное состояние сессии игрока: битовые множества, упакованные сценарии, вытеснение в SQLite"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Бюджет памяти на сессию и время простоя до вытеснения в хранилище
+SESSION_BUDGET_BYTES = 16 * 1024
+IDLE_EVICT_SECONDS = 30 * 60
+SWEEP_INTERVAL = 60.0
+# Сохраненное состояние игрока, не заходившего дольше этого срока, удаляется из хранилища
+STORE_TTL_SECONDS = 90 * 24 * 3600
+PURGE_INTERVAL = 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    player TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scenario_progress (
+    player TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    choices BLOB NOT NULL,
+    PRIMARY KEY (player, scenario)
+);
+"""
+
+
+# ===== ИНТЕРНИРОВАНИЕ И БИТОВЫЕ МНОЖЕСТВА =====
+class IdInterner:
+    """Номера строковых id, общие для всех сессий процесса; номер не меняется"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+
+    def index(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            with self._lock:
+                index = self._index.setdefault(value, len(self._ids))
+                if index == len(self._ids):
+                    self._ids.append(value)
+        return index
+
+    def value(self, index: int) -> str:
+        return self._ids[index]
+
+
+CASE_IDS = IdInterner()
+ACHIEVEMENT_TITLES = IdInterner()
+
+
+class IdSet:
+    """
+    Множество id как битовая маска в одном int.
+
+    Поддерживает то, что нужно игре от set: add, in, len, итерацию
+    (в порядке интернирования).
+    """
+    __slots__ = ('bits', '_interner')
+
+    def __init__(self, interner: IdInterner, values: Iterable[str] = ()):
+        self.bits = 0
+        self._interner = interner
+        for value in values:
+            self.add(value)
+
+    def add(self, value: str):
+        self.bits |= 1 << self._interner.index(value)
+
+    def __contains__(self, value: str) -> bool:
+        return bool(self.bits >> self._interner.index(value) & 1)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count('1')
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __iter__(self) -> Iterator[str]:
+        bits, index = self.bits, 0
+        while bits:
+            if bits & 1:
+                yield self._interner.value(index)
+            bits >>= 1
+            index += 1
+
+    def clear(self):
+        self.bits = 0
+
+
+# ===== ПРОГРЕСС СЦЕНАРИЕВ =====
+class ScenarioProgress:
+    """Ход сценария: очки и выбранные варианты по байту на шаг"""
+    __slots__ = ('score', 'choices')
+
+    def __init__(self, score: int = 0, choices: bytes = b''):
+        self.score = score
+        self.choices = choices
+
+    @property
+    def step(self) -> int:
+        return len(self.choices)
+
+    def record(self, choice: int, points: int = 0):
+        self.choices += bytes((choice,))
+        self.score += points
+
+
+# ===== СТАТИСТИКА ИГРОКА =====
+class PlayerStats:
+    """
+    Статистика игрока со слотами вместо словаря.
+
+    Доступ stats['score'] сохранен для кода и правил достижений,
+    которые обращаются к метрикам по имени.
+    """
+    __slots__ = ('player_id', 'score', 'level', 'current_streak', 'best_streak', 'play_time', 'started_at',
+                 'solved_cases', 'achievements', 'scenarios', 'last_seen', 'evicted', '__weakref__')
+
+    def __init__(self, player_id: str):
+        self.player_id = player_id
+        self.score = 0
+        self.level = 1
+        self.current_streak = 0
+        self.best_streak = 0
+        self.play_time = 0.0
+        self.started_at = time.time()
+        self.solved_cases = IdSet(CASE_IDS)
+        self.achievements = IdSet(ACHIEVEMENT_TITLES)
+        self.scenarios: Dict[str, ScenarioProgress] = {}
+        self.last_seen = self.started_at
+        self.evicted = False
+
+    def __getitem__(self, metric: str):
+        return getattr(self, metric)
+
+    def __setitem__(self, metric: str, value):
+        setattr(self, metric, value)
+
+    def nbytes(self) -> int:
+        """Оценка памяти, занятой статистикой (без общих интернеров)"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.solved_cases.bits) + sys.getsizeof(self.achievements.bits)
+        size += sys.getsizeof(self.scenarios)
+        for scenario_id, progress in self.scenarios.items():
+            size += sys.getsizeof(scenario_id) + sys.getsizeof(progress) + sys.getsizeof(progress.choices)
+        return size
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'score': self.score, 'level': self.level, 'current_streak': self.current_streak,
+            'best_streak': self.best_streak, 'play_time': self.play_time, 'started_at': self.started_at,
+            'solved_cases': list(self.solved_cases), 'achievements': list(self.achievements),
+        }, ensure_ascii=False)
+
+    def load_json(self, payload: str):
+        data = json.loads(payload)
+        for metric in ('score', 'level', 'current_streak', 'best_streak', 'play_time', 'started_at'):
+            setattr(self, metric, data[metric])
+        self.solved_cases = IdSet(CASE_IDS, data['solved_cases'])
+        self.achievements = IdSet(ACHIEVEMENT_TITLES, data['achievements'])
+
+
+# ===== ДОЛГОВРЕМЕННОЕ ХРАНИЛИЩЕ =====
+class SessionStore:
+    """SQLite-хранилище вытесненной статистики и истории сценариев"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def save_stats(self, *stats: PlayerStats):
+        with self._lock, self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                                   [(item.player_id, item.to_json(), time.time()) for item in stats])
+
+    def load_stats(self, player_id: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT payload FROM sessions WHERE player = ?", (player_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_scenarios(self, player_id: str, scenarios: Dict[str, ScenarioProgress]):
+        with self._lock, self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO scenario_progress VALUES (?, ?, ?, ?)",
+                                   [(player_id, scenario_id, progress.score, progress.choices)
+                                    for scenario_id, progress in scenarios.items()])
+
+    def load_scenario(self, player_id: str, scenario_id: str) -> Optional[ScenarioProgress]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT score, choices FROM scenario_progress WHERE player = ? AND scenario = ?",
+                                     (player_id, scenario_id)).fetchone()
+        return ScenarioProgress(row[0], bytes(row[1])) if row else None
+
+    def delete_player(self, player_id: str):
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM sessions WHERE player = ?", (player_id,))
+            connection.execute("DELETE FROM scenario_progress WHERE player = ?", (player_id,))
+
+    def delete_scenario(self, player_id: str, scenario_id: str):
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM scenario_progress WHERE player = ? AND scenario = ?",
+                               (player_id, scenario_id))
+
+    def purge_expired(self, before: float, keep: Iterable[str] = ()) -> int:
+        """
+        Удаляет статистику, сохраненную раньше before, вместе с историей
+        сценариев, и истории сценариев игроков без статистики. Игроки из
+        keep (живые сессии) не трогаются. Возвращает число удаленных игроков.
+        """
+        keep = set(keep)
+        with self._lock, self._connect() as connection:
+            expired = {row[0] for row in connection.execute(
+                "SELECT player FROM sessions WHERE updated < ? "
+                "UNION SELECT player FROM scenario_progress WHERE player NOT IN (SELECT player FROM sessions)",
+                (before,))} - keep
+            rows = [(player_id,) for player_id in expired]
+            connection.executemany("DELETE FROM sessions WHERE player = ?", rows)
+            connection.executemany("DELETE FROM scenario_progress WHERE player = ?", rows)
+        return len(expired)
+
+
+# ===== РЕЕСТР СЕССИЙ =====
+class SessionRegistry:
+    """
+    Слабые ссылки на статистику всех сессий процесса.
+
+    touch() вызывается на каждом rerun: отмечает активность, возвращает
+    вытесненное состояние из хранилища и держит сессию в бюджете памяти,
+    выгружая самые давние истории сценариев. Фоновый поток вытесняет
+    статистику сессий, простаивающих дольше idle_timeout, и раз в
+    PURGE_INTERVAL удаляет из хранилища игроков, не заходивших дольше ttl.
+    Закрытые сессии Streamlit освобождает сам - реестр их не удерживает.
+    """
+
+    def __init__(self, store: SessionStore, budget: int = SESSION_BUDGET_BYTES,
+                 idle_timeout: float = IDLE_EVICT_SECONDS, ttl: float = STORE_TTL_SECONDS):
+        self.store = store
+        self.budget = budget
+        self.idle_timeout = idle_timeout
+        self.ttl = ttl
+        self.evictions = 0
+        self.purged = 0
+        self._checkpointed_at = 0.0
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+        self._sessions: 'weakref.WeakValueDictionary[str, PlayerStats]' = weakref.WeakValueDictionary()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def touch(self, stats: PlayerStats):
+        """Отмечает активность сессии и поднимает ее из хранилища, если она была вытеснена"""
+        with self._lock:
+            self._sessions[stats.player_id] = stats
+            stats.last_seen = time.time()
+            if stats.evicted:
+                payload = self.store.load_stats(stats.player_id)
+                if payload is not None:
+                    stats.load_json(payload)
+                stats.evicted = False
+        self.enforce_budget(stats)
+
+    def get(self, player_id: str) -> Optional[PlayerStats]:
+        """Статистика живой сессии игрока или None"""
+        return self._sessions.get(player_id)
+
+    def save(self, player_ids: Iterable[str]) -> int:
+        """Сохраняет статистику указанных игроков одной транзакцией"""
+        with self._lock:
+            active = [stats for stats in map(self._sessions.get, player_ids)
+                      if stats is not None and not stats.evicted]
+            if active:
+                self.store.save_stats(*active)
+        return len(active)
+
+    def scenario(self, stats: PlayerStats, scenario_id: str) -> ScenarioProgress:
+        """Прогресс сценария из памяти или из хранилища; недавний сценарий переносится в конец"""
+        progress = stats.scenarios.pop(scenario_id, None)
+        if progress is None:
+            progress = self.store.load_scenario(stats.player_id, scenario_id) or ScenarioProgress()
+        stats.scenarios[scenario_id] = progress
+        return progress
+
+    def restart_scenario(self, stats: PlayerStats, scenario_id: str):
+        stats.scenarios.pop(scenario_id, None)
+        self.store.delete_scenario(stats.player_id, scenario_id)
+
+    def reset(self, stats: PlayerStats):
+        """Регистрирует новую статистику игрока и удаляет его сохраненное состояние"""
+        self.store.delete_player(stats.player_id)
+        self.touch(stats)
+
+    def enforce_budget(self, stats: PlayerStats):
+        """Выгружает самые давние истории сценариев, пока сессия не уложится в бюджет"""
+        spilled = {}
+        while stats.nbytes() > self.budget and len(stats.scenarios) > 1:
+            scenario_id = next(iter(stats.scenarios))
+            spilled[scenario_id] = stats.scenarios.pop(scenario_id)
+        if spilled:
+            self.store.save_scenarios(stats.player_id, spilled)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Вытесняет в хранилище сессии без активности дольше idle_timeout"""
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = [stats for stats in self._sessions.values()
+                    if not stats.evicted and now - stats.last_seen > self.idle_timeout]
+            for stats in idle:
+                self.store.save_stats(stats)
+                self.store.save_scenarios(stats.player_id, stats.scenarios)
+                stats.scenarios = {}
+                stats.solved_cases.clear()
+                stats.achievements.clear()
+                stats.evicted = True
+            self.evictions += len(idle)
+        return len(idle)
+
+    def checkpoint(self) -> int:
+        """Сохраняет статистику сессий, активных после прошлого сохранения (для офлайн-отчетов)"""
+        started = time.time()
+        with self._lock:
+            active = [stats for stats in self._sessions.values()
+                      if not stats.evicted and stats.last_seen >= self._checkpointed_at]
+            if active:
+                self.store.save_stats(*active)
+            self._checkpointed_at = started
+        return len(active)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Удаляет из хранилища игроков, не заходивших дольше ttl (кроме живых сессий)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            live = list(self._sessions.keys())
+        purged = self.store.purge_expired(now - self.ttl, keep=live)
+        self.purged += purged
+        self._purged_at = now
+        return purged
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL):
+        """Запускает фоновый поток сохранения, вытеснения и очистки хранилища"""
+        if self._sweeper is not None:
+            return
+
+        def sweep():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.checkpoint()
+                    self.evict_idle()
+                    if time.time() - self._purged_at > PURGE_INTERVAL:
+                        self.purge_expired()
+                except sqlite3.Error:  # повторим на следующем проходе
+                    pass
+
+        self._sweeper = threading.Thread(target=sweep, name='session-sweeper', daemon=True)
+        self._sweeper.start()
@@ -0,0 +1,181 @@
+"""Телеметрия игры: кольцевой буфер событий и пакетная запись в SQLite"""
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+BUFFER_CAPACITY = 65_536
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 4096
+# Паузы длиннее этой не считаются активной игрой
+IDLE_TIMEOUT = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    player TEXT NOT NULL,
+    case_id TEXT,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS events_player_ts ON events (player, ts);
+"""
+
+
+class Telemetry:
+    """
+    Сбор игровых событий (показ кейса, ответ со временем, подсказка, раскрытие).
+
+    record() только кладет кортеж в deque: append и popleft атомарны под GIL,
+    поэтому горячий путь обходится без блокировок. Когда буфер полон, новые
+    события отбрасываются и учитываются в dropped (под своей короткой
+    блокировкой, а не блокировкой записи) - игра никогда не ждет записи. Фоновый поток раз в FLUSH_INTERVAL забирает события пачками
+    и пишет каждую пачку в SQLite одной транзакцией; пачка, которую не
+    удалось записать, возвращается в буфер до следующей попытки.
+    """
+
+    def __init__(self, path: str, capacity: int = BUFFER_CAPACITY,
+                 flush_interval: float = FLUSH_INTERVAL, batch_size: int = FLUSH_BATCH):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer = deque()
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._flushed = 0
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    # ===== ГОРЯЧИЙ ПУТЬ =====
+    def record(self, kind: str, player: str, case_id: Optional[str] = None, value: Optional[float] = None):
+        """Записывает событие в буфер; при переполнении событие отбрасывается"""
+        if len(self._buffer) < self.capacity:
+            self._buffer.append((time.time(), kind, player, case_id, value))
+        else:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    # ===== ЗАПИСЬ В SQLITE =====
+    def flush(self) -> int:
+        """Переносит накопленные события в SQLite; возвращает число записанных"""
+        written = 0
+        with self._flush_lock:
+            connection = self._connect()
+            try:
+                while self._buffer:
+                    batch = self._drain(self.batch_size)
+                    try:
+                        with connection:
+                            connection.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", batch)
+                    except sqlite3.Error:
+                        # Пачка не записана: возвращаем ее в начало буфера в исходном порядке
+                        self._buffer.extendleft(reversed(batch))
+                        raise
+                    written += len(batch)
+                    self._flushed += len(batch)
+            finally:
+                connection.close()
+        return written
+
+    def _drain(self, limit: int) -> List[tuple]:
+        batch = []
+        popleft = self._buffer.popleft
+        try:
+            for _ in range(limit):
+                batch.append(popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def start_flusher(self):
+        """Запускает фоновый поток пакетной записи"""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.flush_interval):
+                try:
+                    self.flush()
+                    self.last_error = None
+                except sqlite3.Error as error:  # события остаются в буфере до следующей попытки
+                    self.last_error = str(error)
+            self.flush()
+
+        self._flusher = threading.Thread(target=run, name='telemetry-flusher', daemon=True)
+        self._flusher.start()
+
+    def close(self):
+        """Останавливает поток и дописывает остаток буфера"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        else:
+            self.flush()
+
+    # ===== СЧЕТЧИКИ И ЗАПРОСЫ =====
+    def stats(self) -> Dict[str, int]:
+        """Счетчики: принятые, отброшенные, ожидающие записи и записанные события"""
+        buffered = len(self._buffer)
+        return {
+            'recorded': self._flushed + buffered,
+            'dropped': self._dropped,
+            'buffered': buffered,
+            'flushed': self._flushed,
+        }
+
+    def events(self, player: str, kinds: Optional[Iterable[str]] = None) -> List[tuple]:
+        """События игрока из SQLite и еще не записанные из буфера, по времени"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT ts, kind, player, case_id, value FROM events WHERE player = ? ORDER BY ts",
+                (player,)).fetchall()
+        rows += [event for event in list(self._buffer) if event[2] == player]
+        if kinds is not None:
+            kinds = set(kinds)
+            rows = [row for row in rows if row[1] in kinds]
+        return sorted(rows)
+
+    def answers(self) -> List[tuple]:
+        """(игрок, кейс, верно ли) всех засчитанных ответов по времени - история для рейтингов"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT ts, player, case_id, kind = 'answer_correct' FROM events "
+                "WHERE kind IN ('answer_correct', 'answer_wrong') ORDER BY ts").fetchall()
+        rows += [(event[0], event[2], event[3], event[1] == 'answer_correct') for event in list(self._buffer)
+                 if event[1] in ('answer_correct', 'answer_wrong')]
+        return [(player, case_id, bool(correct)) for _, player, case_id, correct in sorted(rows)]
+
+    def play_time(self, player: str, idle_timeout: float = IDLE_TIMEOUT) -> float:
+        """Активное время игры игрока в секундах по журналу событий"""
+        return active_time([event[0] for event in self.events(player)], idle_timeout)
+
+
+def active_time(timestamps: Iterable[float], idle_timeout: float = IDLE_TIMEOUT) -> float:
+    """
+    Сумма пауз между соседними событиями, не превышающих idle_timeout:
+    долгая пауза означает, что игрок отходил, и в игровое время не входит.
+    """
+    total, previous = 0.0, None
+    for ts in timestamps:
+        total += active_gap(previous, ts, idle_timeout)
+        previous = ts
+    return total
+
+
+def active_gap(previous: Optional[float], ts: float, idle_timeout: float = IDLE_TIMEOUT) -> float:
+    """Вклад паузы между двумя событиями в активное время"""
+    if previous is None or ts - previous > idle_timeout:
+        return 0.0
+    return ts - previous
@@ -0,0 +1,165 @@
+"""
+Запись обезличенных трасс взаимодействия игроков для воспроизведения
+на новой сборке (tools/replay_traces.py).
+
+Трасса - файл JSONL: заголовок и по строке на rerun с изменившимися
+виджетами и временем обработки rerun на сервере. Пишутся только виджеты
+из TRACED_WIDGETS (режим, выбор кейса и галерея, ответы, кнопки, ползунки); тексты,
+поисковые запросы, код ведущего и id игрока в трассу не попадают, а
+сама трасса получает случайный id.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# 2: режим, выбор кейса и ответы пишутся id и номерами вариантов, а не подписями
+TRACE_VERSION = 2
+
+# (префикс ключа виджета, действие, кнопка ли); порядок важен: scenario_choice раньше scenario_
+TRACED_WIDGETS: List[Tuple[str, str, bool]] = [
+    ('game_mode', 'mode', False),
+    ('locale', 'locale', False),
+    ('difficulty', 'difficulty', False),
+    ('analysis_case_', 'pick_case', False),
+    ('recommended_', 'pick_recommended', True),
+    ('scenario_choice', 'pick_scenario', False),
+    ('bias_choice', 'pick_bias', False),
+    ('dataset_choice', 'pick_dataset', False),
+    ('gallery_open_', 'gallery_open', True),
+    ('gallery_prev_', 'gallery_page', True),
+    ('gallery_next_', 'gallery_page', True),
+    ('random_case', 'random_case', True),
+    ('case_', 'answer_choice', False),
+    ('check_', 'answer', True),
+    ('hint_', 'hint', True),
+    ('scenario_', 'scenario_choice', False),
+    ('bias_hint_', 'bias_hint', True),
+    ('bias_reveal_', 'bias_reveal', True),
+    ('bias_understood_', 'bias_understood', True),
+    ('ds_', 'dataset_slice', False),
+    ('boot_', 'bootstrap', False),
+    ('cohort_', 'cohorts', False),
+]
+# Кнопки сценария лежат под тем же префиксом, что и радио шага
+SCENARIO_BUTTONS = ('_decide_', '_restart')
+# Параметры ссылки, с которыми сессия открыта (tools/build_static.py)
+TRACED_QUERY = ('mode', 'case', 'lang')
+
+
+def traced_widget(key: str) -> Optional[Tuple[str, bool]]:
+    """(действие, кнопка ли) для ключа виджета или None, если виджет не пишется"""
+    for prefix, action, is_button in TRACED_WIDGETS:
+        if key.startswith(prefix):
+            if prefix == 'scenario_' and any(part in key for part in SCENARIO_BUTTONS):
+                return 'scenario_step' if '_decide_' in key else 'scenario_restart', True
+            return action, is_button
+    return None
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return str(value)
+
+
+def widget_snapshot(state: Mapping) -> Dict[str, Any]:
+    """Значения отслеживаемых виджетов-значений (без кнопок)"""
+    snapshot = {}
+    for key in list(state.keys()):
+        traced = traced_widget(key)
+        if traced is not None and not traced[1]:
+            snapshot[key] = _jsonable(state[key])
+    return snapshot
+
+
+def widget_changes(state: Mapping, previous: Mapping) -> List[List]:
+    """
+    [ключ, действие, значение] виджетов, изменившихся с конца прошлого
+    rerun, и нажатых кнопок. Вызывается в начале rerun: к этому моменту
+    в session_state уже лежат значения, присланные браузером.
+    """
+    changes = []
+    for key in list(state.keys()):
+        traced = traced_widget(key)
+        if traced is None:
+            continue
+        action, is_button = traced
+        value = state[key]
+        if is_button:
+            if value is True:
+                changes.append([key, action, True])
+        elif key in previous and previous[key] != _jsonable(value):
+            changes.append([key, action, _jsonable(value)])
+    # Кнопка - последнее действие rerun: сначала выставляются значения
+    changes.sort(key=lambda change: traced_widget(change[0])[1])
+    return changes
+
+
+# ===== ЗАПИСЬ =====
+class TraceRecorder:
+    """
+    Пишет трассы выбранной доли сессий в directory/<id>.jsonl.
+
+    Строка дописывается сразу после rerun, поэтому трасса оборванной
+    сессии тоже пригодна для воспроизведения.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 1.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.recorded_steps = 0
+
+    def start(self, query: Mapping[str, str]) -> Optional[str]:
+        """Начинает трассу новой сессии; None, если сессия не попала в выборку"""
+        if random.random() >= self.sample_rate:
+            return None
+        trace_id = uuid.uuid4().hex[:12]
+        header = {
+            'trace': trace_id,
+            'version': TRACE_VERSION,
+            'date': time.strftime('%Y-%m-%d'),
+            'query': {name: query[name] for name in TRACED_QUERY if name in query},
+        }
+        self._append(trace_id, header)
+        return trace_id
+
+    def record(self, trace_id: str, offset: float, duration: float, changes: List[List]):
+        """Один rerun: время от начала сессии, время обработки и изменения виджетов"""
+        self._append(trace_id, {'t': round(offset, 3), 'ms': round(duration * 1000, 2), 'changes': changes})
+        self.recorded_steps += 1
+
+    def _append(self, trace_id: str, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock, open(self.directory / f"{trace_id}.jsonl", 'a', encoding='utf-8') as trace_file:
+            trace_file.write(line)
+
+
+# ===== ЧТЕНИЕ =====
+class Trace(NamedTuple):
+    trace_id: str
+    query: Dict[str, str]
+    steps: List[Dict]
+
+
+def load_trace(path: Path) -> Trace:
+    with open(path, encoding='utf-8') as trace_file:
+        header, *steps = (json.loads(line) for line in trace_file if line.strip())
+    if header.get('version') != TRACE_VERSION:
+        raise ValueError(f"{path.name}: неподдерживаемая версия трассы {header.get('version')!r}")
+    return Trace(header['trace'], header.get('query', {}), steps)
+
+
+def load_traces(paths: Iterable[str]) -> List[Trace]:
+    """Трассы из файлов и каталогов (*.jsonl) в порядке имен"""
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.glob('*.jsonl')) if path.is_dir() else [path]
+    return [load_trace(path) for path in files]
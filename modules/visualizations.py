@@ -0,0 +1,226 @@
+"""
+Графики кейсов и кэш их отрисовки.
+
+Подписи графиков написаны на исходном языке; построители получают
+translate - перевод строки на язык сессии (по умолчанию строка как есть).
+"""
+import io
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+FUNNEL_LABELS = {
+    'emails_sent': 'Отправлено',
+    'opened': 'Открыто',
+    'clicked': 'Перешли',
+    'purchased': 'Купили',
+}
+FUNNEL_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
+
+
+# ===== ПОСТРОИТЕЛИ ГРАФИКОВ =====
+def build_funnel_figure(case: Dict, reveal_bias: bool = False, figsize=(10, 6), translate: Callable[[str], str] = str,
+                        tight: bool = True):
+    """Воронка конверсии"""
+    chart_data = case['chart_data']
+    fig, ax = plt.subplots(figsize=figsize)
+
+    stages = [translate(FUNNEL_LABELS.get(key, key)) for key in chart_data]
+    values = list(chart_data.values())
+    colors = [FUNNEL_COLORS[i % len(FUNNEL_COLORS)] for i in range(len(values))]
+
+    bars = ax.bar(stages, values, color=colors, alpha=0.7)
+
+    # Добавляем проценты
+    for i, (bar, value) in enumerate(zip(bars, values)):
+        if i > 0:
+            pct = (value / values[i-1]) * 100
+            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(values) * 0.01,
+                    f'{pct:.1f}%', ha='center', va='bottom', fontweight='bold')
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height()/2,
+                f'{value:,}', ha='center', va='center', color='white', fontweight='bold')
+
+    ax.set_title(translate("Воронка email-кампании" if 'emails_sent' in chart_data else "Воронка конверсии"),
+                 fontsize=14)
+    ax.set_ylabel(translate("Количество"))
+
+    if tight:
+        fig.tight_layout()
+    return fig
+
+
+def build_segments_figure(case: Dict, reveal_bias: bool = False, figsize=(14, 6), translate: Callable[[str], str] = str,
+                          tight: bool = True):
+    """Общий показатель против показателей по сегментам (парадокс Симпсона)"""
+    chart_data = case['chart_data']
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
+
+    # Общие результаты
+    groups = list(chart_data['total'])
+    channels = [translate('Канал {group}').format(group=group) for group in groups]
+    colors = ['blue', 'red', 'green', 'orange']
+    ax1.bar(channels, [chart_data['total'][group] * 100 for group in groups],
+            color=colors[:len(groups)], alpha=0.7)
+    ax1.set_title(translate("Общий CTR (%)"))
+    ax1.set_ylabel("CTR (%)")
+
+    # По сегментам
+    segments = [segment for segment in chart_data if segment != 'total']
+    x = np.arange(len(segments))
+    width = 0.7 / len(groups)
+
+    for i, (group, channel) in enumerate(zip(groups, channels)):
+        values = [round(chart_data[segment][group] * 100, 1) for segment in segments]
+        ax2.bar(x + (i - (len(groups) - 1) / 2) * width, values, width,
+                label=channel, color=colors[i % len(colors)], alpha=0.7)
+
+    ax2.set_title(translate("CTR по устройствам (%)"))
+    ax2.set_ylabel("CTR (%)")
+    ax2.set_xticks(x)
+    ax2.set_xticklabels([segment.capitalize() for segment in segments])
+    ax2.legend()
+
+    if tight:
+        fig.tight_layout()
+    return fig
+
+
+def build_survivorship_figure(case: Dict, reveal_bias: bool = False, figsize=(10, 6),
+                              translate: Callable[[str], str] = str, tight: bool = True):
+    """Подписки по версиям; при раскрытии - retention через месяц"""
+    chart_data = case['chart_data']
+    fig, ax = plt.subplots(figsize=figsize)
+
+    versions = [translate('Версия {variant}').format(variant=variant) for variant in ('A', 'B')]
+    subscriptions = chart_data['subscribed']
+
+    bars = ax.bar(versions, subscriptions, color=['blue', 'orange'], alpha=0.7)
+
+    # Добавляем проценты
+    for bar, sub, shown in zip(bars, subscriptions, chart_data['shown']):
+        pct = (sub / shown) * 100
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
+                f'{pct:.0f}%', ha='center', va='bottom', fontweight='bold')
+
+    ax.set_title(translate("Результаты A/B теста подписок") +
+                 (translate(" (ПОЛНАЯ КАРТИНА)") if reveal_bias else ""), fontsize=14)
+    ax.set_ylabel(translate("Количество подписок"))
+
+    if reveal_bias:
+        # Показываем retention
+        ax2 = ax.twinx()
+        retention = [active/sub * 100 for active, sub in
+                     zip(chart_data['active_after_month'], subscriptions)]
+
+        ax2.plot(versions, retention, 'ro-', linewidth=3, markersize=10,
+                 label=translate('Retention через месяц (%)'))
+        ax2.set_ylabel("Retention (%)", color='red')
+        ax2.tick_params(axis='y', labelcolor='red')
+
+        # Добавляем аннотации retention
+        for i, ret in enumerate(retention):
+            ax2.annotate(f'{ret:.0f}%', xy=(i, ret), xytext=(10, 10),
+                         textcoords='offset points', color='red', fontweight='bold')
+
+        ax2.legend(loc='upper right')
+
+    if tight:
+        fig.tight_layout()
+    return fig
+
+
+def build_seasonal_figure(case: Dict, reveal_bias: bool = False, figsize=(10, 6),
+                          translate: Callable[[str], str] = str, tight: bool = True):
+    """Расходы на рекламу и выручка по месяцам на двух осях"""
+    chart_data = case['chart_data']
+    fig, ax = plt.subplots(figsize=figsize)
+
+    months = chart_data['months']
+    ax.plot(months, chart_data['ad_spend'], 'o-', color='#1f77b4', label=translate('Расходы на рекламу'))
+    ax.set_xlabel(translate("Месяц"))
+    ax.set_ylabel(translate("Расходы на рекламу, $"), color='#1f77b4')
+    ax.tick_params(axis='y', labelcolor='#1f77b4')
+
+    ax2 = ax.twinx()
+    ax2.plot(months, chart_data['revenue'], 's-', color='#ff7f0e', label=translate('Выручка'))
+    ax2.set_ylabel(translate("Выручка, $"), color='#ff7f0e')
+    ax2.tick_params(axis='y', labelcolor='#ff7f0e')
+
+    ax.set_title(translate("Реклама и выручка по месяцам"), fontsize=14)
+    ax2.legend(handles=ax.get_lines() + ax2.get_lines(), loc='upper left')
+
+    if tight:
+        fig.tight_layout()
+    return fig
+
+
+CHART_BUILDERS: Dict[str, Callable] = {
+    'funnel': build_funnel_figure,
+    'segments': build_segments_figure,
+    'survivorship': build_survivorship_figure,
+    'seasonal': build_seasonal_figure,
+}
+
+
+def build_case_figure(case: Dict, reveal_bias: bool = False, **figure_params):
+    """
+    Фигура для кейса по его chart_type или None, если графика нет;
+    figure_params - figsize, translate и tight (подгонка полей, для миниатюр не нужна)
+    """
+    builder = CHART_BUILDERS.get(case.get('chart_type'))
+    if builder is None or not case.get('chart_data'):
+        return None
+    return builder(case, reveal_bias=reveal_bias, **figure_params)
+
+
+def figure_to_png(fig, dpi: int = 100) -> bytes:
+    """Сохраняет фигуру в PNG и закрывает ее"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# ===== КЭШ ОТРИСОВКИ =====
+class RenderCache:
+    """
+    Кэш отрисованных графиков и текстов кейсов, общий для всех сессий.
+
+    Запись хранится вместе с хэшем содержимого кейса; при перезагрузке
+    контента инвалидируются только записи измененных кейсов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+
+    def get(self, case_id: str, key, content_hash: str, render: Callable[[], object]):
+        """Значение из кэша или результат render(), если записи нет или кейс изменился"""
+        with self._lock:
+            entry = self._entries.get(case_id, {}).get(key)
+        if entry is not None and entry[0] == content_hash:
+            return entry[1]
+
+        value = render()
+        with self._lock:
+            self._entries.setdefault(case_id, {})[key] = (content_hash, value)
+        return value
+
+    def invalidate(self, case_ids: Iterable[str]):
+        """Удаляет все записи указанных кейсов"""
+        with self._lock:
+            for case_id in case_ids:
+                self._entries.pop(case_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+
+def render_case_png(case: Dict, reveal_bias: bool = False, dpi: int = 100,
+                    translate: Callable[[str], str] = str) -> Optional[bytes]:
+    """PNG графика кейса или None"""
+    fig = build_case_figure(case, reveal_bias=reveal_bias, translate=translate)
+    return figure_to_png(fig, dpi=dpi) if fig is not None else None
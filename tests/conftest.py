@@ -0,0 +1,21 @@
+"""Общие фикстуры: корень проекта в sys.path и сессия приложения в AppTest"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Сессия приложения; пути к data/ в приложении относительные, поэтому запускаем из корня"""
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv('DETECTIVE_FEEDBACK_DELAY', '0')
+    at = AppTest.from_file(str(ROOT / 'detective_main_structure.py'), default_timeout=90)
+    at.run()
+    assert not at.exception
+    return at
@@ -0,0 +1,100 @@
+"""Поведение приложения в AppTest"""
+from modules.content import ContentSnapshot, ContentStore
+from tests.conftest import ROOT
+
+
+def content():
+    return ContentStore(str(ROOT / 'data')).snapshot
+
+
+def test_case_selection_survives_scheduler_update(app):
+    app.selectbox(key='game_mode').set_value('error_hunting').run()
+    app.selectbox(key='difficulty').set_value('Новичок').run()
+    app.selectbox(key='analysis_case_Новичок').set_value('cherry_picking').run()
+
+    case = content().cases['cherry_picking']
+    app.radio(key='case_cherry_picking').set_value(case['correct'])
+    app.button(key='check_cherry_picking').click().run()
+    assert app.success, "правильный ответ не засчитан"
+
+    # Ответ обновил планировщик и рекомендацию, но выбор игрока остался
+    app.button(key='hint_cherry_picking').click().run()
+    assert not app.exception
+    assert app.selectbox(key='analysis_case_Новичок').value == 'cherry_picking'
+    # st.info выносит эмодзи в иконку - сравниваем текст подсказки без него
+    hint = content().hint('cherry_picking').split(maxsplit=1)[1]
+    assert any(hint in info.value for info in app.info)
+
+
+def test_recommended_button_selects_recommendation(app):
+    app.selectbox(key='game_mode').set_value('error_hunting').run()
+    app.selectbox(key='difficulty').set_value('Новичок').run()
+    pool = 'analysis:Новичок'
+    recommended = app.session_state.scheduler.next_case(pool, content().pools[pool])
+    other = next(case_id for case_id in content().pools[pool] if case_id != recommended)
+    app.selectbox(key='analysis_case_Новичок').set_value(other).run()
+
+    button = app.button(key='recommended_Новичок')
+    assert not button.disabled
+    button.click().run()
+    assert app.selectbox(key='analysis_case_Новичок').value == recommended
+    assert app.button(key='recommended_Новичок').disabled
+
+
+def test_repeated_check_records_first_answer_only(app):
+    app.selectbox(key='game_mode').set_value('error_hunting').run()
+    app.selectbox(key='difficulty').set_value('Новичок').run()
+    app.selectbox(key='analysis_case_Новичок').set_value('cherry_picking').run()
+    app.radio(key='case_cherry_picking').set_value(content().cases['cherry_picking']['correct'])
+
+    app.button(key='check_cherry_picking').click().run()
+    clock, score = app.session_state.scheduler.clock, app.session_state.player_stats.score
+    app.button(key='check_cherry_picking').click().run()
+
+    assert app.success
+    assert app.session_state.scheduler.clock == clock
+    assert app.session_state.player_stats.score == score
+
+
+def test_repeated_bias_answers_record_first_answer_only(app):
+    app.selectbox(key='game_mode').set_value('bias_detection').run()
+    app.selectbox(key='bias_choice').set_value('survivorship_bias').run()
+
+    app.button(key='bias_understood_survivorship_bias').click().run()
+    clock, score = app.session_state.scheduler.clock, app.session_state.player_stats.score
+    app.button(key='bias_understood_survivorship_bias').click().run()
+    app.button(key='bias_reveal_survivorship_bias').click().run()
+
+    assert not app.exception
+    assert app.session_state.scheduler.clock == clock
+    assert app.session_state.player_stats.score == score
+
+
+def test_case_removed_by_reload_falls_back_to_fresh_snapshot(app):
+    # Снимок сессии еще знает кейс, которого в свежем снимке хранилища уже нет
+    fresh = content()
+    ghost = dict(fresh.cases['cherry_picking'], id='ghost_case', title='Удаленный кейс')
+    stale = ContentSnapshot(fresh.version, {**fresh.cases, 'ghost_case': ghost},
+                            {'cases': fresh.hints, 'default': fresh.default_hint}, fresh.achievements,
+                            {**fresh.hashes, 'ghost_case': 'ghost'})
+    app.selectbox(key='game_mode').set_value('error_hunting').run()
+    app.selectbox(key='difficulty').set_value(ghost['difficulty']).run()
+    app.session_state['content'] = stale
+    app.run()
+
+    app.selectbox(key=f"analysis_case_{ghost['difficulty']}").set_value('ghost_case').run()
+    assert not app.exception
+    assert app.session_state['current_case'] in fresh.cases
+    assert app.session_state['content'] is not stale
+    assert app.warning
+
+
+def test_first_award_shows_achievement_in_same_rerun(app):
+    app.selectbox(key='game_mode').set_value('error_hunting').run()
+    app.selectbox(key='difficulty').set_value('Новичок').run()
+    app.selectbox(key='analysis_case_Новичок').set_value('cherry_picking').run()
+
+    case = content().cases['cherry_picking']
+    app.radio(key='case_cherry_picking').set_value(case['correct'])
+    app.button(key='check_cherry_picking').click().run()
+    assert any("Первые шаги" in toast.value for toast in app.toast)
@@ -0,0 +1,26 @@
+"""Генератор кейсов: графики у всех семейств с данными графика"""
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from modules.case_generator import FAMILIES, finish_case
+from modules.visualizations import CHART_BUILDERS, build_case_figure
+
+
+@pytest.mark.parametrize('name', sorted(FAMILIES))
+def test_chart_data_has_a_chart(name):
+    case, _ = FAMILIES[name].generate(np.random.default_rng(0))
+    if not case.get('chart_data'):
+        return
+    assert case.get('chart_type') in CHART_BUILDERS
+    fig = build_case_figure(case)
+    assert fig is not None
+    plt.close(fig)
+
+
+def test_generated_titles_keep_the_family_title():
+    family = FAMILIES['funnel']
+    case, features = family.generate(np.random.default_rng(0))
+    finished = finish_case(family, dict(case), features)
+    assert finished['title'] == case['title']
+    assert finished['id'].startswith('gen_funnel_')
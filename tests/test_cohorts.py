@@ -0,0 +1,34 @@
+"""Кривые Каплана-Мейера и смена лидера по удержанию"""
+import numpy as np
+
+from modules.cohorts import flip_weeks, kaplan_meier, simulate_retention, winner_at
+
+
+def test_kaplan_meier_matches_hand_computed_curve():
+    # Группа 0: отписки на неделях 1, 2, 3, цензурирование на 2 и 4.
+    # S(1) = 4/5, S(2) = 4/5 * 3/4, S(3) = 0.6 * 1/2, на неделе 4 событий нет
+    # Группа 1: единственная отписка на неделе 1, дальше под риском никого
+    durations = np.array([1, 2, 2, 3, 4, 1])
+    observed = np.array([True, True, False, True, False, True])
+    groups = np.array([0, 0, 0, 0, 0, 1])
+
+    survival, at_risk = kaplan_meier(durations, observed, groups, 2, weeks=4)
+    np.testing.assert_allclose(survival[0], [1.0, 0.8, 0.6, 0.3, 0.3])
+    np.testing.assert_array_equal(at_risk[0], [5, 5, 4, 2, 1])
+    np.testing.assert_allclose(survival[1, :2], [1.0, 0.0])
+    assert np.isnan(survival[1, 2:]).all()
+    np.testing.assert_array_equal(at_risk[1], [1, 1, 0, 0, 0])
+
+
+def test_flip_weeks_ignores_ties_and_missing_weeks():
+    active = np.array([[100, 90, 80, 70, np.nan, 60],
+                       [120, 90, 60, 75, np.nan, 50]])
+    assert flip_weeks(active) == [2, 3, 5]
+
+
+def test_leader_flips_when_b_churns_much_faster():
+    result = simulate_retention(subscribed=(1000, 1500), hazards=(0.02, 0.3), shapes=(1.0, 1.0),
+                                cohorts=4, weeks=20, seed=1)
+    assert winner_at(result, 0) == 'B'
+    assert winner_at(result, 12) == 'A'
+    assert len(result['flip_weeks']) == 1 and 0 < result['flip_weeks'][0] <= 12
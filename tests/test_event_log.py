@@ -0,0 +1,17 @@
+"""Журналы событий: повторное использование и перегенерация"""
+from modules.event_log import EventLog, ensure_event_log
+
+
+def test_event_log_is_regenerated_when_seed_changes(tmp_path):
+    path = tmp_path / 'log'
+    ensure_event_log(str(path), 'channel_mix', 5000, seed=1)
+    first = EventLog(str(path)).column('converted').copy()
+    mtime = (path / 'schema.json').stat().st_mtime_ns
+
+    ensure_event_log(str(path), 'channel_mix', 5000, seed=1)
+    assert (path / 'schema.json').stat().st_mtime_ns == mtime
+
+    ensure_event_log(str(path), 'channel_mix', 5000, seed=2)
+    log = EventLog(str(path))
+    assert log.schema['seed'] == 2 and log.schema['generator'] == 'channel_mix'
+    assert (log.column('converted') != first).any()
@@ -0,0 +1,62 @@
+"""Архив выгрузки отчетов по частям: перезапись и возобновление"""
+import zipfile
+
+from tools.export_reports import PartedZip
+
+
+def names(path):
+    with zipfile.ZipFile(path) as archive:
+        return sorted(archive.namelist())
+
+
+def export(out, reports, resume=False, part_size=2):
+    archive = PartedZip(out, part_size, resume=resume)
+    for name in reports:
+        if name not in archive.done:
+            archive.write(name, name.encode())
+    archive.merge()
+    return archive
+
+
+def test_finished_archive_is_overwritten(tmp_path):
+    out = tmp_path / 'reports.zip'
+    export(out, ['a.png', 'b.png', 'c.png'])
+    export(out, ['a.png', 'd.png'])
+    assert names(out) == ['a.png', 'd.png']
+    assert not (tmp_path / 'reports.zip.parts').exists()
+
+
+def test_resume_appends_to_finished_archive(tmp_path):
+    out = tmp_path / 'reports.zip'
+    export(out, ['a.png', 'b.png'])
+    export(out, ['a.png', 'c.png'], resume=True)
+    assert names(out) == ['a.png', 'b.png', 'c.png']
+
+
+def interrupt(out):
+    """Выгрузка оборвалась: первая часть закрыта, вторая осталась .partial"""
+    archive = PartedZip(out, part_size=2)
+    for name in ['a.png', 'b.png', 'c.png']:
+        archive.write(name, name.encode())
+
+
+def test_interrupted_export_continues_with_resume(tmp_path):
+    out = tmp_path / 'reports.zip'
+    interrupt(out)
+
+    resumed = PartedZip(out, part_size=2, resume=True)
+    assert resumed.done == {'a.png', 'b.png'}
+    for name in ['a.png', 'b.png', 'c.png', 'd.png']:
+        if name not in resumed.done:
+            resumed.write(name, name.encode())
+    resumed.merge()
+    assert names(out) == ['a.png', 'b.png', 'c.png', 'd.png']
+
+
+def test_interrupted_export_starts_fresh_without_resume(tmp_path):
+    out = tmp_path / 'reports.zip'
+    interrupt(out)
+
+    assert PartedZip(out, part_size=2).done == set()
+    export(out, ['d.png'])
+    assert names(out) == ['d.png']
@@ -0,0 +1,25 @@
+"""Миниатюры галереи: отрисовка в пуле процессов"""
+from modules.content import ContentStore
+from modules.gallery import ThumbnailStore, thumbnail_key
+from tests.conftest import ROOT
+
+
+def test_missing_thumbnails_are_rendered_by_the_pool(tmp_path):
+    cases = [case for case in ContentStore(str(ROOT / 'data')).snapshot.cases.values() if thumbnail_key(case)]
+    store = ThumbnailStore(str(tmp_path), workers=1)
+    try:
+        assert all(store.get(case) is None for case in cases)
+        assert store.wait(store.request(cases), timeout=60)
+        assert all(store.get(case) for case in cases)
+        assert store.request(cases) == [] and not store.failed
+    finally:
+        store.close()
+
+
+def test_chart_without_builder_gets_no_thumbnail(tmp_path):
+    case = {'id': 'unknown', 'chart_type': 'heatmap', 'chart_data': {'values': [1, 2, 3]}}
+    assert thumbnail_key(case) is None
+
+    store = ThumbnailStore(str(tmp_path), workers=1)
+    assert store.request([case]) == []
+    assert store.pending == 0
@@ -0,0 +1,48 @@
+"""Каталоги переводов: компиляция в .mo и сессия на английском"""
+import json
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from modules.i18n import compile_catalog, is_stale, load_catalog
+from tests.conftest import ROOT
+
+
+def test_compiled_catalog_round_trip(tmp_path):
+    messages = {'Привет': 'Hello', 'Кейс «A/B» — 5%': 'Case “A/B” — 5%', 'Не переведено': ''}
+    (tmp_path / 'en.json').write_text(json.dumps({'locale': 'en', 'messages': messages}, ensure_ascii=False),
+                                      encoding='utf-8')
+    assert is_stale('en', str(tmp_path))
+    assert compile_catalog('en', str(tmp_path)) == 2
+    assert not is_stale('en', str(tmp_path))
+
+    catalog = load_catalog('en', str(tmp_path))
+    assert catalog.gettext('Привет') == 'Hello'
+    assert catalog.gettext('Кейс «A/B» — 5%') == 'Case “A/B” — 5%'
+    assert catalog.gettext('Не переведено') == 'Не переведено'
+    assert load_catalog('ru', str(tmp_path)).gettext('Привет') == 'Привет'
+
+
+@pytest.fixture
+def app_en(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv('DETECTIVE_FEEDBACK_DELAY', '0')
+    at = AppTest.from_file(str(ROOT / 'detective_main_structure.py'), default_timeout=90)
+    at.query_params['lang'] = 'en'
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_english_session_routes_modes_and_searches_translations(app_en):
+    english = json.loads((ROOT / 'locales' / 'en.json').read_text(encoding='utf-8'))['messages']
+    app_en.selectbox(key='game_mode').set_value('error_hunting').run()
+    assert not app_en.exception
+    assert english["## 🔍 Охота за ошибками в анализе"] in [markdown.value for markdown in app_en.markdown]
+
+    # Английские слова ищутся по переведенным текстам кейсов
+    app_en.selectbox(key='game_mode').set_value('search').run()
+    app_en.text_input(key='search_query').input('campaign').run()
+    assert not app_en.exception
+    title = english["Анализ конверсии email-кампании"]
+    assert any(option.startswith(title) for option in app_en.radio(key='search_result').options)
@@ -0,0 +1,27 @@
+"""Токенизация и поиск кейсов"""
+from modules.search import CaseSearchIndex, stem, tokenize
+
+
+def test_hyphenated_token_is_indexed_whole_joined_and_by_parts():
+    terms = tokenize("Анализ email-кампании")
+    assert 'email-кампании' in terms
+    assert 'emailкампании' in terms
+    assert 'email' in terms
+    assert stem('кампании') in terms
+
+
+def test_slash_token_skips_single_letter_parts():
+    terms = tokenize("A/B тест")
+    assert 'a/b' in terms and 'ab' in terms
+    assert 'a' not in terms and 'b' not in terms
+
+
+def test_query_matches_part_of_hyphenated_word():
+    index = CaseSearchIndex()
+    index.add_cases([
+        {'id': 'email', 'type': 'analysis', 'difficulty': 'Новичок', 'title': "Анализ email-кампании",
+         'description': "Письма и покупки"},
+        {'id': 'other', 'type': 'analysis', 'difficulty': 'Новичок', 'title': "Парадокс Симпсона",
+         'description': "Каналы и устройства"},
+    ])
+    assert [hit[0] for hit in index.search("кампании")][:1] == ['email']
@@ -0,0 +1,26 @@
+"""Хранилище сессий: очистка давно не заходивших игроков"""
+import time
+
+from modules.session_state import PlayerStats, ScenarioProgress, SessionRegistry, SessionStore
+
+
+def test_purge_removes_expired_players_only(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.sqlite3'))
+    registry = SessionRegistry(store, ttl=60)
+    live = PlayerStats('live')
+    store.save_stats(PlayerStats('old'), live)
+    store.save_scenarios('old', {'scenario': ScenarioProgress(5, b'\x01')})
+    store.save_scenarios('orphan', {'scenario': ScenarioProgress(1, b'\x00')})
+    registry.touch(live)
+    cutoff = time.time()
+    time.sleep(0.01)
+    store.save_stats(PlayerStats('recent'))
+
+    # Срок истек для всего, что сохранено до cutoff, но живая сессия остается
+    assert registry.purge_expired(now=cutoff + registry.ttl) == 2
+    assert store.load_stats('old') is None
+    assert store.load_scenario('old', 'scenario') is None
+    assert store.load_scenario('orphan', 'scenario') is None
+    assert store.load_stats('live') is not None
+    assert store.load_stats('recent') is not None
+    assert registry.purged == 2
@@ -0,0 +1,66 @@
+"""Телеметрия: учет событий при сбоях записи"""
+import sqlite3
+
+import pytest
+
+from modules.rating import RatingEngine
+from modules.telemetry import SCHEMA, Telemetry
+
+
+def test_failed_flush_keeps_events_in_buffer(tmp_path):
+    telemetry = Telemetry(str(tmp_path / 'telemetry.sqlite3'), batch_size=4)
+    for number in range(10):
+        telemetry.record('answer', 'player', f"case_{number}", number)
+    with sqlite3.connect(telemetry.path) as connection:
+        connection.execute("DROP TABLE events")
+
+    with pytest.raises(sqlite3.Error):
+        telemetry.flush()
+    assert telemetry.stats() == {'recorded': 10, 'dropped': 0, 'buffered': 10, 'flushed': 0}
+
+    with sqlite3.connect(telemetry.path) as connection:
+        connection.executescript(SCHEMA)
+    assert telemetry.flush() == 10
+    assert [event[3] for event in telemetry.events('player')] == [f"case_{number}" for number in range(10)]
+
+
+def test_flush_counts_batches_written_before_failure(tmp_path):
+    telemetry = Telemetry(str(tmp_path / 'telemetry.sqlite3'), batch_size=4)
+    for number in range(10):
+        telemetry.record('answer', 'player', f"case_{number}", number)
+    # Третья пачка упирается в триггер: первые две уже записаны
+    with sqlite3.connect(telemetry.path) as connection:
+        connection.execute("CREATE TRIGGER reject BEFORE INSERT ON events WHEN NEW.value >= 8 "
+                           "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+
+    with pytest.raises(sqlite3.Error):
+        telemetry.flush()
+    assert telemetry.stats() == {'recorded': 10, 'dropped': 0, 'buffered': 2, 'flushed': 8}
+
+    with sqlite3.connect(telemetry.path) as connection:
+        connection.execute("DROP TRIGGER reject")
+    assert telemetry.flush() == 2
+    assert [event[4] for event in telemetry.events('player')] == list(range(10))
+
+
+def test_answer_history_restores_rating_log(tmp_path):
+    telemetry = Telemetry(str(tmp_path / 'telemetry.sqlite3'))
+    telemetry.record('answer_correct', 'alice', 'case_a', 3.0)
+    telemetry.record('hint', 'alice', 'case_a')
+    telemetry.record('answer_wrong', 'bob', 'case_a', 5.0)
+    telemetry.flush()
+    telemetry.record('answer_correct', 'bob', 'case_b', 2.0)
+
+    assert telemetry.answers() == [('alice', 'case_a', True), ('bob', 'case_a', False), ('bob', 'case_b', True)]
+    engine = RatingEngine()
+    assert engine.load_history(telemetry.answers()) == 3
+    engine.recompute()
+    assert engine.log.size == 3 and engine.player_games == {'alice': 1, 'bob': 2}
+    assert engine.player_rating('alice') > engine.player_rating('bob')
+
+
+def test_full_buffer_counts_dropped_events(tmp_path):
+    telemetry = Telemetry(str(tmp_path / 'telemetry.sqlite3'), capacity=3)
+    for number in range(5):
+        telemetry.record('hint', 'player', f"case_{number}")
+    assert telemetry.stats() == {'recorded': 3, 'dropped': 2, 'buffered': 3, 'flushed': 0}
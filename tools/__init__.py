@@ -0,0 +1 @@
+"""Служебные утилиты Statistical Detective (нагрузочные тесты, экспорт, сборка)"""
@@ -0,0 +1,288 @@
+"""
+Статическая сборка страниц только для чтения: главная, новости, каталог
+кейсов и превью кейсов с заранее отрисованными графиками.
+
+Сборку раздает любой файловый сервер или CDN; в Streamlit попадают только
+переходы к игре (ссылки вида <app-url>?mode=... и ?case=...). Ресурсы
+(CSS, графики) получают имена с хэшем содержимого и кэшируются навсегда,
+HTML - ненадолго; правила лежат в _headers (формат Netlify/Cloudflare
+Pages) и в nginx.conf. Ссылки внутри сборки относительные: ее можно
+выложить в подкаталог сайта или открыть прямо с диска.
+
+Пример:
+    python -m tools.build_static --out site --app-url https://detective.example.com/
+"""
+import argparse
+import hashlib
+import html
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from modules.content import ContentStore
+from modules.pages import (ABOUT_TEXT, ABOUT_TITLE, APP_CSS, APP_TAGLINE, APP_TITLE, CASE_TYPE_LABELS, LINKS_TITLE,
+                           MODE_CARDS, NEWS_ITEMS, NEWS_TITLE, RELATED_LINKS, WELCOME_TEXT, WELCOME_TITLE)
+from modules.visualizations import render_case_png
+
+ASSET_CACHE = "public, max-age=31536000, immutable"
+PAGE_CACHE = "public, max-age=300, must-revalidate"
+
+SITE_CSS = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; max-width: 1100px; margin: 0 auto;
+       padding: 1rem; color: #262730; line-height: 1.5; }
+a { color: #764ba2; }
+.cards { display: grid; grid-template-columns: repeat(auto-fit, minmax(260px, 1fr)); gap: 1rem; }
+.cards a { text-decoration: none; color: inherit; }
+.play { display: inline-block; background: #ff4b4b; color: white; padding: 0.5rem 1rem; border-radius: 8px;
+        text-decoration: none; font-weight: bold; }
+.meta { color: #808495; }
+.options li { margin: 0.25rem 0; }
+img { max-width: 100%; height: auto; }
+footer { border-top: 1px solid #e1e5e9; margin-top: 2rem; display: grid;
+         grid-template-columns: repeat(auto-fit, minmax(260px, 1fr)); gap: 1rem; }
+"""
+
+
+# ===== MARKDOWN =====
+INLINE_RULES = [
+    (re.compile(r"\*\*(.+?)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"(?<!\*)\*(?!\s)(.+?)\*"), r"<em>\1</em>"),
+    (re.compile(r"`(.+?)`"), r"<code>\1</code>"),
+    (re.compile(r"\[(.+?)\]\((https?://[^)\s]+)\)"), r'<a href="\2">\1</a>'),
+]
+
+
+def markdown_to_html(text: str) -> str:
+    """Подмножество Markdown из текстов кейсов: абзацы, заголовки, списки, выделение, ссылки"""
+    blocks, items, paragraph = [], [], []
+
+    def flush():
+        if paragraph:
+            blocks.append(f"<p>{' '.join(paragraph)}</p>")
+            paragraph.clear()
+        if items:
+            blocks.append("<ul>" + "".join(f"<li>{item}</li>" for item in items) + "</ul>")
+            items.clear()
+
+    for raw in text.strip().splitlines():
+        line = _inline(raw.strip())
+        if not line:
+            flush()
+        elif re.match(r"^#{1,6} ", raw.strip()):
+            flush()
+            level = len(raw.strip().split(' ')[0])
+            blocks.append(f"<h{level}>{line[level + 1:]}</h{level}>")
+        elif re.match(r"^([-*]|\d+\.) ", raw.strip()):
+            if paragraph:
+                flush()
+            items.append(re.sub(r"^([-*]|\d+\.) ", '', line))
+        else:
+            if items:
+                flush()
+            paragraph.append(line)
+    flush()
+    return "\n".join(blocks)
+
+
+def _inline(text: str) -> str:
+    text = html.escape(text, quote=False)
+    for pattern, replacement in INLINE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+# ===== СБОРКА =====
+class SiteBuilder:
+    """Пишет страницы и ресурсы с хэшами в именах; неизмененные графики не перерисовываются"""
+
+    def __init__(self, out: Path, app_url: str, dpi: int):
+        self.out = out
+        self.app_url = app_url
+        self.dpi = dpi
+        self.assets = out / 'assets'
+        self.assets.mkdir(parents=True, exist_ok=True)
+        self.used_assets = set()
+        self.rendered = 0
+
+    def asset(self, name: str, suffix: str, data: bytes) -> str:
+        """Сохраняет ресурс под именем с хэшем содержимого; возвращает путь от корня сборки"""
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        path = self.assets / f"{name}.{digest}{suffix}"
+        if not path.exists():
+            path.write_bytes(data)
+        self.used_assets.add(path.name)
+        return f"assets/{path.name}"
+
+    def chart(self, case: Dict, case_hash: str) -> Optional[str]:
+        """График кейса; повторная сборка берет готовый файл по хэшу кейса"""
+        existing = sorted(self.assets.glob(f"chart-{case['id']}-{case_hash}.*.png"))
+        if existing:
+            self.used_assets.add(existing[0].name)
+            return f"assets/{existing[0].name}"
+        png = render_case_png(case, dpi=self.dpi)
+        if png is None:
+            return None
+        self.rendered += 1
+        return self.asset(f"chart-{case['id']}-{case_hash}", '.png', png)
+
+    def play_link(self, **params) -> str:
+        return f"{self.app_url}?{urlencode(params)}"
+
+    def page(self, path: str, title: str, body: str, css: str):
+        """Страница path; ссылки в body относительны ее каталога, css - путь от корня сборки"""
+        target = self.out / path
+        root = '../' * path.count('/')
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(f"""<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="{root}{css}">
+</head>
+<body>
+<div class="detective-header">
+    <h1>{APP_TITLE}</h1>
+    <h3>{APP_TAGLINE}</h3>
+</div>
+{body}
+<footer>
+    <div><h3>{ABOUT_TITLE}</h3>{markdown_to_html(ABOUT_TEXT)}</div>
+    <div><h3>{LINKS_TITLE}</h3><ul>{''.join(f'<li><a href="{url}">{html.escape(name)}</a></li>' for name, url in RELATED_LINKS)}</ul></div>
+</footer>
+</body>
+</html>
+""", encoding='utf-8')
+
+    def remove_stale_assets(self) -> int:
+        stale = [path for path in self.assets.iterdir() if path.name not in self.used_assets]
+        for path in stale:
+            path.unlink()
+        return len(stale)
+
+
+def home_body(builder: SiteBuilder) -> str:
+    cards = "".join(f"""
+    <a class="case-card" href="{builder.play_link(mode=card['mode_key'])}">
+        <h4>{card['title']}</h4>
+        <p>{card['description']}</p>
+        <p><strong>{card['difficulty']}</strong></p>
+    </a>""" for card in MODE_CARDS)
+    news = "".join(f"<details><summary>📅 {item['date']} - {html.escape(item['title'])}</summary>"
+                   f"<p>{html.escape(item['description'])}</p></details>" for item in NEWS_ITEMS)
+    return f"""
+<h2>{WELCOME_TITLE}</h2>
+{markdown_to_html(WELCOME_TEXT)}
+<div class="cards">{cards}</div>
+<p><a href="cases/index.html">📚 Каталог кейсов</a> · <a class="play" href="{builder.play_link(mode='home')}">▶️ Играть</a></p>
+<hr>
+<h2>{NEWS_TITLE}</h2>
+{news}
+"""
+
+
+def catalog_body(cases: List[Dict]) -> str:
+    sections = []
+    for case_type, label in CASE_TYPE_LABELS.items():
+        family = [case for case in cases if case['type'] == case_type]
+        if family:
+            sections.append(f"<h3>{label}</h3><ul>" + "".join(
+                f'<li><a href="{case["id"]}.html">{html.escape(case["title"])}</a>'
+                f'{" <span class=meta>· " + case["difficulty"] + "</span>" if case.get("difficulty") else ""}</li>'
+                for case in family) + "</ul>")
+    return "<h2>📚 Каталог кейсов</h2>" + "".join(sections)
+
+
+def case_body(case: Dict, chart: Optional[str], builder: SiteBuilder) -> str:
+    """Превью без ответов и объяснений: решать кейс нужно в игре"""
+    parts = [f"<p><a href=\"index.html\">← Каталог</a></p><h2>{html.escape(case['title'])}</h2>",
+             f"<p class=meta>{CASE_TYPE_LABELS[case['type']]}"
+             f"{' · ' + case['difficulty'] if case.get('difficulty') else ''}</p>",
+             markdown_to_html(case['description'])]
+    if chart:
+        parts.append(f'<img src="../{chart}" alt="График к кейсу" loading="lazy">')
+    if case.get('options'):
+        parts.append("<h3>🤔 Что не так с этим анализом?</h3><ul class=options>" +
+                     "".join(f"<li>{_inline(option)}</li>" for option in case['options']) + "</ul>")
+    if case.get('questions'):
+        parts.append("<h3>🤔 Вопросы для размышления</h3><ul>" +
+                     "".join(f"<li>{_inline(question)}</li>" for question in case['questions']) + "</ul>")
+    if case.get('steps'):
+        parts.append(f"<p>Шагов в сценарии: {len(case['steps'])}</p>")
+    parts.append(f'<p><a class="play" href="{builder.play_link(case=case["id"])}">▶️ Решить в игре</a></p>')
+    return "\n".join(parts)
+
+
+def write_cache_rules(out: Path):
+    """Правила кэширования для популярных статических хостингов и nginx (сборка в корне сайта)"""
+    (out / '_headers').write_text(f"""/assets/*
+  Cache-Control: {ASSET_CACHE}
+
+/*
+  Cache-Control: {PAGE_CACHE}
+""", encoding='utf-8')
+    (out / 'nginx.conf').write_text(f"""# include внутри server {{ root <каталог сборки>; }}
+location /assets/ {{
+    add_header Cache-Control "{ASSET_CACHE}";
+    try_files $uri =404;
+}}
+location / {{
+    add_header Cache-Control "{PAGE_CACHE}";
+    try_files $uri $uri/index.html =404;
+}}
+""", encoding='utf-8')
+
+
+def build(out: Path, data: str, app_url: str, dpi: int) -> Dict[str, int]:
+    started = time.perf_counter()
+    content = ContentStore(data).snapshot
+    builder = SiteBuilder(out, app_url, dpi)
+    css = builder.asset('style', '.css', (APP_CSS + SITE_CSS).encode('utf-8'))
+
+    cases = list(content.cases.values())
+    builder.page('index.html', "Statistical Detective", home_body(builder), css)
+    builder.page('cases/index.html', "Каталог кейсов — Statistical Detective", catalog_body(cases), css)
+
+    case_pages = {f"{case['id']}.html" for case in cases}
+    for case in cases:
+        chart = builder.chart(case, content.hashes[case['id']])
+        builder.page(f"cases/{case['id']}.html", f"{case['title']} — Statistical Detective",
+                     case_body(case, chart, builder), css)
+    for stale_page in (out / 'cases').glob('*.html'):
+        if stale_page.name != 'index.html' and stale_page.name not in case_pages:
+            stale_page.unlink()
+
+    write_cache_rules(out)
+    return {
+        'pages': len(cases) + 2,
+        'charts_rendered': builder.rendered,
+        'stale_assets_removed': builder.remove_stale_assets(),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default='site')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--app-url', default='http://localhost:8501/', help="адрес Streamlit-приложения для игры")
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--clean', action='store_true', help="удалить прошлую сборку целиком")
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    if args.clean and out.exists():
+        shutil.rmtree(out)
+    result = build(out, args.data, args.app_url, args.dpi)
+    print(f"Страниц: {result['pages']}, перерисовано графиков: {result['charts_rendered']}, "
+          f"удалено устаревших ресурсов: {result['stale_assets_removed']}, {result['seconds']:.1f} с → {out}/",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Сборка каталогов переводов: locales/<язык>.json -> locales/<язык>.mo.
+
+Ключи каталога - строки на исходном языке: вызовы t()/translate() с
+литералом в приложении и графиках, подписи вариантов из констант
+приложения, тексты modules/pages.py, тексты кейсов, подсказки и
+достижения. --update дописывает в исходные каталоги новые ключи с пустым
+переводом (их видно переводчику, а в .mo они не попадают); строки
+сгенерированных кейсов (data/cases/generated_*.json) в каталоги не
+выгружаются и показываются на исходном языке.
+
+Пример:
+    python -m tools.compile_locales                  # собрать все каталоги и показать покрытие
+    python -m tools.compile_locales --update         # добавить новые строки в locales/*.json
+    python -m tools.compile_locales --missing en     # непереведенные строки языка
+    python -m tools.compile_locales --strict         # код 1, если есть непереведенные строки (для CI)
+"""
+import argparse
+import ast
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from modules import pages
+from modules.content import ContentStore
+from modules.i18n import (LOCALES, LOCALES_DIR, SOURCE_LOCALE, case_texts, compile_catalog, needs_translation,
+                          read_source, source_path)
+
+ROOT = Path(__file__).resolve().parent.parent
+CODE_FILES = [ROOT / 'detective_main_structure.py', ROOT / 'modules' / 'visualizations.py']
+TRANSLATE_CALLS = ('t', 'translate')
+
+
+# ===== ВЫГРУЗКА КЛЮЧЕЙ =====
+def code_messages(path: Path) -> List[str]:
+    """Литералы в вызовах t()/translate() и строки исходного языка в константах модуля"""
+    tree = ast.parse(path.read_text(encoding='utf-8'))
+    found = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and getattr(node.func, 'id', None) in TRANSLATE_CALLS and node.args
+                and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+            found.append(node.args[0])
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) and target.id.isupper()
+                                                for target in node.targets):
+            found += [leaf for leaf in ast.walk(node.value)
+                      if isinstance(leaf, ast.Constant) and needs_translation(leaf.value)]
+    # В порядке исходного текста: так каталог читается вместе с кодом
+    return [leaf.value for leaf in sorted(found, key=lambda leaf: (leaf.lineno, leaf.col_offset))]
+
+
+def page_messages() -> List[str]:
+    """Тексты страниц из modules/pages.py"""
+    def strings(value) -> Iterable[str]:
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from strings(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                yield from strings(item)
+
+    return [text for name in dir(pages) if name.isupper() for text in strings(getattr(pages, name))]
+
+
+def content_messages(data_dir: str) -> List[str]:
+    """Тексты кейсов (кроме сгенерированных), подсказки и достижения"""
+    snapshot = ContentStore(data_dir).snapshot
+    messages = [text for case in snapshot.cases.values() if 'generated' not in case for text in case_texts(case)]
+    messages += [snapshot.default_hint, *snapshot.hints.values()]
+    for rule in snapshot.achievements:
+        messages += [rule['title'], rule['message']]
+    return messages
+
+
+def collect_messages(data_dir: str) -> List[str]:
+    """Все ключи каталога без повторов, в порядке появления"""
+    messages = [message for path in CODE_FILES for message in code_messages(path)]
+    messages += page_messages() + content_messages(data_dir)
+    return list(dict.fromkeys(message for message in messages if needs_translation(message)))
+
+
+# ===== КАТАЛОГИ =====
+def update_source(locale: str, messages: List[str], directory: str) -> int:
+    """Дописывает в исходный каталог новые ключи с пустым переводом; возвращает их число"""
+    path = source_path(locale, directory)
+    known = read_source(path) if path.exists() else {}
+    added = [message for message in messages if message not in known]
+    if added or not path.exists():
+        catalog = {'locale': locale, 'messages': {**known, **dict.fromkeys(added, '')}}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(catalog, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    return len(added)
+
+
+def coverage(locale: str, messages: List[str], directory: str) -> Dict[str, List[str]]:
+    """Непереведенные ключи и ключи каталога, которых больше нет в коде и контенте"""
+    catalog = read_source(source_path(locale, directory))
+    current = set(messages)
+    return {
+        'missing': [message for message in messages if not catalog.get(message)],
+        'obsolete': [message for message in catalog if message not in current],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--locales', default=LOCALES_DIR, help="каталог с locales/<язык>.json")
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--update', action='store_true', help="дописать новые строки в исходные каталоги")
+    parser.add_argument('--missing', metavar='LOCALE', help="вывести непереведенные строки языка")
+    parser.add_argument('--strict', action='store_true', help="код 1, если есть непереведенные строки")
+    args = parser.parse_args(argv)
+
+    messages = collect_messages(args.data)
+    locales = [locale for locale in LOCALES if locale != SOURCE_LOCALE]
+    incomplete = False
+    for locale in locales:
+        if args.update:
+            added = update_source(locale, messages, args.locales)
+            if added:
+                print(f"{locale}: добавлено {added} новых строк", file=sys.stderr)
+        if not source_path(locale, args.locales).exists():
+            print(f"{locale}: нет {source_path(locale, args.locales)} (запустите с --update)", file=sys.stderr)
+            incomplete = True
+            continue
+        translated = compile_catalog(locale, args.locales)
+        report = coverage(locale, messages, args.locales)
+        incomplete = incomplete or bool(report['missing'])
+        print(f"{locale}: переведено {translated}, не переведено {len(report['missing'])} из {len(messages)}, "
+              f"устаревших {len(report['obsolete'])}")
+        if args.missing == locale:
+            print("\n".join(f"  {message!r}" for message in report['missing']))
+
+    if args.strict and incomplete:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Пакетная выгрузка отчетов о прогрессе игроков в zip-архив.
+
+Отчеты рисуются в пуле процессов; статичный слой (шапка, заголовки,
+рамка графика) рендерится один раз и передается воркерам, а каждый
+воркер переиспользует свой шаблон фигуры. Готовые файлы
+сразу пишутся в части архива по --part-size отчетов, так что в памяти
+одновременно не больше --in-flight отчетов; в конце части склеиваются
+в один архив. Без --resume выгрузка начинается заново. С --resume
+прерванная выгрузка продолжается с первой незавершенной части, а
+готовый архив дополняется отчетами игроков, которых в нем еще нет.
+
+Пример:
+    python -m tools.export_reports --out reports.zip --format pdf --workers 4
+    python -m tools.export_reports --synthetic 5000 --out demo.zip   # замер на синтетических игроках
+    python -m tools.export_reports --out reports.zip --resume        # продолжить прерванную или дописать готовую
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from modules.content import ContentStore
+from modules.reports import ReportRenderer, build_report, load_answer_counts, load_player_stats, render_template_asset
+
+_renderer: Optional[ReportRenderer] = None
+
+
+# ===== ВОРКЕР =====
+def init_worker(template, dpi: int):
+    """Один шаблон отчета на процесс"""
+    global _renderer
+    _renderer = ReportRenderer(template, dpi=dpi)
+
+
+def render_one(report: Dict, fmt: str):
+    return f"{report['player_id']}.{fmt}", _renderer.render(report, fmt)
+
+
+# ===== ИСТОЧНИКИ =====
+def iter_reports(args, content) -> Iterator[Dict]:
+    """Данные отчетов из хранилища сессий и телеметрии или синтетические"""
+    if args.synthetic:
+        yield from synthetic_reports(args.synthetic, content, args.seed)
+        return
+    answers = load_answer_counts(args.telemetry) if os.path.exists(args.telemetry) else {}
+    for stats in load_player_stats(args.sessions):
+        yield build_report(stats, content, answers.get(stats['player_id']))
+
+
+def synthetic_reports(count: int, content, seed: int) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    case_ids = list(content.cases)
+    titles = [rule['title'] for rule in content.achievements]
+    bias_types = sorted({case['bias_type'] for case in content.family('bias')}) or ['survivorship']
+    for number in range(count):
+        solved = rng.sample(case_ids, rng.randint(0, len(case_ids)))
+        stats = {
+            'player_id': f"synthetic_{number:06d}", 'score': 10 * len(solved), 'level': len(solved) // 10 + 1,
+            'best_streak': rng.randint(0, len(solved)), 'play_time': rng.uniform(0, 120),
+            'solved_cases': solved, 'achievements': [title for title in titles if rng.random() < 0.5],
+        }
+        report = build_report(stats, content)
+        report['weak_biases'] = [(bias_type, rng.random()) for bias_type in bias_types if rng.random() < 0.5]
+        yield report
+
+
+# ===== АРХИВ ПО ЧАСТЯМ =====
+class PartedZip:
+    """
+    Архив, который пишется частями parts/part-00001.zip. Незаконченная часть
+    лежит с суффиксом .partial и при возобновлении выбрасывается, а имена
+    файлов из законченных частей пропускаются. Без resume части прошлой
+    выгрузки удаляются, а готовый архив перезаписывается в merge(); с
+    resume продолжаются оставшиеся части, а готовый архив становится
+    первой частью.
+    """
+
+    def __init__(self, out: Path, part_size: int, resume: bool = False):
+        self.out = out
+        self.part_size = part_size
+        self.parts_dir = out.with_name(out.name + '.parts')
+        if not resume and self.parts_dir.exists():
+            shutil.rmtree(self.parts_dir)
+        self.parts_dir.mkdir(exist_ok=True)
+        if resume and out.exists():
+            out.replace(self.parts_dir / 'part-00000.zip')
+        for partial in self.parts_dir.glob('*.partial'):
+            partial.unlink()
+        self.done: Set[str] = set()
+        for part in self.parts():
+            with zipfile.ZipFile(part) as archive:
+                self.done.update(archive.namelist())
+        self._part: Optional[zipfile.ZipFile] = None
+        self._part_path: Optional[Path] = None
+        self._in_part = 0
+        self._next_part = max((int(part.stem[5:]) for part in self.parts()), default=0) + 1
+
+    def parts(self) -> List[Path]:
+        return sorted(self.parts_dir.glob('part-*.zip'))
+
+    def write(self, name: str, data: bytes):
+        if self._part is None:
+            self._part_path = self.parts_dir / f"part-{self._next_part:05d}.zip.partial"
+            self._part = zipfile.ZipFile(self._part_path, 'w', zipfile.ZIP_STORED)
+        # PNG и PDF уже сжаты - храним без повторного сжатия
+        self._part.writestr(name, data)
+        self.done.add(name)
+        self._in_part += 1
+        if self._in_part >= self.part_size:
+            self.close_part()
+
+    def close_part(self):
+        if self._part is None:
+            return
+        self._part.close()
+        self._part_path.rename(self._part_path.with_suffix(''))
+        self._part, self._in_part = None, 0
+        self._next_part += 1
+
+    def merge(self):
+        """Склеивает части в итоговый архив потоково, по одному файлу"""
+        self.close_part()
+        tmp = self.out.with_name(self.out.name + '.tmp')
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_STORED) as target:
+            for part in self.parts():
+                with zipfile.ZipFile(part) as source:
+                    for info in source.infolist():
+                        with source.open(info) as src, target.open(info, 'w') as dst:
+                            shutil.copyfileobj(src, dst, 1 << 20)
+        tmp.replace(self.out)
+        shutil.rmtree(self.parts_dir)
+
+
+# ===== ПРОГРЕСС =====
+class Progress:
+    def __init__(self, total: Optional[int], done: int):
+        self.total, self.done, self.skipped = total, 0, done
+        self.started = self.last = time.perf_counter()
+
+    def step(self, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self.last < 1:
+            return
+        self.last = now
+        rate = self.done / max(now - self.started, 1e-9)
+        line = f"\r{self.done + self.skipped:,}"
+        if self.total:
+            left = self.total - self.done - self.skipped
+            line += f"/{self.total:,} ({(self.done + self.skipped) / self.total:.0%}), ETA {left / max(rate, 1e-9):.0f} с"
+        print(f"{line}, {rate:.1f} отчетов/с   ", end='', file=sys.stderr, flush=True)
+
+
+def run_export(reports: Iterable[Dict], archive: PartedZip, fmt: str, workers: int, in_flight: int,
+               dpi: int, total: Optional[int]) -> Progress:
+    """Рисует отчеты в пуле и пишет их в архив, держа не больше in_flight задач"""
+    progress = Progress(total, len(archive.done))
+    template = render_template_asset(dpi)
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(template, dpi)) as pool:
+        for report in reports:
+            if f"{report['player_id']}.{fmt}" in archive.done:
+                continue
+            if len(pending) >= in_flight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    archive.write(*future.result())
+                    progress.done += 1
+                progress.step()
+            pending.add(pool.submit(render_one, report, fmt))
+        for future in pending:
+            archive.write(*future.result())
+            progress.done += 1
+            progress.step()
+    progress.step(force=True)
+    print(file=sys.stderr)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default='reports.zip')
+    parser.add_argument('--format', choices=('png', 'pdf'), default='png')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--sessions', default=os.path.join('data', 'sessions.sqlite3'))
+    parser.add_argument('--telemetry', default=os.path.join('data', 'telemetry.sqlite3'))
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--in-flight', type=int, default=0, help="задач в полете (по умолчанию 4 на воркер)")
+    parser.add_argument('--part-size', type=int, default=500, help="отчетов в одной части архива")
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--synthetic', type=int, default=0, help="выгрузить N синтетических игроков")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--resume', action='store_true',
+                        help="продолжить прерванную выгрузку и дописать в готовый --out только новые отчеты")
+    args = parser.parse_args(argv)
+
+    content = ContentStore(args.data).snapshot
+    archive = PartedZip(Path(args.out), args.part_size, resume=args.resume)
+    total = args.synthetic or None
+    if archive.done:
+        print(f"Продолжаем: уже готово {len(archive.done):,} отчетов", file=sys.stderr)
+
+    progress = run_export(iter_reports(args, content), archive, args.format, args.workers,
+                          args.in_flight or 4 * args.workers, args.dpi, total)
+    archive.merge()
+    elapsed = time.perf_counter() - progress.started
+    print(f"Готово: {progress.done:,} новых отчетов за {elapsed:.1f} с "
+          f"({progress.done / max(elapsed, 1e-9):.1f}/с), всего в {args.out}: {len(archive.done):,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Пакетная генерация кейсов в data/cases/generated_<тип>.json.
+
+Семейства считаются в пуле процессов, почти одинаковые кейсы (в том
+числе уже записанные раньше) отсеиваются по отпечатку, а новые кейсы
+пишутся одной записью на файл - приложение подхватит их горячей
+перезагрузкой.
+
+Пример:
+    python -m tools.generate_cases --count 200 --workers 4
+    python -m tools.generate_cases --families funnel,survivorship --count 50 --seed 7
+    python -m tools.generate_cases --plugin my_cases.generators --families my_family --count 10
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from modules.case_generator import CHUNK_SIZE, FAMILIES, generate_cases, known_fingerprints, load_plugins, write_generated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100, help="кейсов на семейство")
+    parser.add_argument('--families', default='', help="семейства через запятую (по умолчанию все)")
+    parser.add_argument('--plugin', action='append', default=[], help="модуль с дополнительными семействами")
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=None, help="по умолчанию - случайный")
+    parser.add_argument('--dry-run', action='store_true', help="только сгенерировать и посчитать")
+    args = parser.parse_args(argv)
+
+    load_plugins(args.plugin)
+    families = [name.strip() for name in args.families.split(',') if name.strip()] or list(FAMILIES)
+    seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % 2 ** 32)
+    cases_dir = Path(args.data) / 'cases'
+
+    started = time.perf_counter()
+    result = generate_cases({name: args.count for name in families}, seed=seed, workers=args.workers,
+                            chunk_size=args.chunk_size, plugins=args.plugin, known=known_fingerprints(cases_dir))
+    elapsed = time.perf_counter() - started
+
+    print(f"seed={seed}, {elapsed:.1f} с", file=sys.stderr)
+    for name in families:
+        print(f"  {name}: сгенерировано {result.generated[name]}, дубликатов {result.duplicates[name]}",
+              file=sys.stderr)
+    if args.dry_run:
+        return
+    for file_name, count in write_generated(cases_dir, result.cases).items():
+        print(f"{file_name}: +{count} кейсов")
+
+
+if __name__ == '__main__':
+    main()
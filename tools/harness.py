@@ -0,0 +1,205 @@
+"""Скриптовые игроки поверх streamlit.testing (AppTest) для нагрузочных прогонов"""
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import streamlit
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'detective_main_structure.py'
+RUN_TIMEOUT = 60
+# Версия Streamlit, на которой проверена подмена кэша байткода AppTest
+SCRIPT_CACHE_MIN_VERSION = (1, 66)
+
+
+def share_script_cache() -> bool:
+    """
+    Сервер Streamlit компилирует скрипт один раз на процесс, а AppTest -
+    на каждый rerun. Общий кэш байткода воспроизводит поведение сервера,
+    но подменяет внутренний класс local_script_runner, поэтому делается
+    только на проверенных версиях и при ожидаемом устройстве модуля.
+    Иначе прогон идет без подмены, а отчеты показывают цену компиляции.
+    """
+    try:
+        from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    except ImportError:
+        return False
+    version = tuple(int(part) for part in re.findall(r'\d+', streamlit.__version__)[:2])
+    if version < SCRIPT_CACHE_MIN_VERSION or getattr(local_script_runner, 'ScriptCache', None) is not ScriptCache:
+        return False
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+    return True
+
+
+SCRIPT_CACHE_SHARED = share_script_cache()
+
+
+def script_cache_report() -> Dict:
+    """Общий ли кэш байткода и сколько стоит компиляция скрипта приложения"""
+    source = APP_PATH.read_text(encoding='utf-8')
+    started = time.perf_counter()
+    compile(source, str(APP_PATH), 'exec')
+    return {'shared': SCRIPT_CACHE_SHARED, 'compile_ms': (time.perf_counter() - started) * 1000}
+
+
+def merge_script_cache(reports: List[Dict]) -> Dict:
+    """Сводка по воркерам: кэш общий, только если он общий в каждом процессе"""
+    return {'shared': all(report['shared'] for report in reports),
+            'compile_ms': max(report['compile_ms'] for report in reports)}
+
+
+def format_script_cache(info: Dict) -> str:
+    """Строка отчета о кэше байткода"""
+    if info['shared']:
+        return f"Кэш байткода AppTest: общий (компиляция скрипта {info['compile_ms']:.0f} мс, один раз на процесс)"
+    return (f"Кэш байткода AppTest: не подменен (Streamlit {streamlit.__version__}) - "
+            f"каждый rerun включает компиляцию скрипта, ~{info['compile_ms']:.0f} мс")
+
+# AppTest подменяет глобальный Runtime на время каждого rerun, поэтому
+# rerun-ы разных сессий одного процесса идут по очереди. Для воркера,
+# упирающегося в GIL, это близко к реальности: задержка = ожидание + работа.
+_RERUN_LOCK = threading.Lock()
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (Linux /proc, иначе пиковый RSS)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ScriptedPlayer:
+    """Один игрок: своя сессия AppTest и журнал (действие, задержка, время работы) каждого rerun"""
+
+    def __init__(self, rng: random.Random, think_time: float = 0.0):
+        self.rng = rng
+        self.think_time = think_time
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=RUN_TIMEOUT)
+        self.timings: List[tuple] = []
+        self.errors: List[str] = []
+
+    # ===== БАЗОВЫЕ ДЕЙСТВИЯ =====
+    def _run(self, action: str, widget=None):
+        """Выполняет один rerun и замеряет его длительность"""
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        started = time.perf_counter()
+        with _RERUN_LOCK:
+            acquired = time.perf_counter()
+            try:
+                (widget if widget is not None else self.at).run()
+            except Exception as error:  # падение rerun - тоже результат прогона
+                self.errors.append(f"{action}: {error}")
+        finished = time.perf_counter()
+        self.timings.append((action, finished - started, finished - acquired))
+        if self.at.exception:
+            self.errors.append(f"{action}: {self.at.exception[0].message}")
+
+    def _find(self, kind: str, prefix: str = '', contains: str = ''):
+        """Первый виджет типа kind, ключ которого начинается с prefix и содержит contains"""
+        for widget in getattr(self.at, kind):
+            key = widget.key or ''
+            if key.startswith(prefix) and contains in key:
+                return widget
+        return None
+
+    def _choose(self, widget):
+        """
+        Случайное значение selectbox. AppTest видит только подписи вариантов,
+        поэтому значения (подписи или id кейсов сессии) восстанавливаются
+        через format_func виджета.
+        """
+        content = self.at.session_state['content'] if 'content' in self.at.session_state else None
+        candidates = list(widget.options) + list(content.cases if content is not None else ())
+        return self.rng.choice([value for value in candidates if widget.format_func(value) in widget.options])
+
+    def start(self):
+        self._run('start')
+
+    def select_mode(self, mode: str):
+        selector = self._find('selectbox', prefix='game_mode')
+        if selector is None:
+            # Прошлый rerun упал и не отрисовал страницу - начинаем сессию заново
+            self.errors.append(f"mode:{mode}: нет переключателя режимов")
+            self.start()
+            return
+        self._run(f'mode:{mode}', selector.set_value(mode))
+
+    def pick(self, key: str):
+        """Случайный вариант в selectbox с ключом key"""
+        widget = self._find('selectbox', prefix=key)
+        if widget is not None:
+            self._run(f'pick:{key}', widget.set_value(self._choose(widget)))
+
+    def answer(self, radio_prefix: str, button_prefix: str, action: str,
+               radio_contains: str = '', button_contains: str = ''):
+        """Выбирает случайный вариант в радио (значение - номер варианта) и нажимает кнопку"""
+        radio = self._find('radio', prefix=radio_prefix, contains=radio_contains)
+        if radio is not None:
+            radio.set_value(self.rng.randrange(len(radio.options)))
+        self.click(button_prefix, action, contains=button_contains)
+
+    def click(self, prefix: str, action: str, contains: str = ''):
+        button = self._find('button', prefix=prefix, contains=contains)
+        if button is not None:
+            self._run(action, button.click())
+
+    # ===== СЦЕНАРИИ ПОВЕДЕНИЯ =====
+    def journey_error_hunting(self):
+        self.select_mode('error_hunting')
+        self.pick('difficulty')
+        if self.rng.random() < 0.3:
+            self.click('gallery_open_', 'gallery_open')
+        self.answer('case_', 'check_', 'answer')
+        if self.rng.random() < 0.3:
+            self.click('hint_', 'hint')
+
+    def journey_scenario(self):
+        self.select_mode('decisions')
+        self.pick('scenario_choice')
+        for _ in range(self.rng.randint(1, 3)):
+            self.answer('scenario_', 'scenario_', 'scenario_step',
+                        radio_contains='_step_', button_contains='_decide_')
+
+    def journey_bias(self):
+        self.select_mode('bias_detection')
+        if self.rng.random() < 0.3:
+            self.click('gallery_open_', 'gallery_open')
+        else:
+            self.pick('bias_choice')
+        if self.rng.random() < 0.6:
+            self.click('bias_reveal_', 'bias_reveal')
+        self.click('bias_understood_', 'bias_understood')
+
+    def journey_random(self):
+        self.select_mode('random')
+        self.click('random_case', 'random_case')
+        self.answer('case_', 'check_', 'answer')
+
+    def journey_browse(self):
+        self.select_mode('home')
+        self.select_mode('stats')
+
+    JOURNEYS: Dict[str, float] = {
+        'journey_error_hunting': 0.35,
+        'journey_scenario': 0.2,
+        'journey_bias': 0.2,
+        'journey_random': 0.15,
+        'journey_browse': 0.1,
+    }
+
+    def play(self, n_actions: int):
+        """Проходит случайные сценарии, пока не наберется n_actions rerun-ов"""
+        names, weights = zip(*self.JOURNEYS.items())
+        if not self.timings:
+            self.start()
+        while len(self.timings) < n_actions:
+            getattr(self, self.rng.choices(names, weights)[0])()
@@ -0,0 +1,177 @@
+"""
+Нагрузочный тест: N одновременных скриптовых игроков в одном процессе-воркере.
+
+Каждый игрок - отдельная сессия AppTest в своем потоке, как сессии
+в одном процессе Streamlit; кэши (контент, индекс поиска, графики)
+общие для сессий процесса. Игроки делятся между --workers процессами
+(модель нескольких воркеров за балансировщиком). Для каждого уровня
+нагрузки считаются пропускная способность, перцентили задержки rerun
+(с ожиданием очереди) и чистого времени работы, память на сессию,
+затем определяется точка насыщения.
+
+Живой сервер `streamlit run` не нагружается: для этого нужен клиент
+websocket/protobuf-протокола Streamlit.
+
+Пример:
+    python -m tools.load_test --levels 1,2,4,8,16 --actions 30 --out load_report.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+
+def run_worker(n_players: int, n_actions: int, think_time: float, seed: int, feedback_delay: float) -> Dict:
+    """Один воркер: n_players одновременных игроков в потоках текущего процесса"""
+    os.environ['DETECTIVE_FEEDBACK_DELAY'] = str(feedback_delay)
+    from tools.harness import ScriptedPlayer, rss_bytes, script_cache_report
+
+    # Прогрев: импорты, кэши контента и поискового индекса
+    warmup = ScriptedPlayer(random.Random(seed))
+    warmup.play(3)
+
+    baseline = rss_bytes()
+    players = [ScriptedPlayer(random.Random(seed * 10_000 + i), think_time) for i in range(n_players)]
+    threads = [threading.Thread(target=player.play, args=(n_actions,)) for player in players]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    return {
+        'wall': wall,
+        'latencies': [latency for player in players for _, latency, _ in player.timings],
+        'service': [service for player in players for _, _, service in player.timings],
+        'actions': [action.split(':')[0] for player in players for action, _, _ in player.timings],
+        'errors': [error for player in players for error in player.errors],
+        'memory_delta': rss_bytes() - baseline,
+        'players': n_players,
+        'script_cache': script_cache_report(),
+    }
+
+
+def run_level(level: int, args) -> Dict:
+    """Один уровень нагрузки, распределенный по процессам-воркерам"""
+    workers = max(1, min(args.workers, level))
+    shares = [level // workers + (1 if i < level % workers else 0) for i in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker, share, args.actions, args.think_ms / 1000,
+                               args.seed + 1000 * level + i, args.feedback_delay)
+                   for i, share in enumerate(shares)]
+        results = [future.result() for future in futures]
+
+    latencies = np.array([value for result in results for value in result['latencies']]) * 1000
+    service = np.array([value for result in results for value in result['service']]) * 1000
+    actions = [action for result in results for action in result['actions']]
+    wall = max(result['wall'] for result in results)
+    per_action = {}
+    for action in sorted(set(actions)):
+        values = latencies[[i for i, name in enumerate(actions) if name == action]]
+        per_action[action] = {'count': len(values), 'p50_ms': float(np.percentile(values, 50)),
+                              'p95_ms': float(np.percentile(values, 95))}
+
+    return {
+        'players': level,
+        'workers': workers,
+        'reruns': len(latencies),
+        'throughput_rps': len(latencies) / wall if wall else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'service_p50_ms': float(np.percentile(service, 50)),
+        'service_p95_ms': float(np.percentile(service, 95)),
+        'memory_per_session_kb': sum(r['memory_delta'] for r in results) / level / 1024,
+        'errors': [error for result in results for error in result['errors']][:20],
+        'error_count': sum(len(result['errors']) for result in results),
+        'per_action': per_action,
+        'script_cache': [result['script_cache'] for result in results],
+    }
+
+
+def find_saturation(levels: List[Dict], slo_ms: float, min_gain: float) -> Dict:
+    """
+    Точка насыщения - первый уровень, где p95 превышает SLO или рост
+    пропускной способности относительно прошлого уровня ниже min_gain.
+    """
+    for previous, current in zip([None] + levels[:-1], levels):
+        if current['p95_ms'] > slo_ms:
+            return {'players': current['players'], 'reason': f"p95 {current['p95_ms']:.0f} мс > SLO {slo_ms:.0f} мс"}
+        if previous and current['throughput_rps'] < previous['throughput_rps'] * (1 + min_gain):
+            return {'players': current['players'],
+                    'reason': f"пропускная способность выросла меньше чем на {min_gain:.0%}"}
+    return {'players': None, 'reason': "не достигнута на проверенных уровнях"}
+
+
+def format_report(report: Dict) -> str:
+    """Текстовая таблица отчета"""
+    from tools.harness import format_script_cache
+    lines = [
+        "| Игроков | Rerun/с | p50, мс | p95, мс | p99, мс | Память/сессия, КБ | Ошибки |",
+        "|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for level in report['levels']:
+        lines.append(f"| {level['players']} | {level['throughput_rps']:.1f} | {level['p50_ms']:.0f} | "
+                     f"{level['p95_ms']:.0f} | {level['p99_ms']:.0f} | {level['memory_per_session_kb']:.0f} | "
+                     f"{level['error_count']} |")
+    saturation = report['saturation']
+    lines.append("")
+    lines.append(f"Точка насыщения: {saturation['players'] or '—'} ({saturation['reason']})")
+    lines.append(format_script_cache(report['script_cache']))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', default='1,2,4,8,16', help="уровни одновременных игроков через запятую")
+    parser.add_argument('--actions', type=int, default=30, help="rerun-ов на игрока")
+    parser.add_argument('--workers', type=int, default=1, help="процессов-воркеров (1 = один воркер Streamlit)")
+    parser.add_argument('--think-ms', type=float, default=200, help="средняя пауза игрока между действиями")
+    parser.add_argument('--feedback-delay', type=float, default=0.0,
+                        help="пауза после шага сценария (DETECTIVE_FEEDBACK_DELAY)")
+    parser.add_argument('--slo-ms', type=float, default=500, help="допустимая p95 задержка rerun")
+    parser.add_argument('--min-gain', type=float, default=0.1, help="минимальный прирост пропускной способности")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='load_report.json')
+    args = parser.parse_args(argv)
+
+    levels = []
+    for level in [int(value) for value in args.levels.split(',')]:
+        print(f"▶ {level} игроков...", file=sys.stderr)
+        levels.append(run_level(level, args))
+
+    import streamlit
+    from tools.harness import merge_script_cache
+    report = {
+        'config': vars(args),
+        'environment': {
+            'python': platform.python_version(),
+            'streamlit': streamlit.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'levels': levels,
+        'saturation': find_saturation(levels, args.slo_ms, args.min_gain),
+        'script_cache': merge_script_cache([info for level in levels for info in level.pop('script_cache')]),
+    }
+
+    with open(args.out, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
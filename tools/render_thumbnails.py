@@ -0,0 +1,51 @@
+"""
+Заранее рисует миниатюры графиков всех кейсов для галереи.
+
+Миниатюры рисуются в пуле процессов и кладутся в тот же каталог, из
+которого их читает приложение, так что галерея открывается без
+дорисовки даже на банке из тысяч кейсов. Уже готовые миниатюры
+пропускаются; одинаковые графики рисуются один раз.
+
+Пример:
+    python -m tools.render_thumbnails --workers 8
+    python -m tools.render_thumbnails --out data/thumbnails --data data
+"""
+import argparse
+import os
+import sys
+import time
+
+from modules.content import ContentStore
+from modules.gallery import ThumbnailStore, thumbnail_key
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--out', default=os.path.join('data', 'thumbnails'), help="каталог миниатюр")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    cases = list(ContentStore(args.data).snapshot.cases.values())
+    charts = {thumbnail_key(case): case for case in cases}
+    charts.pop(None, None)
+
+    store = ThumbnailStore(args.out, workers=args.workers)
+    started = time.perf_counter()
+    futures = store.request(charts.values())
+    store.wait(futures, timeout=None)
+    elapsed = time.perf_counter() - started
+    store.close()
+
+    size = sum(store.path(key).stat().st_size for key in charts if store.path(key).exists())
+    print(f"Кейсов: {len(cases):,}, графиков: {len(charts):,}, нарисовано: {store.rendered:,} "
+          f"за {elapsed:.1f} с, ошибок: {len(store.failed)}; каталог {args.out}: {size / 1024:.0f} КБ "
+          f"({store.fmt})")
+    for key, error in store.failed.items():
+        print(f"  {key}: {error}", file=sys.stderr)
+    if store.failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Воспроизведение записанных трасс игроков на текущей сборке и сравнение
+с базовой линией.
+
+Трассы пишет приложение при заданном DETECTIVE_TRACE_DIR (доля сессий -
+DETECTIVE_TRACE_SAMPLE). Каждая трасса проигрывается в своей сессии
+AppTest без пауз игрока; трассы делятся между --workers процессами.
+Для каждого шага берется лучшее время rerun из --repeat прогонов, а
+память на трассу - по приросту RSS в последнем прогоне. Отчет сравнивается с
+--baseline: регрессией считается рост p95 действия или времени
+отдельного шага больше чем на --tolerance (и больше --min-ms), а также
+рост памяти на трассу больше чем на --tolerance.
+
+Пример:
+    DETECTIVE_TRACE_DIR=traces streamlit run detective_main_structure.py   # запись
+    python -m tools.replay_traces traces --save-baseline baseline.json      # на текущем релизе
+    python -m tools.replay_traces traces --baseline baseline.json           # на новой сборке
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import streamlit
+
+from modules.tracing import Trace, load_traces, traced_widget
+from tools.harness import ScriptedPlayer, format_script_cache, merge_script_cache, rss_bytes, script_cache_report
+
+
+def replay_worker(traces: List[Trace], repeat: int) -> Dict:
+    """Проигрывает трассы в текущем процессе; возвращает времена шагов и прирост памяти"""
+    os.environ['DETECTIVE_FEEDBACK_DELAY'] = '0'
+    # Воспроизведение не должно писать новые трассы
+    os.environ.pop('DETECTIVE_TRACE_DIR', None)
+
+    # Прогрев: импорты, кэши контента и поискового индекса
+    ScriptedPlayer(random.Random(0)).play(2)
+
+    steps: Dict[str, Dict] = {}
+    errors: List[str] = []
+    for round_number in range(repeat):
+        # Память считается по последнему прогону, когда кэши процесса уже прогреты
+        round_started = rss_bytes()
+        for trace in traces:
+            player = ReplayPlayer(trace)
+            player.replay()
+            if round_number == 0:
+                errors += [f"{trace.trace_id}: {error}" for error in player.errors]
+            for number, (action, _, service) in enumerate(player.timings):
+                step = steps.setdefault(f"{trace.trace_id}:{number}", {'action': action, 'ms': []})
+                step['ms'].append(service * 1000)
+    return {
+        'steps': steps,
+        'errors': errors,
+        'memory_per_trace_kb': (rss_bytes() - round_started) / max(len(traces), 1) / 1024,
+        'script_cache': script_cache_report(),
+    }
+
+
+class ReplayPlayer(ScriptedPlayer):
+    """Сессия AppTest, повторяющая шаги трассы"""
+
+    WIDGET_KINDS = ('selectbox', 'radio', 'button', 'slider', 'select_slider', 'checkbox',
+                    'number_input', 'multiselect')
+
+    def __init__(self, trace: Trace):
+        super().__init__(random.Random(0))
+        self.trace = trace
+
+    def _widget(self, key: str, action: str):
+        """
+        Виджет по ключу. Если его нет (другой случайный кейс, номер в ключе
+        analysis_case_<сложность>_<i>), берется виджет того же действия.
+        """
+        widgets = [widget for kind in self.WIDGET_KINDS for widget in getattr(self.at, kind)]
+        exact = next((widget for widget in widgets if widget.key == key), None)
+        if exact is not None:
+            return exact
+        return next((widget for widget in widgets
+                     if widget.key and (traced_widget(widget.key) or (None,))[0] == action), None)
+
+    def replay(self):
+        for name, value in self.trace.query.items():
+            self.at.query_params[name] = value
+        self.start()
+        for step in self.trace.steps:
+            applied = []
+            for key, action, value in step['changes']:
+                widget = self._widget(key, action)
+                if widget is None:
+                    # Сборка разошлась с трассой: действие пропускается, остальное идет дальше
+                    self.errors.append(f"{action}: нет виджета {key}")
+                    continue
+                if widget.key != key:
+                    self.errors.append(f"{action}: {key} заменен на {widget.key}")
+                if value is True and widget.type == 'button':
+                    widget.click()
+                elif widget.type in ('radio', 'selectbox') and widget.format_func(value) not in widget.options:
+                    # Значения нет среди вариантов (другой кейс): выбор остается прежним
+                    self.errors.append(f"{action}: нет варианта {value!r}")
+                    continue
+                elif isinstance(value, list) and widget.type != 'multiselect':
+                    widget.set_value(tuple(value))
+                else:
+                    widget.set_value(value)
+                applied.append(action)
+            if applied:
+                self._run(applied[-1])
+
+
+# ===== ОТЧЕТ =====
+def summarize(results: List[Dict], traces: List[Trace]) -> Dict:
+    # Лучшее время шага из --repeat прогонов: меньше всего зависит от шума и прогрева кэшей
+    steps = {name: {'action': step['action'], 'ms': min(step['ms'])}
+             for result in results for name, step in result['steps'].items()}
+    per_action = {}
+    for step in steps.values():
+        per_action.setdefault(step['action'], []).append(step['ms'])
+    recorded = [step['ms'] for trace in traces for step in trace.steps if step['changes']]
+    return {
+        'traces': len(traces),
+        'steps': steps,
+        'per_action': {action: {'count': len(values),
+                                'p50_ms': float(np.percentile(values, 50)),
+                                'p95_ms': float(np.percentile(values, 95))}
+                       for action, values in sorted(per_action.items())},
+        'memory_per_trace_kb': float(np.mean([result['memory_per_trace_kb'] for result in results])),
+        'recorded_p95_ms': float(np.percentile(recorded, 95)) if recorded else None,
+        'errors': [error for result in results for error in result['errors']],
+        'script_cache': merge_script_cache([result['script_cache'] for result in results]),
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_ms: float) -> List[str]:
+    """Регрессии относительно базовой линии"""
+    def slower(now: float, before: float) -> bool:
+        return now > before * (1 + tolerance) and now - before > min_ms
+
+    regressions = []
+    for action, stats in current['per_action'].items():
+        before = baseline['per_action'].get(action)
+        if before and slower(stats['p95_ms'], before['p95_ms']):
+            regressions.append(f"{action}: p95 {before['p95_ms']:.0f} → {stats['p95_ms']:.0f} мс")
+    for name, step in current['steps'].items():
+        before = baseline['steps'].get(name)
+        if before and slower(step['ms'], before['ms']):
+            regressions.append(f"шаг {name} ({step['action']}): {before['ms']:.0f} → {step['ms']:.0f} мс")
+    memory_before = baseline['memory_per_trace_kb']
+    if current['memory_per_trace_kb'] > max(memory_before, 0) * (1 + tolerance) + 64:
+        regressions.append(f"память на трассу: {memory_before:.0f} → {current['memory_per_trace_kb']:.0f} КБ")
+    return regressions
+
+
+def format_report(report: Dict, baseline: Optional[Dict]) -> str:
+    lines = ["| Действие | Шагов | p50, мс | p95, мс | p95 базы, мс |", "|---|---:|---:|---:|---:|"]
+    for action, stats in report['per_action'].items():
+        before = (baseline or {}).get('per_action', {}).get(action)
+        base = f"{before['p95_ms']:.0f}" if before else "—"
+        lines.append(f"| {action} | {stats['count']} | {stats['p50_ms']:.0f} | {stats['p95_ms']:.0f} | {base} |")
+    lines.append("")
+    lines.append(f"Трасс: {report['traces']}, память на трассу: {report['memory_per_trace_kb']:.0f} КБ, "
+                 f"расхождений с трассами: {len(report['errors'])}")
+    lines.append(format_script_cache(report['script_cache']))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('traces', nargs='+', help="файлы трасс или каталоги с *.jsonl")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3, help="прогонов каждой трассы (берется лучшее время)")
+    parser.add_argument('--baseline', help="отчет прошлой сборки для сравнения")
+    parser.add_argument('--save-baseline', help="сохранить отчет как базовую линию")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="допустимый относительный рост")
+    parser.add_argument('--min-ms', type=float, default=10, help="рост меньше этого не считается регрессией")
+    parser.add_argument('--out', default='replay_report.json')
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.traces)
+    if not traces:
+        parser.error("трассы не найдены")
+    workers = max(1, min(args.workers, len(traces)))
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(replay_worker, traces[i::workers], args.repeat) for i in range(workers)]
+        results = [future.result() for future in futures]
+    print(f"Воспроизведено {len(traces)} трасс x{args.repeat} за {time.perf_counter() - started:.1f} с",
+          file=sys.stderr)
+
+    report = summarize(results, traces)
+    report['environment'] = {'python': platform.python_version(), 'streamlit': streamlit.__version__,
+                             'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        report['regressions'] = compare(report, baseline, args.tolerance, args.min_ms)
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(format_report(report, baseline))
+
+    if report.get('regressions'):
+        print("\nРегрессии:\n" + "\n".join(f"  - {line}" for line in report['regressions']))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Отчет о памяти на сессию: прежнее состояние (словарь, set-ы, словари
+сценариев) против компактного (PlayerStats, битовые множества, упакованные
+сценарии) и против сессий, вытесненных по простою.
+
+Сессии заполняются одинаковой синтетической активностью с фиксированным seed.
+
+Пример:
+    python -m tools.session_memory_report --sessions 10000 --catalog 500
+"""
+import argparse
+import gc
+import random
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from modules.content import ContentStore
+from modules.session_state import PlayerStats, ScenarioProgress, SessionRegistry, SessionStore
+
+
+def make_activity(rng: random.Random, case_ids: List[str], scenarios: Dict[str, int],
+                  achievements: List[str]) -> Dict:
+    """Случайная активность одного игрока"""
+    solved = rng.sample(case_ids, rng.randint(0, min(len(case_ids), 60)))
+    played = {scenario_id: [rng.randrange(4) for _ in range(rng.randint(1, steps))]
+              for scenario_id, steps in scenarios.items() if rng.random() < 0.5}
+    return {
+        'score': 10 * len(solved),
+        'solved': solved,
+        'achievements': [title for title in achievements if rng.random() < 0.4],
+        'scenarios': played,
+    }
+
+
+def legacy_session(player_id: str, activity: Dict) -> Dict:
+    """Состояние сессии в прежнем виде"""
+    state = {
+        'player_id': player_id,
+        'player_stats': {
+            'score': activity['score'],
+            'level': activity['score'] // 100 + 1,
+            'solved_cases': set(activity['solved']),
+            'current_streak': 0,
+            'best_streak': len(activity['solved']),
+            'achievements': set(activity['achievements']),
+            'play_time': 0,
+            'started_at': datetime.now().isoformat(),
+        },
+    }
+    for scenario_id, choices in activity['scenarios'].items():
+        state[f"scenario_{scenario_id}"] = {'step': len(choices), 'score': 10 * choices.count(0),
+                                            'choices': list(choices)}
+    return state
+
+
+def compact_session(player_id: str, activity: Dict) -> Dict:
+    """Состояние сессии в компактном виде"""
+    stats = PlayerStats(player_id)
+    stats.score = activity['score']
+    stats.level = activity['score'] // 100 + 1
+    stats.best_streak = len(activity['solved'])
+    for case_id in activity['solved']:
+        stats.solved_cases.add(case_id)
+    for title in activity['achievements']:
+        stats.achievements.add(title)
+    for scenario_id, choices in activity['scenarios'].items():
+        progress = stats.scenarios.setdefault(scenario_id, ScenarioProgress())
+        for choice in choices:
+            progress.record(choice, 10 if choice == 0 else 0)
+    return {'player_id': player_id, 'player_stats': stats}
+
+
+def measure(build: Callable[[str, Dict], Dict], activities: List[Dict],
+            after: Callable[[List[Dict]], None] = None) -> float:
+    """Средний прирост памяти на сессию по tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build(f"p{i:07d}", activity) for i, activity in enumerate(activities)]
+    if after is not None:
+        after(sessions)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del sessions
+    return used / len(activities)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=10_000)
+    parser.add_argument('--catalog', type=int, default=0,
+                        help="дополнить каталог синтетическими кейсами до этого размера")
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    snapshot = ContentStore(args.data).snapshot
+    case_ids = list(snapshot.cases)
+    case_ids += [f"generated_case_{i}" for i in range(args.catalog - len(case_ids))]
+    scenarios = {case['id']: len(case['steps']) for case in snapshot.family('scenario')}
+    achievements = [rule['title'] for rule in snapshot.achievements]
+
+    rng = random.Random(args.seed)
+    activities = [make_activity(rng, case_ids, scenarios, achievements) for _ in range(args.sessions)]
+    # Интернеры общие для процесса - заполняем их заранее, чтобы не учитывать в сессиях
+    compact_session('warmup', make_activity(random.Random(1), case_ids, scenarios, achievements))
+    for case_id in case_ids:
+        PlayerStats('warmup').solved_cases.add(case_id)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = SessionRegistry(SessionStore(str(Path(tmp) / 'sessions.sqlite3')), idle_timeout=0)
+
+        def evict(sessions):
+            for session in sessions:
+                registry.touch(session['player_stats'])
+            registry.evict_idle(now=float('inf'))
+
+        results = {
+            'Прежнее (dict + set)': measure(legacy_session, activities),
+            'Компактное (слоты + битовые маски)': measure(compact_session, activities),
+            'Компактное, вытеснено по простою': measure(compact_session, activities, after=evict),
+        }
+
+    baseline = results['Прежнее (dict + set)']
+    print(f"Сессий: {args.sessions:,}, кейсов в каталоге: {len(case_ids):,}, сценариев: {len(scenarios)}")
+    print("| Представление | Байт на сессию | Всего, МБ | Доля |")
+    print("|---|---:|---:|---:|")
+    for name, per_session in results.items():
+        print(f"| {name} | {per_session:,.0f} | {per_session * args.sessions / 2**20:,.1f} | "
+              f"{per_session / baseline:.0%} |")
+
+
+if __name__ == '__main__':
+    main()